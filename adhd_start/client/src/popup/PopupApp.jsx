@@ -8,9 +8,12 @@ import React, { useEffect, useState } from "react";
 // ---------------------------------------------------------------------------
 const API_BASE = "http://localhost:8000";
 const WORKFLOW_URL = `${API_BASE}/workflow`;
+const WORKFLOW_JOBS_URL = `${API_BASE}/workflow/jobs`;
 const PARSE_URL = `${API_BASE}/parse`;
 const BOOKMARK_URL = `${API_BASE}/bookmark`;
-const BOOKMARKS_URL = `${API_BASE}/bookmarks?user_id=demo-user`;
+// dropped bookmarks are filtered out server-side; pages are followed via next_cursor
+const BOOKMARKS_URL = `${API_BASE}/bookmarks?user_id=demo-user&status=saved,in_progress,submitted,won&limit=100`;
+const BOOKMARKS_MAX_PAGES = 5;
 const BOOKMARK_STATUS_URL = `${API_BASE}/bookmark/status`;
 const LOCAL_BOOKMARKS_KEY = "localBookmarks";
 const ELIGIBILITY_URL = `${API_BASE}/eligibility`;
@@ -215,9 +218,38 @@ function buildEligibilityHtml(merged) {
      </div>`;
 }
 
+// Submit a background workflow job, then long-poll it. If the popup closes
+// the job keeps running server-side; re-opening gets the cached result.
+async function requestWorkflowJob(payload, timeoutMs = 120000) {
+  const submit = await fetch(WORKFLOW_JOBS_URL, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(payload),
+  });
+  // older backend without /workflow/jobs
+  if (submit.status === 404) return null;
+  if (!submit.ok) throw new Error("Workflow job submit error");
+  let job = await submit.json();
+  const started = Date.now();
+  while (job.status === "queued" || job.status === "running") {
+    if (Date.now() - started > timeoutMs) throw new Error("Workflow job timed out");
+    const resp = await fetch(
+      `${WORKFLOW_JOBS_URL}/${encodeURIComponent(job.plan_id)}?wait=20`
+    );
+    if (!resp.ok) throw new Error("Workflow job status error");
+    job = await resp.json();
+  }
+  if (job.status !== "done" || !job.result) {
+    throw new Error(job.error || "Workflow job failed");
+  }
+  return job.result;
+}
+
 // workflow request + fallback combined (popup.js + popup_micro_start.js)
 async function requestWorkflowWithFallback(payload, fallbackGoal) {
   try {
+    const fromJob = await requestWorkflowJob(payload);
+    if (fromJob) return fromJob;
     const resp = await fetch(WORKFLOW_URL, {
       method: "POST",
       headers: { "Content-Type": "application/json" },
@@ -299,16 +331,26 @@ function removeLocalBookmark(id) {
 async function loadMergedBookmarks() {
   let serverItems = [];
   try {
-    const resp = await fetch(BOOKMARKS_URL);
-    if (resp.ok) {
+    let cursor = null;
+    for (let page = 0; page < BOOKMARKS_MAX_PAGES; page++) {
+      const url = cursor
+        ? `${BOOKMARKS_URL}&cursor=${encodeURIComponent(cursor)}`
+        : BOOKMARKS_URL;
+      const resp = await fetch(url);
+      if (!resp.ok) {
+        console.warn("[popup] BOOKMARKS_URL error:", resp.status);
+        break;
+      }
       const data = await resp.json();
-      if (Array.isArray(data)) {
-        serverItems = data.filter((bm) => bm.status !== "dropped");
-      } else {
-        console.warn("[popup] BOOKMARKS_URL returned non-array", data);
+      // { items, next_cursor, total, counts }; older backends return a plain array
+      const items = Array.isArray(data) ? data : data && data.items;
+      if (!Array.isArray(items)) {
+        console.warn("[popup] BOOKMARKS_URL returned no items", data);
+        break;
       }
-    } else {
-      console.warn("[popup] BOOKMARKS_URL error:", resp.status);
+      serverItems.push(...items.filter((bm) => bm.status !== "dropped"));
+      cursor = Array.isArray(data) ? null : data.next_cursor;
+      if (!cursor) break;
     }
   } catch (e) {
     console.warn(
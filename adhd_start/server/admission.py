@@ -0,0 +1,288 @@
+# server/admission.py
+"""
+Admission control for upstream calls (Anthropic, Firecrawl).
+
+Every outbound call goes through `admit(upstream, user_id)`:
+
+1. Rate limits: a token bucket per upstream (protects the account-wide
+   API limit) and one per (upstream, user) (one user's burst cannot
+   starve everyone else). If the tokens are less than the caller's max
+   wait away they are reserved and the call sleeps; otherwise it is
+   rejected straight away. A call then refused by step 2 gets its
+   tokens back.
+2. Concurrency: at most `concurrency` calls in flight per upstream.
+   Callers beyond that wait in a bounded priority queue; interactive
+   work (/parse, /plan, /workflow) is admitted before background work
+   (workflow jobs), FIFO within a priority. When the queue is already
+   full the call is refused before it takes or sleeps for any tokens.
+
+Rejections raise `Overloaded`, which the app turns into a fast 429 with
+Retry-After instead of letting the request time out upstream and fall
+into the slow error -> fallback path.
+
+Background callers mark themselves with `with priority(BACKGROUND):`;
+they are allowed to wait much longer before being rejected.
+
+Knobs (env), per upstream NAME in {ANTHROPIC, FIRECRAWL}:
+  NAME_RPM, NAME_USER_RPM, NAME_CONCURRENCY
+and ADMISSION_QUEUE_MAX, ADMISSION_MAX_WAIT_S, ADMISSION_BACKGROUND_MAX_WAIT_S.
+"""
+
+import contextvars
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+ADMISSION_QUEUE_MAX = int(os.getenv("ADMISSION_QUEUE_MAX") or 32)
+MAX_WAIT_S = {
+    INTERACTIVE: float(os.getenv("ADMISSION_MAX_WAIT_S") or 5),
+    BACKGROUND: float(os.getenv("ADMISSION_BACKGROUND_MAX_WAIT_S") or 120),
+}
+
+# name -> (requests/min, requests/min per user, max concurrent)
+_DEFAULTS = {
+    "anthropic": (50, 20, 8),
+    "firecrawl": (20, 10, 4),
+}
+# Per-user buckets kept before idle (full) ones are pruned
+_MAX_USER_BUCKETS = 1000
+_WAIT_SAMPLES = 500
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar(
+    "admission_priority", default=INTERACTIVE
+)
+
+
+class Overloaded(Exception):
+    """An upstream call was refused; retry after `retry_after` seconds."""
+
+    def __init__(self, upstream: str, reason: str, retry_after: float):
+        self.upstream = upstream
+        self.reason = reason
+        self.retry_after = max(1.0, retry_after)
+        super().__init__(f"{upstream} {reason}; retry after {self.retry_after:.0f}s")
+
+
+class TokenBucket:
+    """Classic token bucket; the balance may go negative (reservations)."""
+
+    def __init__(self, rate_per_s: float, capacity: float):
+        self.rate = rate_per_s
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available (0 if now)."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def give_back(self) -> None:
+        """Return a token taken for a call that was then refused."""
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+    def idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+def _pct(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class Upstream:
+    def __init__(self, name: str, rpm: float, user_rpm: float, concurrency: int,
+                 queue_max: int = ADMISSION_QUEUE_MAX):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.queue_max = queue_max
+        self.user_rpm = user_rpm
+        # Burst capacity: ~10 seconds' worth of calls, at least 2
+        self.bucket = TokenBucket(rpm / 60.0, max(2.0, rpm / 6.0))
+        self.user_buckets: Dict[str, TokenBucket] = {}
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._waiting: List[Tuple[int, int]] = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._service_s = 1.0  # EWMA of call duration, for Retry-After
+        self._stats: Counter = Counter()
+        self._waits: Dict[int, Deque[float]] = {
+            p: deque(maxlen=_WAIT_SAMPLES) for p in PRIORITY_NAMES
+        }
+
+    def _user_bucket(self, user_id: str, now: float) -> TokenBucket:
+        bucket = self.user_buckets.get(user_id)
+        if bucket is None:
+            if len(self.user_buckets) >= _MAX_USER_BUCKETS:
+                for uid in [u for u, b in self.user_buckets.items() if b.idle(now)]:
+                    del self.user_buckets[uid]
+            bucket = self.user_buckets[user_id] = TokenBucket(
+                self.user_rpm / 60.0, max(2.0, self.user_rpm / 6.0)
+            )
+        return bucket
+
+    def _reject(self, reason: str, retry_after: float) -> Overloaded:
+        self._stats[f"rejected_{reason}"] += 1
+        return Overloaded(self.name, reason, retry_after)
+
+    def _queue_full(self) -> bool:
+        busy = self._in_flight >= self.concurrency or self._waiting
+        return bool(busy) and len(self._waiting) >= self.queue_max
+
+    def acquire(self, user_id: str, prio: int) -> float:
+        """
+        Reserve rate tokens and a concurrency slot. Returns seconds waited.
+        A call refused after its tokens were taken gets them back, so
+        rejections under overload cost nobody rate budget.
+        """
+        started = time.monotonic()
+        max_wait = MAX_WAIT_S.get(prio, MAX_WAIT_S[INTERACTIVE])
+
+        with self._cond:
+            # a full queue is refused before any tokens are taken or slept for
+            if self._queue_full():
+                raise self._reject("queue_full", self._retry_after())
+            user_bucket = self._user_bucket(user_id or "anonymous", started)
+            user_wait = user_bucket.wait_time(started)
+            if user_wait > max_wait:
+                raise self._reject("user_rate_limited", user_wait)
+            global_wait = self.bucket.wait_time(started)
+            if global_wait > max_wait:
+                raise self._reject("rate_limited", global_wait)
+            user_bucket.take()
+            self.bucket.take()
+        rate_wait = max(user_wait, global_wait)
+        if rate_wait:
+            time.sleep(rate_wait)
+
+        try:
+            return self._take_slot(prio, started, started + max_wait)
+        except Overloaded:
+            with self._cond:
+                user_bucket.give_back()
+                self.bucket.give_back()
+            raise
+
+    def _take_slot(self, prio: int, started: float, deadline: float) -> float:
+        with self._cond:
+            if self._in_flight >= self.concurrency or self._waiting:
+                if self._queue_full():
+                    raise self._reject("queue_full", self._retry_after())
+                ticket = (prio, next(self._seq))
+                heapq.heappush(self._waiting, ticket)
+                try:
+                    while self._in_flight >= self.concurrency or self._waiting[0] != ticket:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise self._reject("queue_timeout", self._retry_after())
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    # the next ticket may now be at the head
+                    self._cond.notify_all()
+            self._in_flight += 1
+            waited = time.monotonic() - started
+            self._stats[f"admitted_{PRIORITY_NAMES.get(prio, prio)}"] += 1
+            self._waits[prio].append(waited * 1000)
+        return waited
+
+    def release(self, duration_s: float) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._service_s = 0.8 * self._service_s + 0.2 * duration_s
+            self._cond.notify_all()
+
+    def _retry_after(self) -> float:
+        # Roughly: time for the queue ahead of us to drain
+        return self._service_s * (1 + len(self._waiting) / self.concurrency)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            out: Dict[str, Any] = dict(self._stats)
+            out.update(
+                in_flight=self._in_flight,
+                queued=len(self._waiting),
+                concurrency=self.concurrency,
+                tokens=round(max(0.0, self.bucket.tokens), 2),
+                service_ms=round(self._service_s * 1000, 1),
+            )
+            out["queue_wait_ms"] = {
+                PRIORITY_NAMES[p]: {
+                    "count": len(w),
+                    "p50": round(_pct(list(w), 0.50), 1),
+                    "p95": round(_pct(list(w), 0.95), 1),
+                    "max": round(max(w), 1) if w else 0.0,
+                }
+                for p, w in self._waits.items()
+            }
+        return out
+
+
+def _from_env(name: str) -> Upstream:
+    rpm, user_rpm, conc = _DEFAULTS[name]
+    key = name.upper()
+    return Upstream(
+        name,
+        rpm=float(os.getenv(f"{key}_RPM") or rpm),
+        user_rpm=float(os.getenv(f"{key}_USER_RPM") or user_rpm),
+        concurrency=int(os.getenv(f"{key}_CONCURRENCY") or conc),
+    )
+
+
+UPSTREAMS: Dict[str, Upstream] = {name: _from_env(name) for name in _DEFAULTS}
+
+
+@contextmanager
+def admit(upstream: str, user_id: Optional[str] = None) -> Iterator[float]:
+    """
+    Hold an admission slot for one call to `upstream`; yields the seconds
+    spent waiting. Raises Overloaded instead of queueing indefinitely.
+    """
+    up = UPSTREAMS[upstream]
+    waited = up.acquire(user_id or "anonymous", _priority.get())
+    t0 = time.monotonic()
+    try:
+        yield waited
+    finally:
+        up.release(time.monotonic() - t0)
+
+
+@contextmanager
+def priority(level: int) -> Iterator[None]:
+    """Run the enclosed calls at `level` (INTERACTIVE or BACKGROUND)."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def admission_stats() -> Dict[str, Any]:
+    return {name: up.stats() for name, up in UPSTREAMS.items()}
+
+
+def retry_after_header(exc: Overloaded) -> str:
+    return str(int(math.ceil(exc.retry_after)))
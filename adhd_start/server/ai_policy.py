@@ -0,0 +1,173 @@
+# server/ai_policy.py
+"""
+AI-policy detector: does this page forbid AI-generated content?
+
+The pattern set is compiled once at startup. A page is lower-cased once
+(no page + context concatenation) and each pattern branch is searched
+with its own precompiled regex. This is deliberately not one big
+alternation: CPython's `re` only uses its fast literal-prefix scan for
+regexes without top-level `|` and without IGNORECASE, and a combined
+alternation measured ~4x slower on 1 MB pages (see
+server/tools/bench_ai_policy.py). `find()` returns the matched spans so
+the UI can show *why* a page is "coach_only".
+
+Patterns are matched against lower-cased text, so write them in lower
+case. The set can be replaced at startup by pointing
+AI_POLICY_PATTERNS_FILE at a text file with one regex per line (blank
+lines and lines starting with # are ignored).
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .log import get_logger
+
+logger = get_logger("ai_policy")
+
+DEFAULT_PATTERNS = [
+    r"no\s+ai[-\s]?generated\s+content",
+    r"must\s+be\s+your\s+own\s+work",
+    r"generative\s+ai\s+(?:is\s+|are\s+)?not\s+permitted",
+    r"plagiarism|original work only",
+]
+
+SNIPPET_RADIUS = 60
+
+
+def _split_alternatives(pattern: str) -> List[str]:
+    """Split a regex on top-level `|` (outside groups, classes and escapes)."""
+    parts: List[str] = []
+    depth = 0
+    in_class = False
+    escaped = False
+    start = 0
+    for i, ch in enumerate(pattern):
+        if escaped:
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif in_class:
+            in_class = ch != "]"
+        elif ch == "[":
+            in_class = True
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            parts.append(pattern[start:i])
+            start = i + 1
+    parts.append(pattern[start:])
+    return [p for p in parts if p]
+
+
+class AIPolicyMatcher:
+    """Precompiled forbid patterns with span reporting."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = [p for p in patterns if p]
+        # (pattern index, compiled branch)
+        self._branches: List[Tuple[int, "re.Pattern[str]"]] = []
+        for idx, pattern in enumerate(self.patterns):
+            re.compile(pattern)  # fail fast on an invalid pattern
+            for branch in _split_alternatives(pattern):
+                self._branches.append((idx, re.compile(branch)))
+        # Fallback for text whose length changes when lower-cased
+        self._ci_branches = [(idx, re.compile(rx.pattern, re.I)) for idx, rx in self._branches]
+
+    def _haystack(self, text: str) -> Tuple[str, List[Tuple[int, "re.Pattern[str]"]]]:
+        low = text.lower()
+        if len(low) == len(text):
+            return low, self._branches
+        # Rare unicode case (e.g. "İ"): offsets would drift, so scan the
+        # original text case-insensitively instead.
+        return text, self._ci_branches
+
+    def detect(self, text: str, extra_context: str = "") -> str:
+        """'coach_only' if any pattern matches the page or context, else 'ok'."""
+        for hay in (text, extra_context):
+            if not hay:
+                continue
+            hay, branches = self._haystack(hay)
+            if any(rx.search(hay) for _idx, rx in branches):
+                return "coach_only"
+        return "ok"
+
+    def find(
+        self,
+        text: str,
+        extra_context: str = "",
+        limit: Optional[int] = 20,
+    ) -> List[Dict[str, Any]]:
+        """
+        All matches, in page order, as dicts:
+          { pattern, source ("page"|"context"), start, end, match, snippet }
+        Offsets are into the original string for that source.
+        """
+        out: List[Dict[str, Any]] = []
+        for source, original in (("page", text), ("context", extra_context)):
+            if not original:
+                continue
+            hay, branches = self._haystack(original)
+            hits = sorted(
+                ((m.start(), m.end(), idx) for idx, rx in branches for m in rx.finditer(hay)),
+                key=lambda h: (h[0], -h[1]),
+            )
+            for start, end, idx in hits:
+                lo = max(0, start - SNIPPET_RADIUS)
+                hi = min(len(original), end + SNIPPET_RADIUS)
+                out.append(
+                    {
+                        "pattern": self.patterns[idx],
+                        "source": source,
+                        "start": start,
+                        "end": end,
+                        "match": original[start:end],
+                        "snippet": " ".join(original[lo:hi].split()),
+                    }
+                )
+                if limit is not None and len(out) >= limit:
+                    return out
+        return out
+
+
+def load_patterns(path: Optional[Path] = None) -> List[str]:
+    """Patterns from AI_POLICY_PATTERNS_FILE (or `path`), else the defaults."""
+    env_path = os.getenv("AI_POLICY_PATTERNS_FILE")
+    path = path or (Path(env_path) if env_path else None)
+    if path is None:
+        return list(DEFAULT_PATTERNS)
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except OSError as e:
+        logger.warning("could not read %s, using defaults: %r", path, e)
+        return list(DEFAULT_PATTERNS)
+    patterns = [ln.strip() for ln in lines if ln.strip() and not ln.strip().startswith("#")]
+    for p in patterns:
+        re.compile(p)  # fail fast at startup on a bad pattern
+    logger.info("loaded %d patterns from %s", len(patterns), path)
+    return patterns
+
+
+_matcher = AIPolicyMatcher(load_patterns())
+
+
+def get_matcher() -> AIPolicyMatcher:
+    return _matcher
+
+
+def set_patterns(patterns: Iterable[str]) -> AIPolicyMatcher:
+    """Swap the active pattern set (e.g. after editing the patterns file)."""
+    global _matcher
+    _matcher = AIPolicyMatcher(patterns)
+    return _matcher
+
+
+def detect(text: str, extra_context: str = "") -> str:
+    return _matcher.detect(text, extra_context)
+
+
+def find_matches(text: str, extra_context: str = "", limit: Optional[int] = 20) -> List[Dict[str, Any]]:
+    return _matcher.find(text, extra_context, limit=limit)
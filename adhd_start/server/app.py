@@ -1,38 +1,78 @@
 # server/app.py
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Union
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from .schemas import (  # type: ignore 
     ParseIn,
     ParseOut,
+    ParseBatchIn,
+    ParseBatchOut,
+    ParseBatchResult,
     PlanIn,
     PlanOut,
     WorkflowIn,
     WorkflowOut,
+    WorkflowJobOut,
     FeedbackIn,
     BookmarkIn,
     BookmarkOut,
+    BookmarkPage,
     BookmarkStatusIn,
     EligibilityIn,
     EligibilityOut,
+    EligibilityCatalogIn,
+    EligibilityCatalogOut,
+    EligibilityMatch,
+    RankIn,
+    RankOut,
+    RankedScholarship,
+    UpcomingItem,
+    UpcomingOut,
 )
 from .llm import (  # type: ignore
     extract_fields_rag_or_llm,
+    extract_fields_batch,
+    PARSE_BATCH_MAX_ITEMS,
     make_plan_with_llm,
     make_workflow_with_llm,
+    check_eligibility_clauses_with_llm,
+    llm_stats,
+    ELIGIBILITY_LLM,
 )
 from .user_repo import (  # type: ignore 
+    get_user,
     list_bookmarks,
     upsert_bookmark,
     set_bookmark_status,
+    query_bookmarks,
+    upcoming_bookmarks,
+    BOOKMARK_SORTS,
+    BOOKMARK_STATUSES,
+    OPEN_STATUSES,
 )
 from .scholarship_repo import scholarship_repo  # type: ignore 
-
-import json
-from datetime import datetime
+from .scholarship_models import Scholarship  # type: ignore
+from . import eligibility as elig  # type: ignore
+from . import deadlines  # type: ignore
+from .jobs import job_queue  # type: ignore
+from . import admission  # type: ignore
+from .breaker import breaker_stats  # type: ignore
+from . import metrics  # type: ignore
+from .singleflight import singleflight_stats  # type: ignore
+from .cache import cache_stats  # type: ignore
+from .log import get_logger, new_request_id, bind_request_id, unbind_request_id, log_stats  # type: ignore
+from .fastjson import FastJSONResponse, typed_response, typed_list_response, dumps as json_dumps  # type: ignore
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
 
 from pathlib import Path
 from dotenv import load_dotenv
@@ -41,16 +81,25 @@ from dotenv import load_dotenv
 ROOT_DIR = Path(__file__).resolve().parent.parent
 load_dotenv(ROOT_DIR / ".env")
 
+logger = get_logger("app")
+
+# Optional catalog ranking (needs numpy)
+try:
+    from . import ranking as _ranking  # type: ignore
+except Exception as exc:  # pragma: no cover
+    logger.warning("catalog ranking disabled: %s", exc)
+    _ranking = None  # type: ignore
+
 # Optional user‑RAG ingest
 try:
     from server.rag.ingest_user import (  # type: ignore
         upsert_user_text as _rag_upsert_user_text,
     )
 except Exception as exc:  # pragma: no cover
-    print("[app] user RAG ingest disabled:", exc)
+    logger.warning("user RAG ingest disabled: %s", exc)
     _rag_upsert_user_text = None  # type: ignore
 
-app = FastAPI(title="ADHD Copilot Backend")
+app = FastAPI(title="ADHD Copilot Backend", default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -66,12 +115,82 @@ STORE_DIR.mkdir(exist_ok=True)
 FEEDBACK_FILE = STORE_DIR / "feedback.jsonl"
 
 
+@app.middleware("http")
+async def _timing(request: Request, call_next):
+    # Per-request span table -> Server-Timing header + latency histogram;
+    # request id -> every log record written while serving the request
+    request_id = (request.headers.get("x-request-id") or "")[:64] or new_request_id()
+    rid_token = bind_request_id(request_id)
+    token, spans = metrics.begin_request()
+    t0 = time.perf_counter()
+    try:
+        response = await call_next(request)
+        elapsed = time.perf_counter() - t0
+        route = getattr(request.scope.get("route"), "path", None) or "unmatched"
+        metrics.observe_request(request.method, route, response.status_code, elapsed)
+        logger.info(
+            "request",
+            extra={
+                "method": request.method,
+                "route": route,
+                "status": response.status_code,
+                "duration_ms": round(elapsed * 1000, 1),
+                "stages_ms": {k: round(v[0] * 1000, 1) for k, v in spans.items()},
+            },
+        )
+    finally:
+        metrics.end_request(token)
+        unbind_request_id(rid_token)
+    response.headers["Server-Timing"] = metrics.server_timing(spans, elapsed)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
+@app.exception_handler(admission.Overloaded)
+def _overloaded(request: Request, exc: admission.Overloaded) -> JSONResponse:
+    # Fail fast instead of letting the request queue behind a saturated upstream
+    return JSONResponse(
+        status_code=429,
+        content={
+            "detail": "overloaded",
+            "upstream": exc.upstream,
+            "reason": exc.reason,
+            "retry_after": exc.retry_after,
+        },
+        headers={"Retry-After": admission.retry_after_header(exc)},
+    )
+
+
 def _append_jsonl(path: Path, record: Dict[str, Any]) -> None:
     try:
-        with path.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        with metrics.span("disk_io"), path.open("ab") as f:
+            f.write(json_dumps(record) + b"\n")
     except Exception as exc:  # pragma: no cover
-        print("[store] append_jsonl error:", exc)
+        logger.error("append_jsonl failed for %s: %s", path.name, exc)
+
+
+@app.on_event("startup")
+def _start_job_workers() -> None:
+    job_queue.start()
+
+
+@app.on_event("startup")
+def _preload_state() -> None:
+    # APP_PRELOAD=1: load the embedding model etc. at startup instead of
+    # on the first request (no-op under server.prefork, which already did)
+    if os.getenv("APP_PRELOAD") == "1":
+        from .prefork import preload
+
+        preload()
+
+
+@app.on_event("startup")
+def _prewarm_ranking() -> None:
+    # Build catalog ranking features off the request path
+    if _ranking is not None:
+        threading.Thread(
+            target=_ranking.features_for, args=(scholarship_repo,), daemon=True
+        ).start()
 
 
 # ---------------------------------------------------------------------------
@@ -81,7 +200,81 @@ def _append_jsonl(path: Path, record: Dict[str, Any]) -> None:
 
 @app.get("/health")
 def health() -> Dict[str, Any]:
-    return {"ok": True, "ts": datetime.utcnow().isoformat()}
+    return {
+        "ok": True,
+        "ts": datetime.utcnow().isoformat(),
+        "llm": llm_stats(),
+        "jobs": job_queue.stats(),
+        "admission": admission.admission_stats(),
+        "breakers": breaker_stats(),
+        "log": log_stats(),
+        "cache": cache_stats(),
+    }
+
+
+def _collect_metrics() -> List[Any]:
+    """Counters/gauges kept by other modules, in Prometheus shape."""
+    stats = llm_stats()
+    families: List[Any] = []
+    for name, kind in (
+        ("calls", "adhd_llm_calls_total"),
+        ("parse_failures", "adhd_llm_parse_failures_total"),
+        ("input_tokens", "adhd_llm_input_tokens_total"),
+        ("output_tokens", "adhd_llm_output_tokens_total"),
+        ("cache_read_tokens", "adhd_llm_cache_read_tokens_total"),
+    ):
+        families.append((
+            kind, f"Claude {name.replace('_', ' ')} by endpoint.", "counter",
+            {(("endpoint", ep),): v for ep, v in stats.get(name, {}).items()},
+        ))
+    families.append((
+        "adhd_parse_tier_total", "/parse answers by tier.", "counter",
+        {(("tier", t),): v["count"] for t, v in stats["parse_tiers"].items() if isinstance(v, dict)},
+    ))
+
+    adm = admission.admission_stats()
+    families.append((
+        "adhd_upstream_in_flight", "Upstream calls in flight.", "gauge",
+        {(("upstream", u),): s["in_flight"] for u, s in adm.items()},
+    ))
+    families.append((
+        "adhd_upstream_queued", "Upstream calls waiting for admission.", "gauge",
+        {(("upstream", u),): s["queued"] for u, s in adm.items()},
+    ))
+    families.append((
+        "adhd_upstream_rejected_total", "Upstream calls refused by admission control.", "counter",
+        {
+            (("reason", k[len("rejected_"):]), ("upstream", u)): v
+            for u, s in adm.items() for k, v in s.items() if k.startswith("rejected_")
+        },
+    ))
+    families.append((
+        "adhd_breaker_open", "1 while an upstream's circuit breaker is open.", "gauge",
+        {(("upstream", u),): float(b["state"] == "open") for u, b in breaker_stats().items()},
+    ))
+    families.append((
+        "adhd_coalesced_calls_total", "Calls served by an identical in-flight call.", "counter",
+        {(("group", g),): s["coalesced"] for g, s in singleflight_stats().items()},
+    ))
+    namespaces = cache_stats()["namespaces"]
+    for event in ("hits", "misses", "errors"):
+        families.append((
+            f"adhd_cache_{event}_total", f"Shared cache {event} by namespace.", "counter",
+            {(("namespace", ns),): s[event] for ns, s in namespaces.items()},
+        ))
+    families.append((
+        "adhd_jobs", "Background jobs by status.", "gauge",
+        {(("status", st),): n for st, n in job_queue.stats()["jobs"].items()},
+    ))
+    return families
+
+
+metrics.register_collector(_collect_metrics)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 
 # ---------------------------------------------------------------------------
@@ -89,15 +282,11 @@ def health() -> Dict[str, Any]:
 # ---------------------------------------------------------------------------
 
 
-@app.post("/parse", response_model=ParseOut)
-def parse_fields(payload: ParseIn) -> ParseOut:
-    fields, sources = extract_fields_rag_or_llm(
-        page_text=payload.text,
-        user_id=payload.user_id,
-    )
-
-    found = sum(1 for k in ("deadline", "refs_required", "values") if fields.get(k))
-    confidence = min(0.5 + 0.15 * found, 0.98)
+def _parse_out(fields: Dict[str, Any], sources: List[Dict[str, Any]]) -> ParseOut:
+    confidence = fields.get("confidence")
+    if confidence is None:
+        found = sum(1 for k in ("deadline", "refs_required", "values") if fields.get(k))
+        confidence = min(0.5 + 0.15 * found, 0.98)
 
     return ParseOut(
         deadline=fields.get("deadline"),
@@ -106,9 +295,54 @@ def parse_fields(payload: ParseIn) -> ParseOut:
         ai_policy=fields.get("ai_policy", "ok"),
         confidence=confidence,
         sources=(sources or [])[:5],
+        tier=fields.get("tier"),
+        field_confidence=fields.get("field_confidence") or {},
+        ai_policy_matches=fields.get("ai_policy_matches") or [],
     )
 
 
+@app.post("/parse", response_model=ParseOut)
+def parse_fields(payload: ParseIn) -> ParseOut:
+    fields, sources = extract_fields_rag_or_llm(
+        page_text=payload.text,
+        user_id=payload.user_id,
+    )
+    return typed_response(_parse_out(fields, sources))
+
+
+@app.post("/parse/batch", response_model=ParseBatchOut)
+def parse_batch(payload: ParseBatchIn) -> ParseBatchOut:
+    """Parse many pages in one round trip; failures are reported per item."""
+    if len(payload.items) > PARSE_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"too_many_items (max {PARSE_BATCH_MAX_ITEMS})",
+        )
+    t0 = time.perf_counter()
+    results, stats = extract_fields_batch(
+        [item.text for item in payload.items],
+        user_id=payload.user_id,
+    )
+    out: List[ParseBatchResult] = []
+    for i, (item, res) in enumerate(zip(payload.items, results)):
+        out.append(
+            ParseBatchResult(
+                index=i,
+                id=item.id,
+                ok=res["ok"],
+                result=_parse_out(res["fields"], res["sources"]) if res["ok"] else None,
+                error=res.get("error"),
+                duplicate_of=res["duplicate_of"],
+            )
+        )
+    return typed_response(ParseBatchOut(
+        results=out,
+        unique=stats["unique"],
+        failed=sum(1 for r in out if not r.ok),
+        took_ms=round((time.perf_counter() - t0) * 1000, 2),
+    ))
+
+
 # ---------------------------------------------------------------------------
 # /plan – popup micro‑start
 # ---------------------------------------------------------------------------
@@ -121,7 +355,7 @@ def plan(payload: PlanIn) -> PlanOut:
         text=payload.text or "",
         user_id=payload.user_id,
     )
-    return PlanOut(**plan_dict)
+    return typed_response(PlanOut(**plan_dict))
 
 
 # ---------------------------------------------------------------------------
@@ -137,7 +371,39 @@ def workflow(payload: WorkflowIn) -> WorkflowOut:
         user_id=payload.user_id,
         page_url=payload.page_url,
     )
-    return WorkflowOut(**wf_dict)
+    return typed_response(WorkflowOut(**wf_dict))
+
+
+def _run_workflow_job(payload: Dict[str, Any], job_id: str) -> Dict[str, Any]:
+    # Nobody is blocked on the HTTP side: yield upstream slots to live requests
+    with admission.priority(admission.BACKGROUND):
+        wf_dict = make_workflow_with_llm(
+            goal=payload["goal"],
+            text=payload.get("raw_text") or "",
+            user_id=payload["user_id"],
+            page_url=payload.get("page_url"),
+        )
+    wf_dict["plan_id"] = job_id
+    # validate + drop internal keys (_scraped_content, metadata) before persisting
+    return WorkflowOut(**wf_dict).model_dump()
+
+
+job_queue.register("workflow", _run_workflow_job)
+
+
+@app.post("/workflow/jobs", response_model=WorkflowJobOut)
+def workflow_job_submit(payload: WorkflowIn) -> WorkflowJobOut:
+    """Queue /workflow generation; returns the plan_id to poll at once."""
+    return typed_response(WorkflowJobOut(**job_queue.submit("workflow", payload.model_dump())))
+
+
+@app.get("/workflow/jobs/{plan_id}", response_model=WorkflowJobOut)
+def workflow_job_status(plan_id: str, wait: float = 0.0) -> WorkflowJobOut:
+    """Job status; `wait` (seconds, max 25) long-polls until it finishes."""
+    job = job_queue.get(plan_id, wait_s=max(0.0, wait))
+    if job is None:
+        raise HTTPException(status_code=404, detail="job_not_found")
+    return typed_response(WorkflowJobOut(**job))
 
 
 # ---------------------------------------------------------------------------
@@ -173,27 +439,72 @@ def feedback(payload: FeedbackIn) -> Dict[str, Any]:
                 tag="feedback_good_round",
             )
         except Exception as exc:  # pragma: no cover
-            print("[feedback] user RAG ingest failed:", exc)
+            logger.warning("user RAG ingest failed: %s", exc, extra={"user_id": payload.user_id})
 
     return {"ok": True}
 
 
 # ---------------------------------------------------------------------------
-# Eligibility – simple stub for now
+# Eligibility – local rules (server/eligibility.py), optional LLM escalation
 # ---------------------------------------------------------------------------
 
 
+def _eligibility_profile(user_id: str, submitted: Dict[str, Any] | None) -> Dict[str, Any]:
+    try:
+        stored = get_user(user_id)
+    except Exception as exc:  # pragma: no cover
+        logger.warning("could not load stored profile: %s", exc, extra={"user_id": user_id})
+        stored = {}
+    return elig.merge_profiles(stored, submitted)
+
+
 @app.post("/eligibility", response_model=EligibilityOut)
 def eligibility(payload: EligibilityIn) -> EligibilityOut:
-    # You can make this smarter later; for now it's just a hint.
-    return EligibilityOut(
-        eligible=True,
-        reasons=[
-            "Eligibility check is not fully implemented yet; "
-            "use Scan + your own judgment.",
-        ],
-        missing_info=[],
+    profile = _eligibility_profile(payload.user_id, payload.profile)
+    result = elig.check_eligibility(payload.text, profile)
+
+    tier = "local"
+    if result.ambiguous and (payload.use_llm or ELIGIBILITY_LLM):
+        verdicts = check_eligibility_clauses_with_llm(result.ambiguous, profile)
+        if verdicts:
+            elig.apply_verdicts(result, verdicts)
+            tier = "llm"
+
+    return typed_response(EligibilityOut(
+        eligible=result.eligible,
+        reasons=result.reasons,
+        missing_info=result.missing_info,
+        requirements=[c.as_dict() for c in result.checks],
+        ambiguous=result.ambiguous,
+        tier=tier,
+    ))
+
+
+@app.post("/eligibility/catalog", response_model=EligibilityCatalogOut)
+def eligibility_catalog(payload: EligibilityCatalogIn) -> EligibilityCatalogOut:
+    """Score one user against every scholarship in the library, best first."""
+    profile = _eligibility_profile(payload.user_id, payload.profile)
+    ranked = elig.score_catalog(
+        scholarship_repo.all(), profile, eligible_only=payload.eligible_only
     )
+    page = ranked[payload.offset : payload.offset + payload.limit]
+    return typed_response(EligibilityCatalogOut(
+        user_id=payload.user_id,
+        total=len(ranked),
+        items=[
+            EligibilityMatch(
+                scholarship_id=s.id,
+                title=s.title,
+                source_url=str(s.source_url),
+                deadline_date=s.deadline_date.isoformat() if s.deadline_date else None,
+                eligible=r.eligible,
+                score=r.score,
+                reasons=r.reasons,
+                missing_info=r.missing_info,
+            )
+            for s, r in page
+        ],
+    ))
 
 
 # ---------------------------------------------------------------------------
@@ -211,13 +522,67 @@ def bookmark(payload: BookmarkIn) -> BookmarkOut:
         deadline=payload.deadline,
         tags=payload.tags,
     )
-    return BookmarkOut(**bm)
-
-
-@app.get("/bookmarks", response_model=List[BookmarkOut])
-def bookmarks(user_id: str = "demo-user") -> List[BookmarkOut]:
-    items = list_bookmarks(user_id)
-    return [BookmarkOut(**bm) for bm in items]
+    return typed_response(BookmarkOut(**bm))
+
+
+BOOKMARKS_PAGE_MAX = 200
+
+
+@app.get("/bookmarks", response_model=Union[BookmarkPage, List[BookmarkOut]])
+def bookmarks(
+    user_id: str = "demo-user",
+    status: Optional[str] = None,
+    tag: Optional[str] = None,
+    source_site: Optional[str] = None,
+    due_after: Optional[date] = None,
+    due_before: Optional[date] = None,
+    sort: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> Union[BookmarkPage, List[BookmarkOut]]:
+    """
+    One page of the user's bookmarks plus per-status counts.
+
+    status: one or more (comma-separated) of saved, in_progress,
+    submitted, won, dropped. due_after/due_before are inclusive.
+    sort: updated_at (newest first, the default) or deadline (soonest
+    first, none last). limit defaults to 50. Follow `next_cursor` with
+    ?cursor= (same filters and sort).
+
+    Without any of these parameters the response is the plain list of
+    all bookmarks, as before pagination: the built extension_dist popup
+    still expects an array.
+    """
+    paged = (status, tag, source_site, due_after, due_before, sort, limit, cursor)
+    if all(p is None for p in paged):
+        return typed_list_response(BookmarkOut(**bm) for bm in list_bookmarks(user_id))
+    sort = sort or "updated_at"
+    limit = 50 if limit is None else limit
+    statuses = tuple(s.strip() for s in (status or "").split(",") if s.strip()) or None
+    if statuses and any(s not in BOOKMARK_STATUSES for s in statuses):
+        raise HTTPException(status_code=422, detail=f"status must be among {', '.join(BOOKMARK_STATUSES)}")
+    if sort not in BOOKMARK_SORTS:
+        raise HTTPException(status_code=422, detail=f"sort must be one of {', '.join(BOOKMARK_SORTS)}")
+    try:
+        page = query_bookmarks(
+            user_id,
+            statuses=statuses,
+            tag=tag,
+            source_site=source_site,
+            due_after=due_after,
+            due_before=due_before,
+            sort=sort,
+            limit=max(1, min(limit, BOOKMARKS_PAGE_MAX)),
+            cursor=cursor,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return typed_response(BookmarkPage(
+        items=[BookmarkOut(**bm) for bm in page["items"]],
+        next_cursor=page["next_cursor"],
+        total=page["total"],
+        counts=page["counts"],
+    ))
 
 
 @app.post("/bookmark/status", response_model=BookmarkOut)
@@ -226,7 +591,7 @@ def bookmark_status(payload: BookmarkStatusIn) -> BookmarkOut:
         bm = set_bookmark_status(payload.user_id, payload.id, payload.status)
     except ValueError:
         raise HTTPException(status_code=404, detail="bookmark_not_found")
-    return BookmarkOut(**bm)
+    return typed_response(BookmarkOut(**bm))
 
 
 # ---------------------------------------------------------------------------
@@ -234,7 +599,118 @@ def bookmark_status(payload: BookmarkStatusIn) -> BookmarkOut:
 # ---------------------------------------------------------------------------
 
 
-@app.get("/scholarships")
-def scholarships(q: str = "") -> List[Dict[str, Any]]:
-    items = scholarship_repo.list(q=q or None)
-    return [s.model_dump() for s in items]
+@app.get("/scholarships", response_model=List[Scholarship])
+def scholarships(
+    q: str = "",
+    due_after: Optional[date] = None,
+    due_before: Optional[date] = None,
+) -> List[Scholarship]:
+    items = scholarship_repo.list(q=q or None, due_after=due_after, due_before=due_before)
+    return typed_list_response(items)
+
+
+@app.post("/scholarships/rank", response_model=RankOut)
+def scholarships_rank(payload: RankIn) -> RankOut:
+    """Rank every scholarship for this user (precomputed NumPy features)."""
+    if _ranking is None:
+        raise HTTPException(status_code=503, detail="ranking_unavailable")
+    t0 = time.perf_counter()
+    profile = _eligibility_profile(payload.user_id, payload.profile)
+    feats = _ranking.features_for(scholarship_repo)
+    total, ranked = _ranking.rank(
+        feats,
+        profile,
+        limit=payload.limit,
+        offset=payload.offset,
+        include_expired=payload.include_expired,
+        weights=payload.weights,
+    )
+    items = [
+        RankedScholarship(
+            scholarship_id=feats.items[r["index"]].id,
+            title=feats.items[r["index"]].title,
+            source_url=str(feats.items[r["index"]].source_url),
+            deadline_date=r["deadline_date"],
+            amount=r["amount"],
+            score=r["score"],
+            components=r["components"],
+            flags=r["flags"],
+        )
+        for r in ranked
+    ]
+    return typed_response(RankOut(
+        user_id=payload.user_id,
+        total=total,
+        catalog_version=feats.version,
+        took_ms=round((time.perf_counter() - t0) * 1000, 2),
+        items=items,
+    ))
+
+
+# ---------------------------------------------------------------------------
+# /upcoming – next deadlines across bookmarks + catalog
+# ---------------------------------------------------------------------------
+
+UPCOMING_MAX_ITEMS = 200
+
+
+def _upcoming_item(kind: str, due: date, obj: Any, today: date) -> UpcomingItem:
+    if kind == "bookmark":
+        return UpcomingItem(
+            kind="bookmark",
+            id=obj["id"],
+            title=obj.get("title"),
+            url=obj["url"],
+            source_site=obj.get("source_site"),
+            deadline=due.isoformat(),
+            days_left=(due - today).days,
+            status=obj.get("status") or "saved",
+        )
+    return UpcomingItem(
+        kind="scholarship",
+        id=obj.id,
+        title=obj.title,
+        url=str(obj.apply_url or obj.source_url),
+        source_site=obj.source_site,
+        deadline=due.isoformat(),
+        days_left=(due - today).days,
+    )
+
+
+@app.get("/upcoming", response_model=UpcomingOut)
+def upcoming(
+    user_id: str = "demo-user",
+    limit: int = 20,
+    days: Optional[int] = None,
+    include: str = "all",
+    include_closed: bool = False,
+    today: Optional[date] = None,
+) -> UpcomingOut:
+    """
+    The next `limit` deadlines from today (the user's timezone unless
+    `today` is given), soonest first, within `days` if set. `include`:
+    all | bookmarks | catalog. Bookmarks that are submitted/won/dropped
+    are left out unless include_closed. Both sources are read from their
+    deadline indexes and merged, so this never scans everything.
+    """
+    if include not in ("all", "bookmarks", "catalog"):
+        raise HTTPException(status_code=422, detail="include must be all, bookmarks or catalog")
+    limit = max(1, min(limit, UPCOMING_MAX_ITEMS))
+    if today is None:
+        today = deadlines.local_today(deadlines.user_timezone(get_user(user_id)))
+    until = today + timedelta(days=days) if days is not None else None
+
+    feeds = []
+    if include in ("all", "bookmarks"):
+        statuses = None if include_closed else OPEN_STATUSES
+        found = upcoming_bookmarks(user_id, today, limit, until=until, statuses=statuses)
+        feeds.append([(d, 0, "bookmark", bm) for d, bm in found])
+    if include in ("all", "catalog"):
+        found = scholarship_repo.upcoming(today, limit, until=until)
+        feeds.append([(d, 1, "scholarship", s) for d, s in found])
+    merged = heapq.merge(*feeds, key=lambda e: e[:2])
+    return typed_response(UpcomingOut(
+        user_id=user_id,
+        today=today.isoformat(),
+        items=[_upcoming_item(kind, d, obj, today) for d, _, kind, obj in itertools.islice(merged, limit)],
+    ))
@@ -0,0 +1,207 @@
+# server/breaker.py
+"""
+Circuit breakers for upstream APIs (Anthropic, Firecrawl).
+
+When an upstream is down, every request used to wait for the full
+timeout before falling back to the heuristics. A breaker counts
+consecutive failures (errors, or calls slower than `slow_ms`); after
+BREAKER_FAILURES of them it opens and calls fail immediately with
+CircuitOpen, which the callers already treat like any other upstream
+error (-> heuristic fallback). After BREAKER_OPEN_S it goes half-open
+and lets a single probe call through: success closes it, failure opens
+it again.
+
+Callers that can skip the upstream entirely check `is_open()` first;
+`guard()` wraps the actual call.
+
+Knobs (env): BREAKER_FAILURES, BREAKER_OPEN_S, ANTHROPIC_SLOW_MS,
+FIRECRAWL_SLOW_MS.
+"""
+
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from .admission import Overloaded
+from .cassette import CassetteMiss
+from .log import get_logger
+
+logger = get_logger("breaker")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES") or 5)
+BREAKER_OPEN_S = float(os.getenv("BREAKER_OPEN_S") or 30)
+
+
+class CircuitOpen(Exception):
+    """The upstream's breaker is open; the call was not attempted."""
+
+    def __init__(self, name: str, retry_in_s: float):
+        self.name = name
+        self.retry_in_s = retry_in_s
+        super().__init__(f"{name} circuit open (next probe in {retry_in_s:.0f}s)")
+
+
+def _always(exc: BaseException) -> bool:
+    return True
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = BREAKER_FAILURES,
+        open_s: float = BREAKER_OPEN_S,
+        slow_ms: Optional[float] = None,
+        is_failure: Callable[[BaseException], bool] = _always,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.open_s = open_s
+        self.slow_ms = slow_ms
+        self.is_failure = is_failure
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._stats: Counter = Counter()
+        self._last_error: Optional[str] = None
+
+    def _retry_in(self, now: float) -> float:
+        return max(0.0, self._opened_at + self.open_s - now)
+
+    def is_open(self) -> bool:
+        """True while calls would be short-circuited (no probe is due yet)."""
+        with self._lock:
+            if self._state == OPEN:
+                return self._retry_in(time.monotonic()) > 0
+            return self._state == HALF_OPEN and self._probing
+
+    def _before(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if self._state == OPEN and self._retry_in(now) <= 0:
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN:
+                if self._probing:
+                    self._stats["short_circuited"] += 1
+                    raise CircuitOpen(self.name, self.open_s)
+                self._probing = True
+                self._stats["probes"] += 1
+            elif self._state == OPEN:
+                self._stats["short_circuited"] += 1
+                raise CircuitOpen(self.name, self._retry_in(now))
+
+    def _abandon(self) -> None:
+        """The call never reached the upstream: free the probe slot, keep the state."""
+        with self._lock:
+            self._probing = False
+
+    def _record(self, ok: bool, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._probing = False
+            if ok:
+                if self._state != CLOSED:
+                    logger.info("circuit closed", extra={"upstream": self.name})
+                self._state = CLOSED
+                self._failures = 0
+                return
+            self._stats["failures"] += 1
+            self._failures += 1
+            self._last_error = error
+            if self._state == HALF_OPEN or (
+                self._state == CLOSED and self._failures >= self.failure_threshold
+            ):
+                if self._state == CLOSED:
+                    self._stats["trips"] += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                logger.warning(
+                    "circuit open: %s", error,
+                    extra={"upstream": self.name, "failures": self._failures},
+                )
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """
+        Wrap one upstream call. Raises CircuitOpen without running the body
+        when open; otherwise records the outcome (errors for which
+        `is_failure` is false, e.g. a 400, count as success).
+
+        Overloaded / CircuitOpen / CassetteMiss from inside the body mean
+        the call was never made, so they record nothing: a half-open probe refused by
+        admission control neither closes nor reopens the breaker. Take
+        admission outside guard() so queueing time is not timed as
+        upstream latency.
+        """
+        self._before()
+        t0 = time.monotonic()
+        try:
+            yield
+        except (Overloaded, CircuitOpen, CassetteMiss):
+            self._abandon()
+            raise
+        except BaseException as exc:
+            if self.is_failure(exc):
+                self._record(False, f"{type(exc).__name__}: {exc}"[:200])
+            else:
+                self._record(True)
+            raise
+        elapsed_ms = (time.monotonic() - t0) * 1000
+        if self.slow_ms is not None and elapsed_ms > self.slow_ms:
+            self._record(False, f"slow call ({elapsed_ms:.0f} ms)")
+        else:
+            self._record(True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            state = self._state
+            if state == OPEN and self._retry_in(now) <= 0:
+                state = HALF_OPEN  # next call will probe
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "retry_in_s": round(self._retry_in(now), 1) if state == OPEN else 0.0,
+                "last_error": self._last_error,
+                **{k: self._stats.get(k, 0) for k in ("trips", "failures", "short_circuited", "probes")},
+            }
+
+
+def upstream_failure(exc: BaseException) -> bool:
+    """
+    Whether an exception says the upstream is unhealthy: transport errors,
+    timeouts, 429 and 5xx. Client errors (4xx), our own admission
+    refusals and cassette replay misses do not count.
+    """
+    if isinstance(exc, (Overloaded, CircuitOpen, CassetteMiss)):
+        return False
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status is None or status == 429 or status >= 500
+
+
+BREAKERS: Dict[str, CircuitBreaker] = {
+    "anthropic": CircuitBreaker(
+        "anthropic",
+        slow_ms=float(os.getenv("ANTHROPIC_SLOW_MS") or 45000),
+        is_failure=upstream_failure,
+    ),
+    "firecrawl": CircuitBreaker(
+        "firecrawl",
+        slow_ms=float(os.getenv("FIRECRAWL_SLOW_MS") or 30000),
+        is_failure=upstream_failure,
+    ),
+}
+
+
+def breaker_stats() -> Dict[str, Any]:
+    return {name: b.stats() for name, b in BREAKERS.items()}
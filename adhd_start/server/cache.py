@@ -0,0 +1,506 @@
+# server/cache.py
+"""
+Pluggable cache tier shared by workers (and nodes).
+
+In-process dicts are per worker: with N uvicorn workers the hit rate
+drops by ~N and memory is paid N times. Callers here use a namespaced
+view on one configured backend instead:
+
+    from .cache import namespace
+    _scrape_cache = namespace("scrape", ttl_s=6 * 3600)
+    hit = _scrape_cache.get(url)          # None on miss
+    _scrape_cache.set(url, [markdown, metadata])
+
+Backends (CACHE_BACKEND):
+  memory   in-process LRU (CACHE_LRU_SIZE entries); the default
+  sqlite   one SQLite file per box (CACHE_SQLITE_PATH, WAL mode), shared
+           by every worker process on it
+  redis    any Redis-protocol server (CACHE_URL, redis://[:pw@]host:port/db)
+           for multi-node deployments; spoken directly over RESP, no
+           client library needed. server/tools/resp_standin.py is a
+           local stand-in for testing.
+  none     caching disabled
+
+For sqlite/redis a small in-process LRU sits in front (CACHE_L1_TTL_S,
+default 30 s) so hot keys skip the round trip; a delete therefore
+reaches other workers' copies within that window at most.
+
+Semantics, identical on every backend:
+- values are JSON (tuples come back as lists), encoded compactly as
+  UTF-8; anything else raises TypeError on set
+- ttl_s > 0 expires the entry after that many seconds; None keeps it
+  until evicted; an expired entry is never returned
+- keys are "<CACHE_PREFIX>:<namespace>:<key>"; long keys are hashed
+- a failing shared tier (Redis down, locked DB) is a miss, never an
+  error for the request; failures are counted in cache_stats()
+"""
+
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from .log import get_logger
+
+logger = get_logger("cache")
+
+BASE_DIR = Path(__file__).resolve().parent
+
+CACHE_BACKEND = (os.getenv("CACHE_BACKEND") or "memory").lower()
+CACHE_PREFIX = os.getenv("CACHE_PREFIX") or "adhd:v1"
+CACHE_LRU_SIZE = int(os.getenv("CACHE_LRU_SIZE") or 4096)
+CACHE_L1_TTL_S = float(os.getenv("CACHE_L1_TTL_S") or 30)
+CACHE_SQLITE_PATH = Path(os.getenv("CACHE_SQLITE_PATH") or BASE_DIR / "store" / "cache.sqlite3")
+CACHE_URL = os.getenv("CACHE_URL") or "redis://127.0.0.1:6379/0"
+CACHE_TIMEOUT_S = float(os.getenv("CACHE_TIMEOUT_S") or 0.25)
+
+MAX_KEY_LEN = 200
+
+
+def encode(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+
+def decode(raw: bytes) -> Any:
+    return json.loads(raw)
+
+
+def _expires_at(ttl_s: Optional[float]) -> Optional[float]:
+    return time.time() + ttl_s if ttl_s is not None and ttl_s > 0 else None
+
+
+# -------------------------------------------------------------------
+# Backends (bytes in, bytes out)
+# -------------------------------------------------------------------
+
+class Backend:
+    name = "base"
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, raw: bytes, ttl_s: Optional[float]) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Drop every entry under CACHE_PREFIX."""
+        raise NotImplementedError
+
+    def info(self) -> Dict[str, Any]:
+        return {}
+
+
+class NullBackend(Backend):
+    name = "none"
+
+    def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    def set(self, key: str, raw: bytes, ttl_s: Optional[float]) -> None:
+        return None
+
+    def delete(self, key: str) -> None:
+        return None
+
+    def clear(self) -> None:
+        return None
+
+
+class LRUBackend(Backend):
+    """Bounded in-process LRU with per-entry expiry."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = CACHE_LRU_SIZE):
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            raw, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return raw
+
+    def set(self, key: str, raw: bytes, ttl_s: Optional[float]) -> None:
+        with self._lock:
+            self._data[key] = (raw, _expires_at(ttl_s))
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def info(self) -> Dict[str, Any]:
+        return {"entries": len(self._data), "max_entries": self.max_entries, "evictions": self.evictions}
+
+
+class SQLiteBackend(Backend):
+    """
+    One table in a WAL-mode SQLite file. Every worker process opens its
+    own connection (per thread, re-opened after a fork); readers never
+    block the writer. Expired rows are purged every PURGE_EVERY writes.
+    """
+
+    name = "sqlite"
+    PURGE_EVERY = 500
+
+    def __init__(self, path: Path = CACHE_SQLITE_PATH, timeout_s: float = CACHE_TIMEOUT_S):
+        self.path = path
+        self.timeout_s = timeout_s
+        self._local = threading.local()
+        self._writes = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=self.timeout_s, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            local.conn = self._connect()
+            local.pid = os.getpid()
+        return local.conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._conn().execute(
+            "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] is not None and row[1] <= time.time():
+            return None
+        return bytes(row[0])
+
+    def set(self, key: str, raw: bytes, ttl_s: Optional[float]) -> None:
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, sqlite3.Binary(raw), _expires_at(ttl_s)),
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+
+    def delete(self, key: str) -> None:
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM cache WHERE key LIKE ?", (CACHE_PREFIX + ":%",))
+
+    def info(self) -> Dict[str, Any]:
+        try:
+            (rows,) = self._conn().execute("SELECT COUNT(*) FROM cache").fetchone()
+        except sqlite3.Error:
+            rows = None
+        return {"path": str(self.path), "rows": rows}
+
+
+class RespError(Exception):
+    """Error reply from a Redis-protocol server."""
+
+
+class RespConnection:
+    """Blocking RESP2 connection (just enough of the protocol for a cache)."""
+
+    def __init__(self, host: str, port: int, timeout_s: float):
+        self.sock = socket.create_connection((host, port), timeout=timeout_s)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+
+    def command(self, *args: Any) -> Any:
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self.sock.sendall(b"".join(out))
+        return self._read()
+
+    def _read(self) -> Any:
+        line = self.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("connection closed by server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RespError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            n = int(body)
+            if n < 0:
+                return None
+            data = self.reader.read(n + 2)
+            return data[:-2]
+        if kind == b"*":
+            n = int(body)
+            return None if n < 0 else [self._read() for _ in range(n)]
+        raise ConnectionError(f"bad RESP reply: {line[:40]!r}")
+
+    def close(self) -> None:
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class RedisBackend(Backend):
+    """
+    Redis (or anything speaking RESP) via one connection per thread,
+    reconnected after errors and forks. TTLs map to SET ... PX.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str = CACHE_URL, timeout_s: float = CACHE_TIMEOUT_S):
+        parts = urlsplit(url)
+        if parts.scheme not in ("redis", ""):
+            raise ValueError(f"unsupported cache URL: {url}")
+        self.url = url
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 6379
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int((parts.path or "/0").lstrip("/") or 0)
+        self.timeout_s = timeout_s
+        self._local = threading.local()
+
+    def _conn(self) -> RespConnection:
+        local = self._local
+        conn = getattr(local, "conn", None)
+        if conn is not None and local.pid == os.getpid():
+            return conn
+        conn = RespConnection(self.host, self.port, self.timeout_s)
+        if self.password:
+            conn.command("AUTH", self.password)
+        if self.db:
+            conn.command("SELECT", self.db)
+        local.conn, local.pid = conn, os.getpid()
+        return conn
+
+    def _call(self, *args: Any) -> Any:
+        try:
+            return self._conn().command(*args)
+        except (OSError, ConnectionError):
+            # Drop the broken connection; the next call reconnects.
+            conn = getattr(self._local, "conn", None)
+            if conn is not None:
+                conn.close()
+            self._local.conn = None
+            raise
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._call("GET", key)
+
+    def set(self, key: str, raw: bytes, ttl_s: Optional[float]) -> None:
+        if ttl_s is not None and ttl_s > 0:
+            self._call("SET", key, raw, "PX", max(1, int(ttl_s * 1000)))
+        else:
+            self._call("SET", key, raw)
+
+    def delete(self, key: str) -> None:
+        self._call("DEL", key)
+
+    def clear(self) -> None:
+        cursor = "0"
+        while True:
+            cursor_raw, keys = self._call("SCAN", cursor, "MATCH", CACHE_PREFIX + ":*", "COUNT", 500)
+            if keys:
+                self._call("DEL", *keys)
+            cursor = cursor_raw.decode() if isinstance(cursor_raw, bytes) else str(cursor_raw)
+            if cursor == "0":
+                break
+
+    def info(self) -> Dict[str, Any]:
+        return {"url": f"redis://{self.host}:{self.port}/{self.db}"}
+
+
+class TieredBackend(Backend):
+    """Short-lived in-process L1 in front of a shared backend."""
+
+    def __init__(self, shared: Backend, l1: LRUBackend, l1_ttl_s: float = CACHE_L1_TTL_S):
+        self.shared = shared
+        self.l1 = l1
+        self.l1_ttl_s = l1_ttl_s
+        self.name = shared.name
+
+    def _l1_ttl(self, ttl_s: Optional[float]) -> float:
+        return min(ttl_s, self.l1_ttl_s) if ttl_s is not None and ttl_s > 0 else self.l1_ttl_s
+
+    def get(self, key: str) -> Optional[bytes]:
+        raw = self.l1.get(key)
+        if raw is not None:
+            return raw
+        raw = self.shared.get(key)
+        if raw is not None:
+            # The shared tier does not report the remaining TTL; the
+            # L1 window is short enough that this only matters for
+            # entries about to expire anyway.
+            self.l1.set(key, raw, self.l1_ttl_s)
+        return raw
+
+    def set(self, key: str, raw: bytes, ttl_s: Optional[float]) -> None:
+        self.l1.set(key, raw, self._l1_ttl(ttl_s))
+        self.shared.set(key, raw, ttl_s)
+
+    def delete(self, key: str) -> None:
+        self.l1.delete(key)
+        self.shared.delete(key)
+
+    def clear(self) -> None:
+        self.l1.clear()
+        self.shared.clear()
+
+    def info(self) -> Dict[str, Any]:
+        return {**self.shared.info(), "l1": self.l1.info()}
+
+
+def make_backend(kind: str = CACHE_BACKEND) -> Backend:
+    if kind in ("none", "off", "0"):
+        return NullBackend()
+    if kind == "memory":
+        return LRUBackend(CACHE_LRU_SIZE)
+    # L1 is a fraction of the shared tier's capacity: it only holds hot keys
+    l1 = LRUBackend(max(64, CACHE_LRU_SIZE // 4))
+    if kind == "sqlite":
+        return TieredBackend(SQLiteBackend(CACHE_SQLITE_PATH), l1)
+    if kind == "redis":
+        return TieredBackend(RedisBackend(CACHE_URL), l1)
+    raise ValueError(f"unknown CACHE_BACKEND: {kind}")
+
+
+# -------------------------------------------------------------------
+# Namespaced views
+# -------------------------------------------------------------------
+
+_lock = threading.Lock()
+_backend: Optional[Backend] = None
+_namespaces: Dict[str, "Namespace"] = {}
+
+
+def backend() -> Backend:
+    global _backend
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                try:
+                    _backend = make_backend(CACHE_BACKEND)
+                except Exception as exc:
+                    logger.error("cache backend %s unavailable, using memory: %r", CACHE_BACKEND, exc)
+                    _backend = LRUBackend(CACHE_LRU_SIZE)
+                logger.info("cache backend", extra={"backend": _backend.name, **_backend.info()})
+    return _backend
+
+
+def set_backend(new: Backend) -> None:
+    """Swap the backend (tools and benchmarks)."""
+    global _backend
+    with _lock:
+        _backend = new
+
+
+class Namespace:
+    def __init__(self, name: str, ttl_s: Optional[float] = None):
+        self.name = name
+        self.ttl_s = ttl_s
+        self._stats: Counter = Counter()
+
+    def key(self, key: Any) -> str:
+        raw = key if isinstance(key, str) else json.dumps(key, sort_keys=True, separators=(",", ":"), default=str)
+        if len(raw) > MAX_KEY_LEN:
+            raw = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+        return f"{CACHE_PREFIX}:{self.name}:{raw}"
+
+    def get(self, key: Any) -> Optional[Any]:
+        try:
+            raw = backend().get(self.key(key))
+        except Exception as exc:
+            self._stats["errors"] += 1
+            logger.debug("cache get failed: %r", exc, extra={"namespace": self.name})
+            return None
+        if raw is None:
+            self._stats["misses"] += 1
+            return None
+        try:
+            value = decode(raw)
+        except ValueError:
+            self._stats["errors"] += 1
+            return None
+        self._stats["hits"] += 1
+        return value
+
+    def set(self, key: Any, value: Any, ttl_s: Optional[float] = None) -> None:
+        raw = encode(value)
+        try:
+            backend().set(self.key(key), raw, ttl_s if ttl_s is not None else self.ttl_s)
+        except Exception as exc:
+            self._stats["errors"] += 1
+            logger.debug("cache set failed: %r", exc, extra={"namespace": self.name})
+            return
+        self._stats["sets"] += 1
+
+    def delete(self, key: Any) -> None:
+        try:
+            backend().delete(self.key(key))
+        except Exception as exc:
+            self._stats["errors"] += 1
+            logger.debug("cache delete failed: %r", exc, extra={"namespace": self.name})
+
+    def stats(self) -> Dict[str, int]:
+        return {k: self._stats.get(k, 0) for k in ("hits", "misses", "sets", "errors")}
+
+
+def namespace(name: str, ttl_s: Optional[float] = None) -> Namespace:
+    """The process-wide view for `name` (created on first use)."""
+    with _lock:
+        ns = _namespaces.get(name)
+        if ns is None:
+            ns = _namespaces[name] = Namespace(name, ttl_s)
+        return ns
+
+
+def cache_stats() -> Dict[str, Any]:
+    b = backend()
+    try:
+        info = b.info()
+    except Exception as exc:
+        info = {"error": repr(exc)}
+    return {
+        "backend": b.name,
+        **info,
+        "namespaces": {name: ns.stats() for name, ns in sorted(_namespaces.items())},
+    }
@@ -0,0 +1,213 @@
+# server/cassette.py
+"""
+Record/replay "cassettes" for upstream calls (Claude, Firecrawl).
+
+CASSETTE_MODE=record   every client.messages.create and Firecrawl scrape
+                       is performed for real and appended to the cassette
+CASSETTE_MODE=replay   calls are answered from the cassette only; a call
+                       that was never recorded raises CassetteMiss (the
+                       callers' usual fallbacks then apply; misses do not
+                       count against the circuit breaker). No API keys
+                       or network needed.
+CASSETTE_MODE=off      (default) pass-through
+
+A cassette is a JSON-lines file (CASSETTE_PATH, default
+server/store/cassettes/default.jsonl), one compact record per call:
+
+  {"kind": "anthropic"|"firecrawl", "key": <sha256 of the canonical
+   request>, "meta": {model/tool or url}, "elapsed_ms": ..., "response": ...}
+
+Request bodies are not stored (they can hold whole pages); the key is
+enough to match them. If the same request was recorded several times
+(e.g. a repair retry), replay serves the responses in recorded order and
+then keeps returning the last one.
+
+CASSETTE_LATENCY=1 makes replay sleep for the recorded latency, so
+profiling sees realistic overlap; by default replay is instant.
+
+    CASSETTE_MODE=record uvicorn server.app:app     # use the app normally
+    CASSETTE_MODE=replay python -m server.tools.bench_suite
+    python -m server.tools.check_cassette            # replay with misses
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .log import get_logger
+
+logger = get_logger("cassette")
+
+BASE_DIR = Path(__file__).resolve().parent
+
+CASSETTE_MODE = (os.getenv("CASSETTE_MODE") or "off").lower()
+CASSETTE_PATH = Path(os.getenv("CASSETTE_PATH") or BASE_DIR / "store" / "cassettes" / "default.jsonl")
+CASSETTE_LATENCY = (os.getenv("CASSETTE_LATENCY") or "0") == "1"
+
+
+class CassetteMiss(Exception):
+    """Replay mode and the request is not on the cassette."""
+
+
+def request_key(kind: str, request: Dict[str, Any]) -> str:
+    raw = json.dumps({"kind": kind, "request": request}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    def __init__(self, path: Path, mode: str, replay_latency: bool = False):
+        self.path = path
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self._lock = threading.Lock()
+        self._tracks: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self._cursor: Counter = Counter()
+        self._stats: Counter = Counter()
+
+    @property
+    def active(self) -> bool:
+        return self.mode in ("record", "replay")
+
+    def _load(self) -> Dict[str, List[Dict[str, Any]]]:
+        if self._tracks is None:
+            tracks: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+            if self.path.exists():
+                with self.path.open(encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            rec = json.loads(line)
+                        except ValueError:
+                            continue
+                        tracks[rec["key"]].append(rec)
+            self._tracks = tracks
+            logger.info("loaded %d calls from %s", sum(len(v) for v in tracks.values()), self.path)
+        return self._tracks
+
+    def _append(self, rec: Dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        line = json.dumps(rec, ensure_ascii=False, separators=(",", ":"), default=str)
+        with self._lock, self.path.open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def call(
+        self,
+        kind: str,
+        request: Dict[str, Any],
+        meta: Dict[str, Any],
+        perform: Callable[[], Any],
+        dump: Callable[[Any], Any],
+        load: Callable[[Any], Any],
+    ) -> Any:
+        """
+        Run one upstream call through the cassette. `perform` does the real
+        call, `dump` turns its result into JSON, `load` turns JSON back.
+        """
+        if not self.active:
+            return perform()
+        key = request_key(kind, request)
+
+        if self.mode == "replay":
+            with self._lock:
+                track = self._load().get(key)
+                if not track:
+                    self._stats[f"{kind}_misses"] += 1
+                    raise CassetteMiss(f"{kind} request {key[:12]} not on cassette {self.path.name}")
+                rec = track[min(self._cursor[key], len(track) - 1)]
+                self._cursor[key] += 1
+                self._stats[f"{kind}_hits"] += 1
+            if self.replay_latency:
+                time.sleep(rec.get("elapsed_ms", 0) / 1000.0)
+            return load(rec["response"])
+
+        t0 = time.perf_counter()
+        result = perform()
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        self._append({
+            "kind": kind,
+            "key": key,
+            "meta": meta,
+            "elapsed_ms": round(elapsed_ms, 1),
+            "response": dump(result),
+        })
+        with self._lock:
+            self._stats[f"{kind}_recorded"] += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"mode": self.mode, "path": str(self.path), **self._stats}
+
+
+cassette = Cassette(CASSETTE_PATH, CASSETTE_MODE, CASSETTE_LATENCY)
+
+
+# -------------------------------------------------------------------
+# Anthropic
+# -------------------------------------------------------------------
+
+class _CassetteMessages:
+    def __init__(self, inner: Any):
+        self._inner = inner
+
+    def create(self, **kwargs: Any) -> Any:
+        from anthropic.types import Message
+
+        def perform() -> Any:
+            if self._inner is None:
+                raise CassetteMiss("recording needs a real Anthropic client (ANTHROPIC_API_KEY)")
+            return self._inner.create(**kwargs)
+
+        meta = {"model": kwargs.get("model"), "tool": (kwargs.get("tool_choice") or {}).get("name")}
+        return cassette.call(
+            "anthropic",
+            kwargs,
+            meta,
+            perform,
+            dump=lambda msg: msg.model_dump(mode="json"),
+            load=Message.model_validate,
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._inner, name)
+
+
+class CassetteClient:
+    """Wraps an Anthropic client so messages.create goes through the cassette."""
+
+    def __init__(self, inner: Any):
+        self._inner = inner
+        self.messages = _CassetteMessages(getattr(inner, "messages", None))
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._inner, name)
+
+
+def wrap_anthropic(client: Any) -> Any:
+    """
+    The client to use: unchanged when cassettes are off; wrapped when
+    recording; in replay mode a replay-only client even without a key.
+    """
+    if cassette.mode == "replay" or (cassette.mode == "record" and client is not None):
+        logger.info("anthropic calls in %s mode (%s)", cassette.mode, cassette.path)
+        return CassetteClient(client)
+    return client
+
+
+# -------------------------------------------------------------------
+# Firecrawl
+# -------------------------------------------------------------------
+
+def scrape(request: Dict[str, Any], perform: Callable[[], Tuple[str, Dict[str, Any]]]) -> Tuple[str, Dict[str, Any]]:
+    return cassette.call(
+        "firecrawl",
+        request,
+        {"url": request.get("url")},
+        perform,
+        dump=lambda res: list(res),
+        load=lambda data: (data[0], data[1]),
+    )
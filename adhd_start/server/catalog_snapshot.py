@@ -0,0 +1,335 @@
+# server/catalog_snapshot.py
+"""
+Compiled, memory-mapped scholarship catalog.
+
+Parsing scholarships.json and validating every record into a Pydantic
+`Scholarship` costs time at startup and memory in every worker (long
+markdown descriptions included). The ingest step compiles the catalog
+once into a binary snapshot next to the JSON (scholarships.snap):
+
+  header   magic, format version, record count, row size, section
+           offsets, size/mtime/sha1 of the JSON it was built from
+  rows     one fixed-width row per scholarship: (offset, length) into
+           the string heap for every text field, amount as float64
+           (NaN = none), deadline as a date ordinal (0 = none)
+  id index row numbers sorted by id, for binary-search lookups
+  heap     UTF-8 strings back to back (tags / winner_stories as JSON)
+
+Workers mmap the file read-only: opening it reads only the header, the
+OS shares the pages between processes, and a field is decoded only when
+it is accessed. `ScholarshipRecord` exposes the Scholarship attributes
+that way; `.to_model()` builds the real Pydantic object, which the repo
+does only for the page of results it returns.
+
+Build (also done by server/tools/firecrawl_ingest.py after saving):
+    python -m server.catalog_snapshot
+    python -m server.catalog_snapshot --json other.json --out other.snap
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .scholarship_models import Scholarship
+
+MAGIC = b"ADHDCAT\x00"
+FORMAT_VERSION = 1
+
+# magic, format, count, row_size, rows_off, index_off, heap_off, heap_len,
+# source_size, source_mtime_ns, source_sha1
+_HEADER = struct.Struct("<8sIIIQQQQQq20s")
+
+STR_FIELDS = (
+    "id",
+    "title",
+    "source_site",
+    "source_url",
+    "apply_url",
+    "provider_name",
+    "currency",
+    "description_short",
+    "eligibility_summary",
+    "level_of_study",
+    "location",
+    "tags",            # JSON
+    "winner_stories",  # JSON
+)
+JSON_FIELDS = ("tags", "winner_stories")
+_ROW = struct.Struct("<" + "II" * len(STR_FIELDS) + "di")
+_FIELD_POS = {name: 8 * i for i, name in enumerate(STR_FIELDS)}
+_AMOUNT_POS = 8 * len(STR_FIELDS)
+_DEADLINE_POS = _AMOUNT_POS + 8
+_SPAN = struct.Struct("<II")
+_AMOUNT = struct.Struct("<d")
+_DEADLINE = struct.Struct("<i")
+_INDEX = struct.Struct("<I")
+NONE = 0xFFFFFFFF
+
+# Materialized models kept per process (hot pages of /scholarships)
+MODEL_CACHE_SIZE = int(os.getenv("CATALOG_MODEL_CACHE") or 256)
+
+
+class SnapshotError(Exception):
+    """The snapshot file is missing, corrupt or from another format version."""
+
+
+def _source_stamp(path: Path) -> Tuple[int, int, bytes]:
+    st = path.stat()
+    return st.st_size, st.st_mtime_ns, hashlib.sha1(path.read_bytes()).digest()
+
+
+# -------------------------------------------------------------------
+# Writing
+# -------------------------------------------------------------------
+
+def write_snapshot(items: Iterable[Scholarship], out: Path, source: Optional[Path] = None) -> int:
+    """Compile scholarships into `out` (atomically). Returns the record count."""
+    heap = bytearray()
+    rows: List[bytes] = []
+    ids: List[str] = []
+
+    def put(value: Optional[str]) -> Tuple[int, int]:
+        if value is None:
+            return 0, NONE
+        data = value.encode("utf-8")
+        off = len(heap)
+        heap.extend(data)
+        return off, len(data)
+
+    for s in items:
+        dumped = s.model_dump(mode="json")
+        spans: List[int] = []
+        for name in STR_FIELDS:
+            value = dumped.get(name)
+            if name in JSON_FIELDS:
+                value = json.dumps(value or [], ensure_ascii=False, separators=(",", ":"))
+            spans.extend(put(None if value is None else str(value)))
+        amount = float(s.amount) if s.amount is not None else math.nan
+        deadline = s.deadline_date.toordinal() if s.deadline_date else 0
+        rows.append(_ROW.pack(*spans, amount, deadline))
+        ids.append(s.id)
+
+    order = sorted(range(len(ids)), key=ids.__getitem__)
+    rows_off = _HEADER.size
+    index_off = rows_off + _ROW.size * len(rows)
+    heap_off = index_off + _INDEX.size * len(order)
+    size, mtime_ns, sha1 = _source_stamp(source) if source and source.exists() else (0, 0, b"\0" * 20)
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, len(rows), _ROW.size,
+        rows_off, index_off, heap_off, len(heap),
+        size, mtime_ns, sha1,
+    )
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(out.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(b"".join(rows))
+        f.write(b"".join(_INDEX.pack(i) for i in order))
+        f.write(heap)
+    # Replacing the file (not rewriting it) keeps any process that still
+    # has the old snapshot mapped reading consistent data.
+    os.replace(tmp, out)
+    return len(rows)
+
+
+# -------------------------------------------------------------------
+# Reading
+# -------------------------------------------------------------------
+
+class CatalogSnapshot:
+    def __init__(self, path: Path):
+        self.path = path
+        try:
+            with open(path, "rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as exc:
+            raise SnapshotError(f"cannot map {path}: {exc}") from exc
+        if len(self._mm) < _HEADER.size:
+            raise SnapshotError(f"{path} is truncated")
+        (
+            magic, fmt, self.count, row_size,
+            self._rows_off, self._index_off, self._heap_off, heap_len,
+            self.source_size, self.source_mtime_ns, self.source_sha1,
+        ) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION or row_size != _ROW.size:
+            raise SnapshotError(f"{path} is not a v{FORMAT_VERSION} catalog snapshot")
+        if self._heap_off + heap_len > len(self._mm):
+            raise SnapshotError(f"{path} is truncated")
+        self._models: "OrderedDict[int, Scholarship]" = OrderedDict()
+        self._models_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def matches(self, source: Path) -> bool:
+        """Whether the snapshot was built from this exact JSON file."""
+        try:
+            st = source.stat()
+        except OSError:
+            return False
+        if st.st_size != self.source_size:
+            return False
+        if st.st_mtime_ns == self.source_mtime_ns:
+            return True
+        # Same size, different mtime (e.g. a fresh checkout): compare content
+        return hashlib.sha1(source.read_bytes()).digest() == self.source_sha1
+
+    # ---- field access ----
+
+    def _row(self, i: int) -> int:
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return self._rows_off + i * _ROW.size
+
+    def text(self, i: int, field: str) -> Optional[str]:
+        off, length = _SPAN.unpack_from(self._mm, self._row(i) + _FIELD_POS[field])
+        if length == NONE:
+            return None
+        start = self._heap_off + off
+        return self._mm[start : start + length].decode("utf-8")
+
+    def value(self, i: int, field: str) -> Any:
+        if field == "amount":
+            (amount,) = _AMOUNT.unpack_from(self._mm, self._row(i) + _AMOUNT_POS)
+            return None if math.isnan(amount) else amount
+        if field == "deadline_date":
+            (ordinal,) = _DEADLINE.unpack_from(self._mm, self._row(i) + _DEADLINE_POS)
+            return date.fromordinal(ordinal) if ordinal else None
+        raw = self.text(i, field)
+        if field in JSON_FIELDS:
+            return json.loads(raw) if raw else []
+        return raw
+
+    def as_dict(self, i: int) -> Dict[str, Any]:
+        # One unpack for the whole row instead of one per field
+        vals = _ROW.unpack_from(self._mm, self._row(i))
+        mm, heap = self._mm, self._heap_off
+        out: Dict[str, Any] = {}
+        for k, name in enumerate(STR_FIELDS):
+            off, length = vals[2 * k], vals[2 * k + 1]
+            if length == NONE:
+                out[name] = None
+                continue
+            raw = mm[heap + off : heap + off + length].decode("utf-8")
+            if name in JSON_FIELDS:
+                out[name] = json.loads(raw) if raw != "[]" else []
+            else:
+                out[name] = raw
+        amount, ordinal = vals[-2], vals[-1]
+        out["amount"] = None if math.isnan(amount) else amount
+        out["deadline_date"] = date.fromordinal(ordinal) if ordinal else None
+        return out
+
+    def model(self, i: int) -> Scholarship:
+        with self._models_lock:
+            cached = self._models.get(i)
+            if cached is not None:
+                self._models.move_to_end(i)
+                return cached
+        model = Scholarship.model_validate(self.as_dict(i))
+        with self._models_lock:
+            self._models[i] = model
+            while len(self._models) > MODEL_CACHE_SIZE:
+                self._models.popitem(last=False)
+        return model
+
+    def find(self, scholarship_id: str) -> Optional[int]:
+        """Row number for an id (binary search over the id index)."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            (row,) = _INDEX.unpack_from(self._mm, self._index_off + mid * _INDEX.size)
+            current = self.text(row, "id") or ""
+            if current == scholarship_id:
+                return row
+            if current < scholarship_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def records(self) -> "SnapshotItems":
+        return SnapshotItems(self)
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+class ScholarshipRecord:
+    """
+    Read-only, lazily decoded view of one snapshot row. Attribute access
+    mirrors `Scholarship` (amount, deadline_date, tags, ... decoded on
+    demand); `to_model()` / `model_dump()` materialize the Pydantic model.
+    """
+
+    __slots__ = ("_snap", "_i")
+
+    def __init__(self, snap: CatalogSnapshot, i: int):
+        self._snap = snap
+        self._i = i
+
+    def __getattr__(self, name: str) -> Any:
+        if name in _FIELD_POS or name in ("amount", "deadline_date"):
+            return self._snap.value(self._i, name)
+        raise AttributeError(name)
+
+    def to_model(self) -> Scholarship:
+        return self._snap.model(self._i)
+
+    def model_dump(self, **kwargs: Any) -> Dict[str, Any]:
+        return self.to_model().model_dump(**kwargs)
+
+    def __repr__(self) -> str:
+        return f"ScholarshipRecord({self.id!r})"
+
+
+class SnapshotItems(Sequence):
+    """The whole catalog as a sequence of `ScholarshipRecord`s."""
+
+    def __init__(self, snap: CatalogSnapshot):
+        self.snap = snap
+
+    def __len__(self) -> int:
+        return self.snap.count
+
+    def __getitem__(self, i: Union[int, slice]) -> Any:
+        if isinstance(i, slice):
+            return [ScholarshipRecord(self.snap, j) for j in range(*i.indices(self.snap.count))]
+        if i < 0:
+            i += self.snap.count
+        self.snap._row(i)  # bounds check
+        return ScholarshipRecord(self.snap, i)
+
+
+def materialize(item: Any) -> Scholarship:
+    """A Pydantic Scholarship for either a record or a model."""
+    return item.to_model() if isinstance(item, ScholarshipRecord) else item
+
+
+def main() -> None:
+    from .scholarship_repo import _DATA_PATH, SNAPSHOT_PATH
+
+    ap = argparse.ArgumentParser(description="Compile scholarships.json into a mmap snapshot.")
+    ap.add_argument("--json", type=Path, default=_DATA_PATH)
+    ap.add_argument("--out", type=Path, default=None)
+    args = ap.parse_args()
+
+    out = args.out or (SNAPSHOT_PATH if args.json == _DATA_PATH else args.json.with_suffix(".snap"))
+    raw = json.loads(args.json.read_text(encoding="utf-8") or "[]")
+    n = write_snapshot((Scholarship.model_validate(item) for item in raw), out, source=args.json)
+    print(f"wrote {n} scholarships to {out} ({out.stat().st_size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
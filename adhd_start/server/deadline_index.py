@@ -0,0 +1,101 @@
+# server/deadline_index.py
+"""
+Deadline-ordered indexes: "what is due soon" without a full scan.
+
+`DeadlineIndex` keeps (deadline ordinal, key) pairs in a sorted list and
+a key -> (ordinal, value) map beside it:
+
+  upsert / remove        bisect + one list insert/delete
+  range(after, before)   O(log n + k), deadline order, bounds inclusive
+  upcoming(start, n)     O(log n + n) (plus whatever `where` skips)
+
+Entries without a parseable deadline are simply not in the index.
+
+Users of it:
+  - user_repo: one index per user over their bookmarks (value = the
+    bookmark dict), built from the profile file on first use (and again
+    on a new day, since year-less deadlines resolve to the current year)
+    and updated in place by upsert_bookmark / set_bookmark_status.
+  - scholarship_repo: one index over the catalog (value = position in
+    the repo), rebuilt when the repo version changes.
+"""
+
+import threading
+from bisect import bisect_left, insort
+from datetime import date
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from .deadlines import normalize_date
+
+
+def parse_deadline(value: Any) -> Optional[date]:
+    """A date from a date, an ISO string or a free-form bookmark deadline."""
+    if value is None or isinstance(value, date):
+        return value
+    iso = normalize_date(str(value))
+    return date.fromisoformat(iso) if iso else None
+
+
+class DeadlineIndex:
+    def __init__(self, entries: Iterable[Tuple[Hashable, Any, Any]] = ()):
+        """`entries`: (key, deadline, value) triples; deadline may be unparsed."""
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[int, Any]] = {}
+        for key, deadline, value in entries:
+            d = parse_deadline(deadline)
+            if d is not None:
+                self._entries[key] = (d.toordinal(), key if value is None else value)
+        self._order: List[Tuple[int, Any]] = sorted((o, k) for k, (o, _) in self._entries.items())
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def upsert(self, key: Hashable, deadline: Any, value: Any = None) -> None:
+        d = parse_deadline(deadline)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                i = bisect_left(self._order, (old[0], key))
+                if i < len(self._order) and self._order[i] == (old[0], key):
+                    del self._order[i]
+            if d is not None:
+                ordinal = d.toordinal()
+                self._entries[key] = (ordinal, key if value is None else value)
+                insort(self._order, (ordinal, key))
+
+    def remove(self, key: Hashable) -> None:
+        self.upsert(key, None)
+
+    def _bounds(self, after: Optional[date], before: Optional[date]) -> Tuple[int, int]:
+        lo = bisect_left(self._order, (after.toordinal(),)) if after else 0
+        hi = bisect_left(self._order, (before.toordinal() + 1,)) if before else len(self._order)
+        return lo, hi
+
+    def range(self, after: Optional[date] = None, before: Optional[date] = None) -> List[Tuple[date, Any]]:
+        """(deadline, value) for after <= deadline <= before, soonest first."""
+        with self._lock:
+            lo, hi = self._bounds(after, before)
+            return [
+                (date.fromordinal(o), self._entries[k][1]) for o, k in self._order[lo:hi]
+            ]
+
+    def upcoming(
+        self,
+        start: date,
+        limit: int,
+        until: Optional[date] = None,
+        where: Optional[Callable[[Any], bool]] = None,
+    ) -> List[Tuple[date, Any]]:
+        """The next `limit` entries due on/after `start` (and by `until`)."""
+        out: List[Tuple[date, Any]] = []
+        with self._lock:
+            lo, hi = self._bounds(start, until)
+            for i in range(lo, hi):  # walk, don't slice: usually only `limit` are read
+                o, k = self._order[i]
+                value = self._entries[k][1]
+                if where is not None and not where(value):
+                    continue
+                out.append((date.fromordinal(o), value))
+                if len(out) >= limit:
+                    break
+        return out
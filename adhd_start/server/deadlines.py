@@ -0,0 +1,287 @@
+# server/deadlines.py
+"""
+Deadline extraction + normalization engine.
+
+- `normalize_date(s)`: date-like string -> "YYYY-MM-DD". Common formats
+  are parsed with precompiled patterns; only unusual strings fall back to
+  dateutil's fuzzy parser. Results are memoized, since the same strings
+  (LLM output, bookmark deadlines) come back again and again.
+- `find_deadlines(text)`: scan page text for date candidates and score
+  each one by how close it sits to "deadline" / "due" / "closes" cues.
+- `best_deadline(text)`: top candidate + a confidence in [0, 1].
+- `days_left(...)`: whole days until a deadline, counted in the user's
+  timezone (demographics.timezone in the profile).
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, time as dtime, timezone
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # pragma: no cover
+    ZoneInfo = None  # type: ignore
+
+# Try to parse dates if available (fallback for unusual formats)
+try:
+    from dateutil import parser as dateparser
+except Exception:  # pragma: no cover
+    dateparser = None  # type: ignore
+
+DEFAULT_TZ = "America/Toronto"
+
+# ---------------------------------------------------------------------------
+# Patterns
+# ---------------------------------------------------------------------------
+
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+_MONTH_RE = (
+    r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|"
+    r"aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?"
+)
+_DASH = r"[-‑–/.]"
+
+DATE_RE = re.compile(
+    rf"\b(?P<iy>\d{{4}}){_DASH}(?P<im>\d{{1,2}}){_DASH}(?P<id>\d{{1,2}})\b"
+    rf"|\b(?P<mm>{_MONTH_RE})\.?\s+(?P<md>\d{{1,2}})(?:st|nd|rd|th)?(?:,?\s+(?P<my>\d{{4}}))?\b"
+    rf"|\b(?P<dd>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?(?P<dm>{_MONTH_RE})\.?(?:,?\s+(?P<dy>\d{{4}}))?\b"
+    r"|\b(?P<n1>\d{1,2})/(?P<n2>\d{1,2})/(?P<ny>\d{4})\b",
+    re.I,
+)
+
+# Optional time + timezone right after a date: "23:59 ET", "11:59 p.m. EST"
+TIME_RE = re.compile(
+    r"\s*(?:at\s+|@\s*|,\s*)?(?P<h>\d{1,2})(?::(?P<min>\d{2}))?\s*"
+    r"(?P<ampm>a\.?m\.?|p\.?m\.?)?(?:\s*\(?(?P<tz>[A-Z]{2,4})\)?)?",
+)
+TZ_ABBREVIATIONS = {
+    "ET": "America/Toronto", "EST": "America/Toronto", "EDT": "America/Toronto",
+    "CT": "America/Winnipeg", "CST": "America/Winnipeg", "CDT": "America/Winnipeg",
+    "MT": "America/Edmonton", "MST": "America/Edmonton", "MDT": "America/Edmonton",
+    "PT": "America/Vancouver", "PST": "America/Vancouver", "PDT": "America/Vancouver",
+    "AT": "America/Halifax", "AST": "America/Halifax", "ADT": "America/Halifax",
+    "NT": "America/St_Johns", "NST": "America/St_Johns", "NDT": "America/St_Johns",
+    "UTC": "UTC", "GMT": "UTC",
+}
+
+CUES = [
+    (re.compile(r"(?:scholarship|award|application|submission)\s+deadline", re.I), 3.0),
+    (re.compile(r"deadline", re.I), 2.0),
+    (re.compile(r"\b(?:due|closes?|closing date|submit(?:ted)?\s+by|no later than)\b", re.I), 1.5),
+]
+# Deadlines for things other than the application itself
+OTHER_DEADLINE_RE = re.compile(
+    r"referee|reference|nomination|interview|admission|notif\w+|announc\w+|results", re.I
+)
+CUE_WINDOW_BEFORE = 100
+CUE_WINDOW_AFTER = 40
+
+
+@dataclass
+class DeadlineCandidate:
+    date: date
+    start: int
+    end: int
+    score: float
+    text: str
+    at: Optional[dtime] = None
+    tz: Optional[str] = None
+
+    @property
+    def iso(self) -> str:
+        return self.date.isoformat()
+
+
+# ---------------------------------------------------------------------------
+# Normalization
+# ---------------------------------------------------------------------------
+
+def _safe_date(y: int, m: int, d: int) -> Optional[date]:
+    try:
+        return date(y, m, d)
+    except ValueError:
+        return None
+
+
+def _date_from_match(m: "re.Match[str]", default_year: Optional[int] = None) -> Optional[date]:
+    g = m.groupdict()
+    year = default_year or date.today().year
+    if g["iy"]:
+        return _safe_date(int(g["iy"]), int(g["im"]), int(g["id"]))
+    if g["mm"]:
+        y = int(g["my"]) if g["my"] else year
+        return _safe_date(y, _MONTHS[g["mm"][:3].lower()], int(g["md"]))
+    if g["dm"]:
+        y = int(g["dy"]) if g["dy"] else year
+        return _safe_date(y, _MONTHS[g["dm"][:3].lower()], int(g["dd"]))
+    if g["n1"]:
+        a, b = int(g["n1"]), int(g["n2"])
+        # North-American month/day unless that's impossible
+        month, day = (a, b) if a <= 12 else (b, a)
+        return _safe_date(int(g["ny"]), month, day)
+    return None
+
+
+def normalize_date(s: Optional[str]) -> Optional[str]:
+    """Coerce a date-like string into YYYY-MM-DD (memoized)."""
+    if not s:
+        return None
+    # Year-less strings ("March 1") take the current year, and dateutil fills
+    # any missing part from today, so today is part of the cache key.
+    return _normalize_date(s, date.today())
+
+
+@lru_cache(maxsize=4096)
+def _normalize_date(s: str, today: date) -> Optional[str]:
+    m = DATE_RE.search(s)
+    if m:
+        d = _date_from_match(m, default_year=today.year)
+        if d:
+            return d.isoformat()
+    if dateparser is None:
+        return None
+    try:
+        return dateparser.parse(s, fuzzy=True, default=datetime.combine(today, dtime())).strftime("%Y-%m-%d")
+    except Exception:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Extraction from page text
+# ---------------------------------------------------------------------------
+
+def _time_after(text: str, pos: int) -> Tuple[Optional[dtime], Optional[str]]:
+    m = TIME_RE.match(text, pos, min(len(text), pos + 24))
+    if not m or (m.group("min") is None and m.group("ampm") is None):
+        return None, None
+    hour = int(m.group("h"))
+    minute = int(m.group("min") or 0)
+    ampm = (m.group("ampm") or "").lower()
+    if ampm.startswith("p") and hour < 12:
+        hour += 12
+    elif ampm.startswith("a") and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return None, None
+    tz = TZ_ABBREVIATIONS.get((m.group("tz") or "").upper())
+    return dtime(hour, minute), tz
+
+
+def _sentence_around(text: str, start: int, end: int) -> str:
+    """The line/sentence containing text[start:end]."""
+    lo = max(text.rfind("\n", 0, start), text.rfind(". ", 0, start)) + 1
+    hi_candidates = [i for i in (text.find("\n", end), text.find(". ", end)) if i >= 0]
+    hi = min(hi_candidates) if hi_candidates else len(text)
+    return text[lo:hi]
+
+
+def _cue_score(text: str, start: int, end: int) -> float:
+    lo = max(0, start - CUE_WINDOW_BEFORE)
+    before = text[lo:start]
+    after = text[end : end + CUE_WINDOW_AFTER]
+    best = 0.0
+    for rx, weight in CUES:
+        for m in rx.finditer(before):
+            dist = start - (lo + m.end())
+            best = max(best, weight * (1.0 - dist / (CUE_WINDOW_BEFORE * 1.2)))
+        if rx.search(after):
+            best = max(best, weight * 0.5)
+    if best and OTHER_DEADLINE_RE.search(_sentence_around(text, start, end)):
+        best -= 1.5
+    return best
+
+
+def find_deadlines(text: str, today: Optional[date] = None) -> List[DeadlineCandidate]:
+    """All date candidates in `text`, best first."""
+    if not text:
+        return []
+    year = (today or date.today()).year
+    out: List[DeadlineCandidate] = []
+    for m in DATE_RE.finditer(text):
+        d = _date_from_match(m, default_year=year)
+        if d is None:
+            continue
+        at, tz = _time_after(text, m.end())
+        score = _cue_score(text, m.start(), m.end())
+        if not (m.group("iy") or m.group("my") or m.group("dy") or m.group("ny")):
+            score -= 0.5  # year had to be guessed
+        out.append(
+            DeadlineCandidate(
+                date=d, start=m.start(), end=m.end(), score=score,
+                text=m.group(0), at=at, tz=tz,
+            )
+        )
+    out.sort(key=lambda c: (-c.score, c.start))
+    return out
+
+
+def best_deadline(text: str, today: Optional[date] = None) -> Tuple[Optional[DeadlineCandidate], float]:
+    """
+    Top deadline candidate and a confidence in [0, 1]:
+      - no dates at all           -> (None, 0.6)  null is likely right
+      - dates but no deadline cue -> (None, 0.3)
+      - a different date ties     -> (best, 0.5)
+      - clear winner              -> (best, 0.95 / 0.75 for weaker cues)
+    """
+    cands = find_deadlines(text, today=today)
+    if not cands:
+        return None, 0.6
+    best = cands[0]
+    if best.score <= 0:
+        return None, 0.3
+    if any(c.score >= best.score - 0.1 and c.date != best.date for c in cands[1:]):
+        return best, 0.5
+    return best, 0.95 if best.score >= 1.9 else 0.75
+
+
+# ---------------------------------------------------------------------------
+# days_left
+# ---------------------------------------------------------------------------
+
+def _zone(name: Optional[str]):
+    if ZoneInfo is None:
+        return timezone.utc
+    try:
+        return ZoneInfo(name or DEFAULT_TZ)
+    except Exception:
+        return ZoneInfo(DEFAULT_TZ)
+
+
+def days_left(
+    deadline: Optional[str],
+    user_tz: Optional[str] = None,
+    at: Optional[dtime] = None,
+    deadline_tz: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> Optional[int]:
+    """
+    Whole days from "today" (in the user's timezone) until the deadline.
+    If the deadline has a time + zone ("23:59 ET"), it is first converted to
+    the user's zone, so a late-evening Eastern deadline can land on the next
+    day for a user in Europe. Negative when the deadline has passed.
+    """
+    iso = normalize_date(deadline) if deadline else None
+    if not iso:
+        return None
+    user_zone = _zone(user_tz)
+    now = (now or datetime.now(timezone.utc)).astimezone(user_zone)
+    d = date.fromisoformat(iso)
+    if at is not None:
+        src = _zone(deadline_tz or user_tz)
+        d = datetime.combine(d, at, tzinfo=src).astimezone(user_zone).date()
+    return (d - now.date()).days
+
+
+def local_today(user_tz: Optional[str] = None, now: Optional[datetime] = None) -> date:
+    """Today's date in the user's timezone."""
+    return (now or datetime.now(timezone.utc)).astimezone(_zone(user_tz)).date()
+
+
+def user_timezone(profile: Optional[dict]) -> str:
+    return ((profile or {}).get("demographics") or {}).get("timezone") or DEFAULT_TZ
+
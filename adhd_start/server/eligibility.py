@@ -0,0 +1,612 @@
+# server/eligibility.py
+"""
+Local eligibility engine for /eligibility.
+
+Requirement clauses are pulled out of the page text (and the catalog's
+`eligibility_summary`) with a compiled rule set, one rule per category:
+
+  citizenship  "Canadian citizens or permanent residents"
+  level        "undergraduate students", "second-year", "final year of high school"
+  location     "residents of Ontario", "enrolled at a Canadian university"
+  program      "engineering students", "pursuing a STEM field"
+  gpa          "minimum GPA of 3.0", "80% average"
+  identity     "students who identify as Indigenous" (never in the profile)
+
+Each requirement is then checked against the profile and ends up
+"met", "unmet" or "unknown". No LLM call is involved; a page takes well
+under a millisecond once the rules are compiled.
+
+Sentences that read like eligibility conditions ("must", "open to",
+"eligible") but that no rule understood are returned as `ambiguous`, so
+the caller can optionally escalate just those clauses to Claude.
+
+Profile keys (as stored by the extension's profile page): citizen, pr,
+otherStatus, province, country, school, program, degreeType,
+yearsCompleted, expectedCompletion, plus optional gpa / average.
+"""
+
+import re
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# ---------------------------------------------------------------------------
+# Data
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class Requirement:
+    category: str
+    clause: str
+    # rule-specific parameters, e.g. {"accepted": ("citizen", "pr")}
+    params: Tuple[Tuple[str, Any], ...] = ()
+
+    def param(self, key: str, default: Any = None) -> Any:
+        return dict(self.params).get(key, default)
+
+
+@dataclass
+class Check:
+    category: str
+    clause: str
+    status: str  # "met" | "unmet" | "unknown"
+    message: str
+    source: str = "rules"
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class EligibilityResult:
+    eligible: bool
+    checks: List[Check] = field(default_factory=list)
+    ambiguous: List[str] = field(default_factory=list)
+
+    @property
+    def reasons(self) -> List[str]:
+        return [c.message for c in self.checks if c.status == "met"]
+
+    @property
+    def missing_info(self) -> List[str]:
+        # unmet first: those are the ones that decide "not eligible"
+        unmet = [c.message for c in self.checks if c.status == "unmet"]
+        return unmet + [c.message for c in self.checks if c.status == "unknown"]
+
+    @property
+    def score(self) -> float:
+        """0 if any requirement is unmet, else share of requirements confirmed."""
+        if not self.eligible:
+            return 0.0
+        met = sum(1 for c in self.checks if c.status == "met")
+        unknown = sum(1 for c in self.checks if c.status == "unknown")
+        return round((met + 1) / (met + unknown + 1), 3)
+
+
+# ---------------------------------------------------------------------------
+# Patterns
+# ---------------------------------------------------------------------------
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?;])\s+|\n+")
+
+# A sentence has to look like a condition before any rule runs on it
+_CONDITION_RE = re.compile(
+    r"\b(?:must|eligib\w*|open\s+to|applicants?|candidates?|restricted\s+to|only|"
+    r"requires?|required|available\s+(?:to|for)|for\s+(?:students|applicants)|"
+    r"who\s+(?:are|identify|is)|enrolled|registered|minimum)\b",
+    re.I,
+)
+# Sentences about what happens after applying, not who can apply
+_NOT_A_CONDITION_RE = re.compile(r"\b(?:will\s+receive|winners?\s+will|recipients?\s+will)\b", re.I)
+# Exclusions ("not open to graduate students", "except those in Ontario"):
+# the rules only read positive requirements, so these go to `ambiguous`
+_NEGATION_RE = re.compile(
+    r"\b(?:not|never|no\s+longer|except(?:\s+for)?|excluding|exclud(?:es|ed)|other\s+than|"
+    r"ineligible|cannot|unless)\b|n't\b",
+    re.I,
+)
+# ...except for shutting out international students, which the citizenship
+# rule already reads as "citizens / permanent residents only"
+_INTERNATIONAL_EXCLUDED_RE = re.compile(
+    r"\binternational\s+students?\s+(?:are\s+)?(?:not\s+(?:eligible|open)|ineligible|excluded)"
+    r"|\bnot\s+(?:open|available|eligible)\s+(?:to|for)\s+international\s+students?\b",
+    re.I,
+)
+
+_CITIZEN_RE = re.compile(r"\bcitizens?(?:hip)?\b|\bdomestic\s+students?\b|\bdomestic\b", re.I)
+_PR_RE = re.compile(r"\bpermanent\s+residen(?:ts?|cy)\b|\bdomestic\b", re.I)
+_PROTECTED_RE = re.compile(r"\bprotected\s+persons?\b|\brefugees?\b|\bconvention\s+refugee", re.I)
+_INTERNATIONAL_RE = re.compile(r"\binternational\s+students?\b", re.I)
+_CANADIAN_CITIZEN_CONTEXT = re.compile(r"\bcanad\w*|\bdomestic\b", re.I)
+
+_LEVELS: Sequence[Tuple[str, "re.Pattern[str]"]] = (
+    ("high_school", re.compile(r"\b(?:high\s+school|secondary\s+school|grade\s+12|cegep)\b", re.I)),
+    ("undergrad", re.compile(r"\b(?:undergrad(?:uate)?s?|bachelor'?s?|college\s+diploma|diploma)\b", re.I)),
+    ("grad", re.compile(r"\b(?:graduate\s+(?:students?|studies|programs?|degree)|master'?s|ph\.?d|doctoral|postdoc\w*)\b", re.I)),
+)
+_LEVEL_LABELS = {
+    "high_school": "high school / CEGEP",
+    "undergrad": "undergraduate / college",
+    "grad": "graduate",
+}
+# "Must apply to at least one undergraduate program" is about admission,
+# not current level of study.
+_ADMISSION_RE = re.compile(r"\b(?:apply\s+to|admission\s+to|entering|plan\w*\s+to\s+(?:attend|enrol))\b", re.I)
+
+_ORDINALS = {"first": 1, "1st": 1, "second": 2, "2nd": 2, "third": 3, "3rd": 3, "fourth": 4, "4th": 4}
+_ORD = r"(first|1st|second|2nd|third|3rd|fourth|4th)"
+# "second-year", "second or third year", "their second year of study"
+_YEAR_RE = re.compile(rf"\b{_ORD}(?:\s*(?:,|or|and|to)\s*{_ORD})?[-\s]+year\b", re.I)
+_YEAR_MIN_RE = re.compile(r"\bor\s+(?:higher|above|later|beyond)\b|\bat\s+least\b|\bminimum\b|\bcompleted\b", re.I)
+_YEAR_BEFORE_RE = re.compile(r"\b(?:prior\s+to|before)\s+(?:their|the|your)?\s*" + _ORD, re.I)
+_FINAL_YEAR_RE = re.compile(r"\b(?:final|last|graduating)\s+year\b", re.I)
+_FULL_TIME_RE = re.compile(r"\bfull[-\s]time\b", re.I)
+
+PROVINCES = {
+    "ontario": "ON", "quebec": "QC", "québec": "QC", "british columbia": "BC",
+    "alberta": "AB", "manitoba": "MB", "saskatchewan": "SK", "nova scotia": "NS",
+    "new brunswick": "NB", "newfoundland": "NL", "newfoundland and labrador": "NL",
+    "prince edward island": "PE", "pei": "PE", "yukon": "YT",
+    "northwest territories": "NT", "nunavut": "NU",
+}
+_PROVINCE_NAMES = sorted(PROVINCES, key=len, reverse=True)
+_PROVINCE_RE = re.compile(
+    r"\b(?:residents?\s+of|resid(?:e|ing)\s+in|liv(?:e|ing)\s+in|from|attend\w*\s+\w*\s*in|study(?:ing)?\s+in|in)\s+"
+    r"(?:the\s+province\s+of\s+)?(" + "|".join(re.escape(p) for p in _PROVINCE_NAMES) + r")\b"
+    r"|\b(" + "|".join(re.escape(p) for p in _PROVINCE_NAMES) + r")\s+(?:residents?|students?|high\s+schools?)\b",
+    re.I,
+)
+_COUNTRY_RE = re.compile(
+    r"\b(?:(canadian)\s+(?:post[-\s]?secondary|universit(?:y|ies)|colleges?|institutions?|schools?)"
+    r"|(?:universit(?:y|ies)|colleges?|institutions?)\s+in\s+(canada|the\s+u\.?s\.?|united\s+states))",
+    re.I,
+)
+
+PROGRAM_FIELDS: Dict[str, str] = {
+    "engineering": r"engineer\w*",
+    "computer science": r"computer\s+science|computing|software",
+    "technology": r"technolog\w*|digital|tech\b|computer\w*|software|information\s+systems",
+    "business": r"business|commerce|management|finance|accounting|mba",
+    "nursing": r"nursing",
+    "medicine": r"medicine|medical|health\s+sciences?",
+    "law": r"\blaw\b|legal",
+    "natural sciences": r"natural\s+sciences?|biology|chemistry|physics|earth\s+sciences?",
+    "mathematics": r"math\w*|statistics",
+    "arts": r"fine\s+arts|humanities|social\s+sciences?",
+}
+# fields that count towards STEM
+STEM_FIELDS = ("engineering", "computer science", "technology", "natural sciences", "mathematics", "medicine")
+PROGRAM_FIELD_RES = {name: re.compile(rf"\b(?:{p})", re.I) for name, p in PROGRAM_FIELDS.items()}
+STEM_RE = re.compile(r"\bstem\b|\bnse\b|science,\s+technology,\s+engineering", re.I)
+_PROGRAM_CONTEXT_RE = re.compile(
+    r"\b(?:students?|programs?|degrees?|field|studies|studying|pursuing|enrolled|majors?|faculty)\b", re.I
+)
+
+_GPA_RE = re.compile(
+    r"\b(?:minimum|min\.?|at\s+least|cumulative|overall)?\s*(?:cumulative\s+)?"
+    r"(?:gpa|grade\s+point\s+average|cgpa)\s*(?:of|:)?\s*(?:at\s+least\s+)?(\d(?:\.\d{1,2})?)"
+    r"(?:\s*(?:/|out\s+of|on\s+a)\s*(4\.0|4\.3|4\.33|9|10|12)(?:[-\s]point)?(?:\s+scale)?)?",
+    re.I,
+)
+_AVG_RE = re.compile(r"\b(\d{2})\s*%\s*(?:average|avg|or\s+higher|overall)", re.I)
+_LETTER_AVG_RE = re.compile(r"\b([AB][+-]?)\s+average\b")
+_LETTER_TO_PCT = {"A+": 90, "A": 85, "A-": 80, "B+": 77, "B": 73, "B-": 70}
+
+IDENTITY_RE = re.compile(
+    r"\b(?:indigenous|first\s+nations|inuit|m[ée]tis|black|hispanic|latin[oax]|women|female|"
+    r"lgbtq\w*\+?|2slgbtq\w*\+?|persons?\s+with\s+(?:a\s+)?disabilit\w+|disabilit\w+|adhd|"
+    r"first[-\s]generation|racialized|visible\s+minorit\w+)\b",
+    re.I,
+)
+_IDENTITY_CONTEXT_RE = re.compile(
+    r"\b(?:identify|self[-\s]identif\w*|who\s+(?:are|is)|open\s+to|for|students?|applicants?)\b", re.I
+)
+
+
+# ---------------------------------------------------------------------------
+# Extraction
+# ---------------------------------------------------------------------------
+
+# "## Eligibility", "ELIGIBILITY (summary)", "WHO CAN APPLY"
+_HEADING_RE = re.compile(r"^\s*(?:#{1,6}\s+.*|[A-Z][A-Z0-9 &/\-–,:]{2,60}(?:\s*\([^)]*\))?)\s*$")
+_ELIGIBILITY_HEADING_RE = re.compile(r"eligib|who\s+can\s+apply", re.I)
+# Condition-like sentences worth escalating when no rule understood them
+_AMBIGUOUS_CUE_RE = re.compile(r"\b(?:must|eligib\w*|open\s+to|restricted\s+to|only)\b", re.I)
+
+
+def _sentences(text: str) -> List[Tuple[str, bool]]:
+    """(sentence, under an eligibility heading) pairs."""
+    out: List[Tuple[str, bool]] = []
+    in_section = False
+    for line in (text or "").splitlines():
+        if _HEADING_RE.match(line):
+            in_section = bool(_ELIGIBILITY_HEADING_RE.search(line))
+            continue
+        for s in _SENTENCE_SPLIT.split(line):
+            s = s.strip(" -•*\t")
+            if s:
+                out.append((s, in_section))
+    return out
+
+
+def _negated(sent: str) -> bool:
+    return bool(_NEGATION_RE.search(_INTERNATIONAL_EXCLUDED_RE.sub(" ", sent)))
+
+
+def _citizenship(sent: str) -> Optional[Requirement]:
+    if _INTERNATIONAL_RE.search(sent) and not re.search(r"\bnot\s+(?:open|eligible)", sent, re.I):
+        return None  # open to international students: no status requirement
+    accepted = []
+    if _CITIZEN_RE.search(sent) and _CANADIAN_CITIZEN_CONTEXT.search(sent):
+        accepted.append("citizen")
+    if _PR_RE.search(sent):
+        accepted.append("pr")
+    if _PROTECTED_RE.search(sent):
+        accepted.append("protected")
+    if not accepted:
+        return None
+    return Requirement("citizenship", sent, (("accepted", tuple(accepted)),))
+
+
+def _level(sent: str) -> List[Requirement]:
+    out: List[Requirement] = []
+    if not _ADMISSION_RE.search(sent):
+        levels = tuple(name for name, rx in _LEVELS if rx.search(sent))
+        if levels:
+            out.append(Requirement("level", sent, (("levels", levels),)))
+    m = _YEAR_RE.search(sent)
+    high_school = bool(out) and "high_school" in out[0].param("levels")
+    if m and not high_school and not _YEAR_BEFORE_RE.search(sent):
+        years = tuple(sorted({_ORDINALS[g.lower()] for g in m.groups() if g}))
+        mode = "min" if _YEAR_MIN_RE.search(sent) else "any"
+        out.append(Requirement("year", sent, (("years", years), ("mode", mode))))
+    elif _FINAL_YEAR_RE.search(sent) and not high_school:
+        out.append(Requirement("year", sent, (("year", "final"),)))
+    if _FULL_TIME_RE.search(sent):
+        out.append(Requirement("enrollment", sent, (("full_time", True),)))
+    return out
+
+
+def _location(sent: str) -> List[Requirement]:
+    out: List[Requirement] = []
+    provinces = []
+    for m in _PROVINCE_RE.finditer(sent):
+        code = PROVINCES[(m.group(1) or m.group(2)).lower()]
+        if code not in provinces:
+            provinces.append(code)
+    if provinces:
+        out.append(Requirement("province", sent, (("provinces", tuple(provinces)),)))
+    m = _COUNTRY_RE.search(sent)
+    if m:
+        raw = (m.group(1) or m.group(2) or "").lower()
+        country = "Canada" if raw.startswith("canad") else "United States"
+        out.append(Requirement("country", sent, (("country", country),)))
+    return out
+
+
+def _program(sent: str) -> Optional[Requirement]:
+    if not _PROGRAM_CONTEXT_RE.search(sent):
+        return None
+    fields = [name for name, rx in PROGRAM_FIELD_RES.items() if rx.search(sent)]
+    if STEM_RE.search(sent):
+        fields.append("stem")
+    if not fields:
+        return None
+    return Requirement("program", sent, (("fields", tuple(dict.fromkeys(fields))),))
+
+
+def _gpa(sent: str) -> Optional[Requirement]:
+    m = _GPA_RE.search(sent)
+    if m:
+        scale = float(m.group(2)) if m.group(2) else 4.0
+        return Requirement("gpa", sent, (("min_gpa", float(m.group(1))), ("scale", scale)))
+    m = _AVG_RE.search(sent)
+    if m:
+        return Requirement("gpa", sent, (("min_pct", float(m.group(1))),))
+    m = _LETTER_AVG_RE.search(sent)
+    if m and m.group(1) in _LETTER_TO_PCT:
+        return Requirement("gpa", sent, (("min_pct", float(_LETTER_TO_PCT[m.group(1)])),))
+    return None
+
+
+def _identity(sent: str) -> Optional[Requirement]:
+    if not _IDENTITY_CONTEXT_RE.search(sent):
+        return None
+    groups = list(dict.fromkeys(m.group(0).lower() for m in IDENTITY_RE.finditer(sent)))
+    if not groups:
+        return None
+    return Requirement("identity", sent, (("groups", tuple(groups)),))
+
+
+@lru_cache(maxsize=1024)
+def extract_requirements(text: str) -> Tuple[Tuple[Requirement, ...], Tuple[str, ...]]:
+    """
+    Requirement clauses found in `text`, plus the condition-like sentences
+    no rule understood (ambiguous). A sentence a rule did match but that
+    excludes rather than requires ("not open to graduate students",
+    "except those in Ontario") is ambiguous too: checking it as a
+    requirement would turn the exclusion into a match. Memoized: catalog
+    entries and re-checked pages come back with identical text.
+    """
+    reqs: List[Requirement] = []
+    ambiguous: List[str] = []
+    seen = set()
+    for sent, in_section in _sentences(text):
+        if len(sent) > 600 or _NOT_A_CONDITION_RE.search(sent):
+            continue
+        if not in_section and not _CONDITION_RE.search(sent):
+            continue
+        found: List[Requirement] = []
+        cit = _citizenship(sent)
+        if cit:
+            found.append(cit)
+        found.extend(_level(sent))
+        found.extend(_location(sent))
+        for extra in (_program(sent), _gpa(sent), _identity(sent)):
+            if extra:
+                found.append(extra)
+        if found and _negated(sent):
+            if sent not in ambiguous:
+                ambiguous.append(sent)
+            continue
+        if not found:
+            if (
+                len(sent) >= 30
+                and sent not in ambiguous
+                and (in_section or _AMBIGUOUS_CUE_RE.search(sent))
+            ):
+                ambiguous.append(sent)
+            continue
+        for req in found:
+            key = (req.category, req.params)
+            if key not in seen:
+                seen.add(key)
+                reqs.append(req)
+    return tuple(reqs), tuple(ambiguous)
+
+
+# ---------------------------------------------------------------------------
+# Matching against the profile
+# ---------------------------------------------------------------------------
+
+def _truthy(v: Any) -> bool:
+    if isinstance(v, str):
+        return v.strip().lower() in ("1", "true", "yes", "y", "on")
+    return bool(v)
+
+
+def profile_level(profile: Dict[str, Any]) -> Optional[str]:
+    deg = str(profile.get("degreeType") or profile.get("level_of_study") or "").lower()
+    if not deg:
+        return None
+    if re.search(r"high\s+school|secondary|grade\s+1[0-2]|cegep", deg):
+        return "high_school"
+    if re.search(r"master|ph\.?d|doctor|graduate(?!d)|\bm\.?(?:sc|eng|a|ba)\b|\bmba\b|postdoc", deg) and "undergrad" not in deg:
+        return "grad"
+    if re.search(r"undergrad|bachelor|\bb\.?(?:a|sc|eng|asc|com)\b|diploma|college|associate", deg):
+        return "undergrad"
+    return None
+
+
+def profile_province(profile: Dict[str, Any]) -> Optional[str]:
+    raw = str(profile.get("province") or "").strip()
+    if not raw:
+        return None
+    if len(raw) == 2:
+        return raw.upper()
+    return PROVINCES.get(raw.lower(), raw.upper())
+
+
+def _profile_gpa(profile: Dict[str, Any]) -> Tuple[Optional[float], Optional[float]]:
+    """(gpa on a 4-point scale, percentage average), either may be None."""
+    gpa: Optional[float] = None
+    pct: Optional[float] = None
+    for key in ("gpa", "GPA", "average", "avg"):
+        raw = profile.get(key)
+        if raw in (None, ""):
+            continue
+        s = str(raw).strip().rstrip("%")
+        try:
+            val = float(s)
+        except ValueError:
+            continue
+        if val > 12 or str(raw).strip().endswith("%"):
+            pct = val
+        else:
+            gpa = val
+    return gpa, pct
+
+
+def _check(req: Requirement, profile: Dict[str, Any]) -> Check:
+    cat = req.category
+
+    def out(status: str, message: str) -> Check:
+        return Check(category=cat, clause=req.clause, status=status, message=message)
+
+    if cat == "citizenship":
+        accepted = req.param("accepted")
+        label = " / ".join({"citizen": "Canadian citizen", "pr": "permanent resident", "protected": "protected person"}[a] for a in accepted)
+        has = {
+            "citizen": _truthy(profile.get("citizen")),
+            "pr": _truthy(profile.get("pr")),
+            "protected": _truthy(profile.get("otherStatus")) and "protected" in accepted,
+        }
+        if any(has[a] for a in accepted):
+            return out("met", f"Requires {label} – your profile matches.")
+        if not any(_truthy(profile.get(k)) for k in ("citizen", "pr", "otherStatus")):
+            return out("unknown", f"Requires {label}; your citizenship/status is not set in your profile.")
+        return out("unmet", f"Requires {label}, but your profile does not show this status.")
+
+    if cat == "level":
+        levels = req.param("levels")
+        label = " or ".join(_LEVEL_LABELS[l] for l in levels)
+        mine = profile_level(profile)
+        if mine is None:
+            return out("unknown", f"Open to {label} students; your degree type is not set in your profile.")
+        if mine in levels:
+            return out("met", f"Open to {label} students – matches your degree type.")
+        return out("unmet", f"Open to {label} students, but your degree type is \"{profile.get('degreeType')}\".")
+
+    if cat == "year":
+        if req.param("year") == "final":
+            return out("unknown", "Requires being in your final year – confirm this applies to you.")
+        years = req.param("years")
+        if req.param("mode") == "min":
+            label = f"year {years[0]} of study or later"
+        else:
+            label = "year " + " or ".join(str(y) for y in years) + " of study"
+        done_raw = str(profile.get("yearsCompleted") or "").strip()
+        if not done_raw.isdigit():
+            return out("unknown", f"Requires {label}; years completed is not set in your profile.")
+        current = int(done_raw) + 1
+        ok = current >= years[0] if req.param("mode") == "min" else current in years
+        if ok:
+            return out("met", f"Requires {label} – matches your profile.")
+        return out("unmet", f"Requires {label}, but your profile says year {current}.")
+
+    if cat == "enrollment":
+        return out("unknown", "Requires full-time enrollment – confirm your course load.")
+
+    if cat == "province":
+        provinces = req.param("provinces")
+        mine = profile_province(profile)
+        label = "/".join(provinces)
+        if mine is None:
+            return out("unknown", f"Limited to {label}; your province is not set in your profile.")
+        if mine in provinces:
+            return out("met", f"Limited to {label} – matches your province.")
+        return out("unmet", f"Limited to {label}, but your profile says {mine}.")
+
+    if cat == "country":
+        country = req.param("country")
+        mine = str(profile.get("country") or "").strip().lower()
+        if not mine:
+            return out("unknown", f"Requires studying in {country}; your country is not set in your profile.")
+        aliases = {"Canada": ("canada", "ca", "can"), "United States": ("united states", "usa", "us", "u.s.", "u.s.a.")}
+        if mine in aliases[country]:
+            return out("met", f"Requires studying in {country} – matches your profile.")
+        return out("unmet", f"Requires studying in {country}, but your profile says {profile.get('country')}.")
+
+    if cat == "program":
+        fields = req.param("fields")
+        program = " ".join(str(profile.get(k) or "") for k in ("program", "degreeType")).strip()
+        label = ", ".join("STEM" if f == "stem" else f for f in fields)
+        if not program:
+            return out("unknown", f"Limited to {label} programs; your program is not set in your profile.")
+        for f in fields:
+            names = STEM_FIELDS if f == "stem" else (f,)
+            if any(PROGRAM_FIELD_RES[n].search(program) for n in names):
+                return out("met", f"Limited to {label} programs – matches \"{program}\".")
+        # keyword matching on free-text program names is too loose to rule
+        # anyone out, so a mismatch is only flagged
+        return out("unknown", f"Limited to {label} programs; check that \"{program}\" qualifies.")
+
+    if cat == "gpa":
+        gpa, pct = _profile_gpa(profile)
+        min_gpa, scale, min_pct = req.param("min_gpa"), req.param("scale"), req.param("min_pct")
+        if min_gpa is not None:
+            need = f"a minimum GPA of {min_gpa:g}" + (f"/{scale:g}" if scale != 4.0 else "")
+            if gpa is None or (scale not in (4.0, 4.3, 4.33) and gpa <= 4.33):
+                return out("unknown", f"Requires {need}; add your GPA to your profile to check this.")
+            ok = gpa >= min_gpa
+        else:
+            need = f"an average of at least {min_pct:g}%"
+            if pct is None:
+                return out("unknown", f"Requires {need}; add your average to your profile to check this.")
+            ok = pct >= min_pct
+        if ok:
+            return out("met", f"Requires {need} – your profile meets it.")
+        return out("unmet", f"Requires {need}, which is above the value in your profile.")
+
+    if cat == "identity":
+        groups = ", ".join(req.param("groups"))
+        return out("unknown", f"Open to students who identify as: {groups} (not tracked in your profile).")
+
+    return out("unknown", req.clause)
+
+
+def check_profile(
+    requirements: Sequence[Requirement],
+    profile: Dict[str, Any],
+    ambiguous: Sequence[str] = (),
+) -> EligibilityResult:
+    checks = [_check(r, profile or {}) for r in requirements]
+    eligible = not any(c.status == "unmet" for c in checks)
+    return EligibilityResult(eligible=eligible, checks=checks, ambiguous=list(ambiguous))
+
+
+def check_eligibility(text: str, profile: Dict[str, Any]) -> EligibilityResult:
+    """Extract requirements from `text` and check them against `profile`."""
+    reqs, ambiguous = extract_requirements(text or "")
+    return check_profile(reqs, profile, ambiguous)
+
+
+def apply_verdicts(result: EligibilityResult, verdicts: Sequence[Dict[str, Any]]) -> EligibilityResult:
+    """
+    Fold LLM verdicts ({index, status, message}, index into
+    result.ambiguous) into the result as source="llm" checks.
+    """
+    answered = set()
+    for v in verdicts:
+        idx = v["index"]
+        if idx in answered:
+            continue
+        answered.add(idx)
+        result.checks.append(
+            Check(
+                category="other",
+                clause=result.ambiguous[idx],
+                status=v.get("status") or "unknown",
+                message=v.get("message") or result.ambiguous[idx],
+                source="llm",
+            )
+        )
+    result.ambiguous = [c for i, c in enumerate(result.ambiguous) if i not in answered]
+    result.eligible = not any(c.status == "unmet" for c in result.checks)
+    return result
+
+
+def merge_profiles(stored: Optional[Dict[str, Any]], submitted: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine the server-side profile (program, demographics) with the one the
+    extension sends; non-empty submitted values win.
+    """
+    merged: Dict[str, Any] = {}
+    for src in (stored or {}, (stored or {}).get("demographics") or {}, submitted or {}):
+        for k, v in src.items():
+            if v not in (None, "", [], {}) or k not in merged:
+                merged[k] = v
+    return merged
+
+
+# ---------------------------------------------------------------------------
+# Catalog (bulk) mode
+# ---------------------------------------------------------------------------
+
+def scholarship_text(s: Any) -> str:
+    """Text the rules run on for a catalog entry."""
+    parts = [s.eligibility_summary or "", s.description_short or ""]
+    if getattr(s, "level_of_study", None):
+        parts.append(f"Open to {s.level_of_study} students.")
+    return "\n".join(p for p in parts if p)
+
+
+def score_catalog(
+    scholarships: Sequence[Any],
+    profile: Dict[str, Any],
+    eligible_only: bool = False,
+) -> List[Tuple[Any, EligibilityResult]]:
+    """
+    Check one profile against every catalog entry, best matches first.
+    Requirement extraction is memoized per entry text, so after the first
+    call this is only the (cheap) profile matching.
+    """
+    out: List[Tuple[Any, EligibilityResult]] = []
+    for s in scholarships:
+        result = check_eligibility(scholarship_text(s), profile)
+        if eligible_only and not result.eligible:
+            continue
+        out.append((s, result))
+    out.sort(key=lambda pair: (-pair[1].score, -sum(1 for c in pair[1].checks if c.status == "met")))
+    return out
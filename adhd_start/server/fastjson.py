@@ -0,0 +1,107 @@
+# server/fastjson.py
+"""
+JSON encoding/decoding for responses and the on-disk stores.
+
+- `dumps` / `loads` use orjson when it is installed (several times faster
+  than the stdlib, and it handles date/datetime natively), else stdlib
+  json with compact separators. FAST_JSON=0 forces the stdlib.
+- `FastJSONResponse` is the app's default response class: the same
+  compact UTF-8 output as Starlette's JSONResponse, rendered with `dumps`.
+- `typed_response(model)`: for routes that already built their Pydantic
+  response model. FastAPI would otherwise dump the model to a dict,
+  validate that dict against `response_model` again and then encode it;
+  here the model is serialized once, straight to bytes, by pydantic-core
+  and returned as a ready Response, which FastAPI passes through.
+  RESPONSE_REVALIDATE=1 returns the model instead (the old path), e.g.
+  while debugging a schema change.
+
+Stores written with `dumps` are compact (no indent); `loads` reads both
+compact and older indented files.
+
+    python -m server.tools.bench_json     # time + bytes per payload/encoder
+"""
+
+import json
+import os
+from typing import Any, Iterable, Optional
+
+from pydantic import BaseModel
+from starlette.responses import JSONResponse, Response
+
+try:  # optional dependency
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+FAST_JSON = (os.getenv("FAST_JSON") or "1") != "0" and orjson is not None
+RESPONSE_REVALIDATE = (os.getenv("RESPONSE_REVALIDATE") or "0") == "1"
+
+BACKEND = "orjson" if FAST_JSON else "json"
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any, *, sort_keys: bool = False, indent: bool = False) -> bytes:
+    """Compact UTF-8 JSON (2-space indent if `indent`)."""
+    if FAST_JSON:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+    return json.dumps(
+        obj,
+        ensure_ascii=False,
+        sort_keys=sort_keys,
+        indent=2 if indent else None,
+        separators=None if indent else (",", ":"),
+        default=_default,
+    ).encode("utf-8")
+
+
+def loads(data: Any) -> Any:
+    if FAST_JSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def typed_response(model: BaseModel, status_code: int = 200) -> Any:
+    """An already-validated response model, serialized once."""
+    if RESPONSE_REVALIDATE:
+        return model
+    body = model.__pydantic_serializer__.to_json(model)
+    return Response(body, status_code=status_code, media_type="application/json")
+
+
+def typed_list_response(models: Iterable[BaseModel], status_code: int = 200) -> Any:
+    """`typed_response` for list-of-model routes (response_model=List[...])."""
+    if RESPONSE_REVALIDATE:
+        return list(models)
+    body = b"[" + b",".join(m.__pydantic_serializer__.to_json(m) for m in models) + b"]"
+    return Response(body, status_code=status_code, media_type="application/json")
+
+
+def read_file(path: Any) -> Optional[Any]:
+    """Parse a JSON file (None if it is empty)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return loads(data) if data.strip() else None
+
+
+def write_file(path: Any, obj: Any) -> None:
+    with open(path, "wb") as f:
+        f.write(dumps(obj))
@@ -1,36 +1,100 @@
 # server/firecrawl_client.py
 import os
 from pathlib import Path
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Optional
+from urllib.parse import urlsplit, urlunsplit
 
 import httpx
 from dotenv import load_dotenv
 
+from . import cassette
+from .admission import admit
+from .breaker import BREAKERS
+from .cache import namespace
+from .metrics import span
+from .singleflight import group
+
 # Load .env from project root (adhd_start/)
 ROOT_DIR = Path(__file__).resolve().parent.parent
 load_dotenv(ROOT_DIR / ".env")  # loads FIRECRAWL_API_KEY if present
 
-FIRECRAWL_API_BASE = "https://api.firecrawl.dev/v2/scrape"
+# Overridable so load tests can point at a local stand-in
+FIRECRAWL_API_BASE = os.getenv("FIRECRAWL_API_BASE") or "https://api.firecrawl.dev/v2/scrape"
 
 
 class FirecrawlError(Exception):
     """Raised when the Firecrawl API returns an error."""
 
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        # Lets the circuit breaker tell outages (5xx/429) from bad requests
+        self.status_code = status_code
+
 
 def _get_api_key() -> str:
     key = os.getenv("FIRECRAWL_API_KEY") or ""
     return key
 
 
+_scrapes = group("scrape")
+
+# Scraped pages in the shared cache (server/cache.py), so every worker
+# reuses a page any of them fetched. Capped by the caller's max_age_ms.
+SCRAPE_CACHE_TTL_S = float(os.getenv("SCRAPE_CACHE_TTL_S") or 6 * 3600)
+_scrape_cache = namespace("scrape", ttl_s=SCRAPE_CACHE_TTL_S)
+
+
+def _normalize_url(url: str) -> str:
+    """Scheme/host lower-cased, fragment dropped: same page, same key."""
+    parts = urlsplit((url or "").strip())
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.query, "")
+    )
+
+
 def scrape_page_markdown(
     url: str,
     *,
     only_main_content: bool = True,
     max_age_ms: int = 2 * 24 * 60 * 60 * 1000,
+    user_id: Optional[str] = None,
 ) -> Tuple[str, Dict[str, Any]]:
     """
     Call Firecrawl /v2/scrape and return (markdown, metadata).
+
+    Pages are served from the shared cache for up to SCRAPE_CACHE_TTL_S
+    (never longer than max_age_ms). Concurrent calls for the same page
+    share one request (single-flight).
+    Raises Overloaded when admission control refuses the call and
+    CircuitOpen while Firecrawl is failing. Goes through the cassette
+    layer (server/cassette.py) when CASSETTE_MODE is set.
     """
+    key = (_normalize_url(url), only_main_content, max_age_ms)
+    request = {"url": key[0], "only_main_content": only_main_content, "max_age_ms": max_age_ms}
+    cache_key = [key[0], only_main_content]
+    ttl_s = min(SCRAPE_CACHE_TTL_S, max_age_ms / 1000.0)
+
+    def fetch() -> Tuple[str, Dict[str, Any]]:
+        if ttl_s > 0:
+            hit = _scrape_cache.get(cache_key)
+            if hit is not None:
+                return hit[0], hit[1]
+        markdown, metadata = cassette.scrape(
+            request,
+            lambda: _scrape(
+                url, only_main_content=only_main_content, max_age_ms=max_age_ms, user_id=user_id
+            ),
+        )
+        if ttl_s > 0 and markdown:
+            _scrape_cache.set(cache_key, [markdown, metadata], ttl_s=ttl_s)
+        return markdown, metadata
+
+    return _scrapes.do(key, fetch)
+
+
+def _scrape(
+    url: str, *, only_main_content: bool, max_age_ms: int, user_id: Optional[str]
+) -> Tuple[str, Dict[str, Any]]:
     api_key = _get_api_key()
     if not api_key:
         raise FirecrawlError("FIRECRAWL_API_KEY is not set in the environment.")
@@ -47,17 +111,18 @@ def scrape_page_markdown(
         "Content-Type": "application/json",
     }
 
-    with httpx.Client(timeout=40.0) as client:
-        resp = client.post(FIRECRAWL_API_BASE, json=payload, headers=headers)
-
-    if resp.status_code != 200:
-        raise FirecrawlError(
-            f"Firecrawl error: status={resp.status_code}, body={resp.text}"
-        )
+    with admit("firecrawl", user_id), BREAKERS["firecrawl"].guard():
+        with span("firecrawl"), httpx.Client(timeout=40.0) as client:
+            resp = client.post(FIRECRAWL_API_BASE, json=payload, headers=headers)
+        if resp.status_code != 200:
+            raise FirecrawlError(
+                f"Firecrawl error: status={resp.status_code}, body={resp.text}",
+                status_code=resp.status_code,
+            )
 
     data = resp.json()
     if not data.get("success"):
-        raise FirecrawlError(f"Firecrawl returned success=false: {data}")
+        raise FirecrawlError(f"Firecrawl returned success=false: {data}", status_code=200)
 
     content = data.get("data", {})
     markdown = content.get("markdown") or ""
@@ -0,0 +1,433 @@
+# server/jobs.py
+"""
+Background job queue for long-running work (currently /workflow).
+
+Firecrawl + Claude can take 40+ seconds; instead of holding the HTTP
+connection, the extension submits a job, gets a `plan_id` back at once
+and polls (or long-polls with ?wait=) for the result.
+
+- Shared between worker processes: the job directory (server/store/jobs/)
+  is the only job state. Every job is a JSON file there; `get()` reads
+  it, so a poll can land on any worker. Changes happen under an
+  exclusive flock on jobs/.lock (plus a thread lock in-process):
+    jobs/<id>.json      the job record
+    jobs/queued/<...>   one marker per queued job; a worker claims a job
+                        by removing its marker and marking it running,
+                        both under the lock, so each job runs once
+    jobs/keys/<key>     payload fingerprint -> job id, for dedupe
+  All workers must share the directory, i.e. run on one host (uvicorn
+  --workers or server.prefork). Without fcntl (Windows) only a single
+  process is safe.
+- Persistent and self-healing: a running job carries the worker's pid
+  and a heartbeat the worker refreshes every JOB_HEARTBEAT_S. A job whose
+  worker is gone (pid dead, or heartbeat older than 6 intervals) is
+  re-queued, both at start and while running, so a restart or a crashed
+  worker does not lose it.
+- Deduplicated: a job's key is a fingerprint of its payload. Submitting
+  the same payload while an identical job is queued/running returns that
+  job; if an identical job finished less than JOB_RESULT_TTL_S ago its
+  result is returned straight away (re-opening the overlay is instant).
+- Workers are plain threads started by `start()` (called from the app's
+  startup hook, i.e. after any fork), JOB_WORKERS of them per process.
+  They are woken at once for jobs submitted in their own process and
+  poll the queue every JOB_POLL_S for jobs submitted elsewhere.
+- Finished jobs are deleted once their TTL expires.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+from .fastjson import dumps, loads
+from .log import get_logger
+from .metrics import span
+
+try:  # optional (Unix): cross-process lock on the job directory
+    import fcntl  # type: ignore
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+logger = get_logger("jobs")
+
+BASE_DIR = Path(__file__).resolve().parent
+JOBS_DIR = BASE_DIR / "store" / "jobs"
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS") or 2)
+JOB_RESULT_TTL_S = float(os.getenv("JOB_RESULT_TTL_S") or 3600)
+# How often idle workers / long-polls look at the shared directory
+JOB_POLL_S = float(os.getenv("JOB_POLL_S") or 1.0)
+JOB_HEARTBEAT_S = float(os.getenv("JOB_HEARTBEAT_S") or 10.0)
+# Max seconds a status request may long-poll
+JOB_MAX_WAIT_S = 25.0
+SWEEP_INTERVAL_S = 60.0
+
+ACTIVE = ("queued", "running")
+
+# handler(payload, job_id) -> JSON-serializable result
+Handler = Callable[[Dict[str, Any], str], Dict[str, Any]]
+
+
+def job_key(kind: str, payload: Dict[str, Any]) -> str:
+    """Fingerprint of a job payload (whitespace in text fields normalized)."""
+    norm = {
+        k: " ".join(v.split()) if isinstance(v, str) else v
+        for k, v in sorted(payload.items())
+    }
+    raw = json.dumps({"kind": kind, "payload": norm}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    def __init__(
+        self,
+        jobs_dir: Path = JOBS_DIR,
+        workers: int = JOB_WORKERS,
+        ttl_s: float = JOB_RESULT_TTL_S,
+        poll_s: float = JOB_POLL_S,
+        heartbeat_s: float = JOB_HEARTBEAT_S,
+    ):
+        self.jobs_dir = jobs_dir
+        self.workers = max(1, workers)
+        self.ttl_s = ttl_s
+        self.poll_s = poll_s
+        self.heartbeat_s = heartbeat_s
+        self._handlers: Dict[str, Handler] = {}
+        self._lock = threading.Lock()
+        self._lock_fd: Optional[int] = None
+        self._lock_pid: Optional[int] = None
+        # jobs this process is running (heartbeats)
+        self._running: Set[str] = set()
+        # wakes idle workers (local submit) and long-polls (local finish)
+        self._wake = threading.Condition()
+        self._finished = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._last_sweep = 0.0
+        self._stats = {
+            "submitted": 0, "deduplicated": 0, "cache_hits": 0,
+            "done": 0, "failed": 0, "requeued": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # shared store
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Thread lock + exclusive flock on the job directory."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            if self._lock_fd is None or self._lock_pid != os.getpid():
+                # after a fork the inherited descriptor would share the lock
+                self.jobs_dir.mkdir(parents=True, exist_ok=True)
+                self._lock_fd = os.open(self.jobs_dir / ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+                self._lock_pid = os.getpid()
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _path(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.json"
+
+    def _marker(self, job: Dict[str, Any]) -> Path:
+        # named so that sorting the directory gives submission order
+        return self.jobs_dir / "queued" / f"{int(job['created_at'] * 1e6):020d}-{job['id']}"
+
+    def _key_path(self, key: str) -> Path:
+        return self.jobs_dir / "keys" / key
+
+    def _write(self, path: Path, data: bytes) -> None:
+        tmp = path.with_name(path.name + ".tmp")
+        with span("disk_io"), tmp.open("wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _save(self, job: Dict[str, Any]) -> None:
+        try:
+            self._write(self._path(job["id"]), dumps(job))
+        except Exception as exc:  # pragma: no cover
+            logger.error("could not persist job: %r", exc, extra={"job_id": job["id"]})
+
+    def _read(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if not job_id or "/" in job_id or job_id.startswith("."):
+            return None
+        try:
+            return loads(self._path(job_id).read_bytes())
+        except FileNotFoundError:
+            return None
+        except Exception as exc:
+            logger.warning("unreadable job file: %r", exc, extra={"job_id": job_id})
+            return None
+
+    def _jobs(self) -> Iterator[Dict[str, Any]]:
+        for path in sorted(self.jobs_dir.glob("*.json")):
+            job = self._read(path.stem)
+            if job is not None:
+                yield job
+
+    def _enqueue(self, job: Dict[str, Any]) -> None:
+        """Mark a job queued (lock held)."""
+        job["status"] = "queued"
+        job["worker_pid"] = None
+        job["heartbeat_at"] = None
+        self._save(job)
+        self._marker(job).touch()
+
+    def _delete(self, job: Dict[str, Any]) -> None:
+        self._path(job["id"]).unlink(missing_ok=True)
+        self._marker(job).unlink(missing_ok=True)
+        key_path = self._key_path(job["key"])
+        try:
+            if key_path.read_text() == job["id"]:
+                key_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    # ------------------------------------------------------------------
+    # lifecycle
+    # ------------------------------------------------------------------
+
+    def register(self, kind: str, handler: Handler) -> None:
+        self._handlers[kind] = handler
+
+    def start(self) -> None:
+        """Recover orphaned jobs and start the worker threads (idempotent)."""
+        with self._lock:
+            if self._threads:
+                return
+            for sub in ("queued", "keys"):
+                (self.jobs_dir / sub).mkdir(parents=True, exist_ok=True)
+        self.sweep()
+        requeued = self.recover()
+        if requeued:
+            logger.info("re-queued unfinished jobs", extra={"requeued": requeued})
+        with self._lock:
+            for i in range(self.workers):
+                t = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+            keeper = threading.Thread(target=self._maintain_loop, name="job-keeper", daemon=True)
+            keeper.start()
+            self._threads.append(keeper)
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def submit(self, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queue a job, or return the identical in-flight / recently finished
+        one. Returns the job record (see `public()`).
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"unknown job kind: {kind}")
+        key = job_key(kind, payload)
+        now = time.time()
+        with self._locked():
+            try:
+                existing = self._read(self._key_path(key).read_text())
+            except FileNotFoundError:
+                existing = None
+            if existing is not None:
+                if existing["status"] in ACTIVE:
+                    self._stats["deduplicated"] += 1
+                    return self.public(existing)
+                if existing["status"] == "done" and (existing.get("expires_at") or 0) > now:
+                    self._stats["cache_hits"] += 1
+                    return self.public(existing)
+
+            job_id = str(uuid.uuid4())
+            job = {
+                "id": job_id,
+                "kind": kind,
+                "key": key,
+                "status": "queued",
+                "payload": payload,
+                "result": None,
+                "error": None,
+                "created_at": now,
+                "started_at": None,
+                "finished_at": None,
+                "expires_at": None,
+            }
+            self._enqueue(job)
+            self._write(self._key_path(key), job_id.encode("ascii"))
+            self._stats["submitted"] += 1
+        with self._wake:
+            self._wake.notify()
+        return self.public(job)
+
+    def get(self, job_id: str, wait_s: float = 0.0) -> Optional[Dict[str, Any]]:
+        """Job record, optionally waiting up to `wait_s` for it to finish."""
+        deadline = time.monotonic() + min(max(0.0, wait_s), JOB_MAX_WAIT_S)
+        while True:
+            job = self._read(job_id)
+            if job is None:
+                return None
+            remaining = deadline - time.monotonic()
+            if job["status"] not in ACTIVE or remaining <= 0:
+                return self.public(job)
+            # woken at once if it finishes here; re-read for other workers
+            with self._finished:
+                self._finished.wait(min(remaining, self.poll_s))
+
+    def stats(self) -> Dict[str, Any]:
+        by_status: Dict[str, int] = {}
+        for job in self._jobs():
+            by_status[job["status"]] = by_status.get(job["status"], 0) + 1
+        with self._lock:
+            running_here = len(self._running)
+        return {
+            **self._stats,
+            "queued_now": by_status.get("queued", 0),
+            "running_here": running_here,
+            "jobs": by_status,
+        }
+
+    @staticmethod
+    def public(job: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "plan_id": job["id"],
+            "kind": job["kind"],
+            "status": job["status"],
+            "result": job["result"],
+            "error": job["error"],
+            "created_at": job["created_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+        }
+
+    # ------------------------------------------------------------------
+    # workers
+    # ------------------------------------------------------------------
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        """Atomically take the oldest queued job, or None."""
+        with self._locked():
+            try:
+                markers = sorted(os.listdir(self.jobs_dir / "queued"))
+            except FileNotFoundError:
+                return None
+            for name in markers:
+                (self.jobs_dir / "queued" / name).unlink(missing_ok=True)
+                job = self._read(name.split("-", 1)[-1])
+                if job is None or job["status"] != "queued":
+                    continue
+                now = time.time()
+                job["status"] = "running"
+                job["started_at"] = now
+                job["heartbeat_at"] = now
+                job["worker_pid"] = os.getpid()
+                self._save(job)
+                self._running.add(job["id"])
+                return job
+        return None
+
+    def _work(self) -> None:
+        while True:
+            job = self._claim()
+            if job is None:
+                with self._wake:
+                    self._wake.wait(self.poll_s)
+                continue
+            job_id = job["id"]
+            try:
+                result = self._handlers[job["kind"]](job["payload"], job_id)
+                status, error = "done", None
+            except Exception as exc:
+                logger.exception("job failed", extra={"kind": job["kind"], "job_id": job_id})
+                result, status, error = None, "failed", f"{type(exc).__name__}: {exc}"
+            with self._locked():
+                self._running.discard(job_id)
+                current = self._read(job_id)
+                if (
+                    current is None
+                    or current["status"] != "running"
+                    or current.get("worker_pid") != os.getpid()
+                ):
+                    # re-queued as stale and picked up elsewhere: keep theirs
+                    logger.warning("job was taken over, dropping result", extra={"job_id": job_id})
+                else:
+                    current["status"] = status
+                    current["result"] = result
+                    current["error"] = error
+                    current["finished_at"] = time.time()
+                    current["expires_at"] = current["finished_at"] + self.ttl_s
+                    self._stats[status] += 1
+                    self._save(current)
+            with self._finished:
+                self._finished.notify_all()
+
+    def recover(self) -> int:
+        """Re-queue running jobs whose worker is gone. Returns how many."""
+        stale_before = time.time() - 6 * self.heartbeat_s
+        requeued = 0
+        with self._locked():
+            for job in self._jobs():
+                if job["status"] != "running" or job["id"] in self._running:
+                    continue
+                if not _pid_alive(job.get("worker_pid")) or (job.get("heartbeat_at") or 0) < stale_before:
+                    self._enqueue(job)
+                    self._stats["requeued"] += 1
+                    requeued += 1
+        if requeued:
+            with self._wake:
+                self._wake.notify_all()
+        return requeued
+
+    def _heartbeat(self) -> None:
+        now = time.time()
+        with self._locked():
+            for job_id in list(self._running):
+                job = self._read(job_id)
+                if job is not None and job["status"] == "running" and job.get("worker_pid") == os.getpid():
+                    job["heartbeat_at"] = now
+                    self._save(job)
+
+    def sweep(self) -> int:
+        """Drop finished jobs whose TTL has passed. Returns how many."""
+        now = time.time()
+        removed = 0
+        with self._locked():
+            self._last_sweep = now
+            for job in self._jobs():
+                if job["status"] in ACTIVE or (job.get("expires_at") or 0) > now:
+                    continue
+                self._delete(job)
+                removed += 1
+        return removed
+
+    def _maintain_loop(self) -> None:
+        while True:
+            time.sleep(self.heartbeat_s)
+            try:
+                self._heartbeat()
+                self.recover()
+                if time.time() - self._last_sweep >= SWEEP_INTERVAL_S:
+                    self.sweep()
+            except Exception as exc:  # pragma: no cover
+                logger.warning("job maintenance failed: %r", exc)
+
+
+job_queue = JobQueue()
@@ -9,24 +9,41 @@
 # Public helpers used by routes:
 #   - make_workflow_with_llm(goal, text, user_id, page_url=None)
 #   - extract_fields_rag_or_llm(page_text, user_id="demo-user")
+#   - extract_fields_batch(page_texts, user_id="demo-user")
 #   - make_plan_with_llm(goal, text=None, user_id="demo-user")
+#   - check_eligibility_clauses_with_llm(clauses, profile)
 # ---------------------------------------------------------
 
+import hashlib
 import json
+import logging
 import os
 import re
+import threading
+import time
 import uuid
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Type
 
 from dotenv import load_dotenv
 from anthropic import Anthropic
-
-# Try to parse dates if available (for deadlines)
-try:
-    from dateutil import parser as dateparser
-except Exception:  # pragma: no cover
-    dateparser = None  # type: ignore
+from pydantic import BaseModel, ValidationError
+
+from . import ai_policy as _ai_policy
+from . import cassette as _cassette
+from .admission import Overloaded, admit
+from .breaker import BREAKERS
+from .cache import namespace as _cache_namespace
+from .log import get_logger
+from .metrics import span
+from . import deadlines as _deadlines
+from . import singleflight as _singleflight
+from .schemas import EligibilityVerdicts, ParseFields, PlanOut, WorkflowDraft
+from .text_budget import fit_to_budget
+
+logger = get_logger("llm")
 
 # .../adhd_start/server
 BASE_DIR = Path(__file__).resolve().parent
@@ -40,19 +57,23 @@ load_dotenv()
 
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 MODEL = os.getenv("ANTHROPIC_MODEL") or "claude-sonnet-4-5-20250929"
+# Per-request timeout (the SDK default is 10 minutes)
+ANTHROPIC_TIMEOUT_S = float(os.getenv("ANTHROPIC_TIMEOUT_S") or 60)
 
 client: Optional[Anthropic] = None
 if ANTHROPIC_API_KEY:
-    client = Anthropic(api_key=ANTHROPIC_API_KEY)
+    client = Anthropic(api_key=ANTHROPIC_API_KEY, timeout=ANTHROPIC_TIMEOUT_S)
     prefix = (
         ANTHROPIC_API_KEY[:8] + "..."
         if len(ANTHROPIC_API_KEY or "") >= 8
         else "(short key)"
     )
-    print("[llm] Anthropic client initialized; key prefix:", prefix)
-    print("[llm] Using Anthropic model:", MODEL)
+    logger.info("Anthropic client initialized", extra={"key_prefix": prefix, "model": MODEL})
 else:
-    print("[llm] No ANTHROPIC_API_KEY found. Using heuristic fallbacks.")
+    logger.warning("No ANTHROPIC_API_KEY found. Using heuristic fallbacks.")
+
+# Record/replay (CASSETTE_MODE); replay works without a key
+client = _cassette.wrap_anthropic(client)
 
 # Backwards-compat alias name some code may expect
 claude = client
@@ -98,63 +119,216 @@ def _coerce_json_from_claude(raw: str) -> Dict[str, Any]:
     return json.loads(s or "{}")
 
 
-def _call_claude_json(
+# Bounded repair loop: if Claude's tool input fails validation we send the
+# error back and let it try again this many times before giving up.
+LLM_REPAIR_RETRIES = int(os.getenv("LLM_REPAIR_RETRIES") or 1)
+
+# Provider-side prompt caching for the static prefix (tools + system prompt,
+# plus the RAG context block for /parse). Set LLM_PROMPT_CACHE=0 to disable.
+# Note: Anthropic only caches prefixes above a minimum size (~1024 tokens on
+# Sonnet); shorter prefixes are simply billed as normal input.
+PROMPT_CACHE = (os.getenv("LLM_PROMPT_CACHE") or "1") != "0"
+
+# Per-call log records (sampled via the `sample` extra, see server/log.py):
+# token usage at INFO, a preview of Claude's answer at DEBUG.
+LLM_USAGE_LOG_SAMPLE = float(os.getenv("LLM_USAGE_LOG_SAMPLE") or 1.0)
+LLM_PREVIEW_LOG_SAMPLE = float(os.getenv("LLM_PREVIEW_LOG_SAMPLE") or 0.05)
+LLM_PREVIEW_CHARS = 300
+
+# Token budgets for page text / context (replacing fixed [:4000] / [:15000]
+# character cuts; see server/text_budget.py).
+PARSE_PAGE_TOKENS = 1000
+PARSE_CONTEXT_TOKENS = 1000
+PLAN_PAGE_TOKENS = 1000
+WORKFLOW_PAGE_TOKENS = 3750
+
+# Per-endpoint counters ("parse", "plan", "workflow") so we can see how
+# many calls are wasted on unparseable output and what they cost.
+LLM_STATS: Dict[str, Counter] = {
+    "calls": Counter(),           # messages.create round trips
+    "parse_failures": Counter(),  # responses that failed schema validation
+    "repairs": Counter(),         # repair round trips that then succeeded
+    "gave_up": Counter(),         # endpoint fell back after all retries
+    "input_tokens": Counter(),    # uncached input tokens
+    "output_tokens": Counter(),
+    "cache_read_tokens": Counter(),
+    "cache_write_tokens": Counter(),
+    "latency_ms": Counter(),      # summed wall time of Claude calls
+}
+
+
+def llm_stats() -> Dict[str, Any]:
+    out: Dict[str, Any] = {name: dict(c) for name, c in LLM_STATS.items()}
+    out["parse_tiers"] = parse_tier_stats()
+    out["coalesced"] = _singleflight.singleflight_stats()
+    if _cassette.cassette.active:
+        out["cassette"] = _cassette.cassette.stats()
+    return out
+
+
+def _claude_up() -> bool:
+    """Claude is configured and its circuit breaker is not open."""
+    return client is not None and not BREAKERS["anthropic"].is_open()
+
+
+def _tool_for(model_cls: Type[BaseModel], name: str, description: str) -> Dict[str, Any]:
+    """Anthropic tool definition whose input schema is a Pydantic model."""
+    return {
+        "name": name,
+        "description": description,
+        "input_schema": model_cls.model_json_schema(),
+    }
+
+
+def _text_block(text: str, cache: bool = False) -> Dict[str, Any]:
+    block: Dict[str, Any] = {"type": "text", "text": text}
+    if cache and PROMPT_CACHE:
+        block["cache_control"] = {"type": "ephemeral"}
+    return block
+
+
+def _record_usage(endpoint: str, resp: Any, elapsed_ms: float) -> None:
+    """Accumulate + log token usage for one Claude round trip."""
+    usage = getattr(resp, "usage", None)
+    fields = {
+        "input_tokens": getattr(usage, "input_tokens", 0) or 0,
+        "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+        "cache_read_tokens": getattr(usage, "cache_read_input_tokens", 0) or 0,
+        "cache_write_tokens": getattr(usage, "cache_creation_input_tokens", 0) or 0,
+    }
+    for key, val in fields.items():
+        LLM_STATS[key][endpoint] += int(val)
+    LLM_STATS["latency_ms"][endpoint] += int(elapsed_ms)
+    logger.info(
+        "claude usage",
+        extra={"endpoint": endpoint, "ms": round(elapsed_ms), **fields, "sample": LLM_USAGE_LOG_SAMPLE},
+    )
+
+
+def _call_claude_structured(
+    endpoint: str,
     system_prompt: str,
     user_text: str,
+    model_cls: Type[BaseModel],
+    tool_name: str,
+    tool_description: str,
     max_tokens: int = 1024,
-    temperature: float = 0.3,
-) -> Dict[str, Any]:
+    temperature: Optional[float] = None,
+    cached_context: Optional[str] = None,
+    user_id: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
     """
-    Generic helper to call Claude and parse a JSON-ish response.
-    Used mainly by make_workflow_with_llm.
+    Call Claude with a forced tool call so the answer arrives as structured
+    tool input matching `model_cls`, then validate it.
+
+    The tool definition + system prompt form the static, cached prefix.
+    `cached_context` (e.g. RAG context that is identical across pages) is
+    sent as a second cached block ahead of the per-request `user_text`.
+
+    On a validation failure the error is returned to Claude as an
+    is_error tool_result and it gets LLM_REPAIR_RETRIES more attempts.
+    Returns the validated dict, or None if every attempt failed.
+    API errors are raised to the caller (which owns the fallback), as is
+    Overloaded when admission control refuses the call (-> 429) and
+    CircuitOpen while Anthropic is failing (-> fast fallback).
     """
     if client is None:
-        return {}
+        return None
 
-    try:
-        message = client.messages.create(
-            model=MODEL,
-            max_tokens=max_tokens,
-            temperature=temperature,
-            system=system_prompt,
-            messages=[{"role": "user", "content": user_text}],
-        )
-        content = message.content[0].text if message.content else ""
-        # Try strict JSON extraction first
+    tool = _tool_for(model_cls, tool_name, tool_description)
+    content: List[Dict[str, Any]] = []
+    if cached_context:
+        content.append(_text_block(cached_context, cache=True))
+    content.append(_text_block(user_text))
+    messages: List[Dict[str, Any]] = [{"role": "user", "content": content}]
+    extra: Dict[str, Any] = {}
+    if temperature is not None:
+        extra["temperature"] = temperature
+
+    for attempt in range(1 + max(0, LLM_REPAIR_RETRIES)):
+        with admit("anthropic", user_id), BREAKERS["anthropic"].guard(), span("claude"):
+            t0 = time.perf_counter()
+            resp = client.messages.create(
+                model=MODEL,
+                max_tokens=max_tokens,
+                system=[_text_block(system_prompt, cache=True)],
+                tools=[tool],
+                tool_choice={"type": "tool", "name": tool_name},
+                messages=messages,
+                **extra,
+            )
+        LLM_STATS["calls"][endpoint] += 1
+        _record_usage(endpoint, resp, (time.perf_counter() - t0) * 1000)
+
+        blocks = list(resp.content or [])
+        tool_block = next((b for b in blocks if getattr(b, "type", "") == "tool_use"), None)
         try:
-            return _coerce_json_from_claude(content)
-        except Exception:
-            # Last-resort: simple { ... } slice
-            start = content.find("{")
-            end = content.rfind("}") + 1
-            if start >= 0 and end > 0:
-                return json.loads(content[start:end])
-            return {}
-    except Exception as e:
-        print("[llm] Claude API Error in _call_claude_json:", repr(e))
-        return {}
+            with span("json_coerce"):
+                if tool_block is not None:
+                    payload = tool_block.input
+                else:
+                    # Should not happen with tool_choice, but tolerate plain text
+                    text = "".join(getattr(b, "text", "") for b in blocks)
+                    payload = _coerce_json_from_claude(text)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        "claude response",
+                        extra={
+                            "endpoint": endpoint,
+                            "attempt": attempt + 1,
+                            "preview": json.dumps(payload, ensure_ascii=False, default=str)[:LLM_PREVIEW_CHARS],
+                            "sample": LLM_PREVIEW_LOG_SAMPLE,
+                        },
+                    )
+                # exclude_unset: a field Claude left out stays missing instead of
+                # taking the schema default, so the callers' fallbacks (e.g.
+                # detect_ai_policy for ai_policy) still get to run
+                data = model_cls.model_validate(payload).model_dump(exclude_unset=True)
+            if attempt:
+                LLM_STATS["repairs"][endpoint] += 1
+            return data
+        except (ValidationError, ValueError) as e:
+            LLM_STATS["parse_failures"][endpoint] += 1
+            logger.warning(
+                "invalid structured output: %s", repr(e)[:300],
+                extra={"endpoint": endpoint, "attempt": attempt + 1},
+            )
+            if tool_block is None:
+                messages = messages + [
+                    {"role": "assistant", "content": [b.model_dump() for b in blocks]},
+                    {"role": "user", "content": f"Please answer by calling the {tool_name} tool."},
+                ]
+            else:
+                messages = messages + [
+                    {"role": "assistant", "content": [b.model_dump() for b in blocks]},
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "type": "tool_result",
+                                "tool_use_id": tool_block.id,
+                                "is_error": True,
+                                "content": (
+                                    f"Input did not match the schema: {e}. "
+                                    f"Call {tool_name} again with corrected fields."
+                                ),
+                            }
+                        ],
+                    },
+                ]
+
+    LLM_STATS["gave_up"][endpoint] += 1
+    return None
 
 
 def normalize_date_like(s: Optional[str]) -> Optional[str]:
     """Try to coerce arbitrary date-like strings into YYYY-MM-DD."""
-    if not s:
-        return None
-    if dateparser is None:
-        m = re.search(r"\d{4}-\d{2}-\d{2}", s)
-        return m.group(0) if m else s
-    try:
-        dt = dateparser.parse(s, fuzzy=True)
-        return dt.strftime("%Y-%m-%d")
-    except Exception:
-        return None
+    return _deadlines.normalize_date(s)
 
 
-FORBID_PATTERNS = [
-    r"no\s+ai[-\s]?generated\s+content",
-    r"must\s+be\s+your\s+own\s+work",
-    r"generative\s+ai\s+not\s+permitted",
-    r"plagiarism|original work only",
-]
+# Kept for callers that import it; the active (possibly file-configured)
+# set lives in server/ai_policy.py.
+FORBID_PATTERNS = list(_ai_policy.get_matcher().patterns)
 
 
 def detect_ai_policy(text: str, extra_context: str = "") -> str:
@@ -164,8 +338,7 @@ def detect_ai_policy(text: str, extra_context: str = "") -> str:
       - "coach_only" if AI-writing seems forbidden
       - "ok" otherwise
     """
-    hay = (text + "\n" + extra_context).lower()
-    return "coach_only" if any(re.search(p, hay) for p in FORBID_PATTERNS) else "ok"
+    return _ai_policy.detect(text, extra_context)
 
 
 # -------------------------------------------------------------------
@@ -205,7 +378,7 @@ def _load_user_profile(user_id: str = "demo-user") -> Dict[str, Any]:
                 u[k] = v
         return u
     except Exception as e:
-        print("[llm] Could not load user profile:", repr(e))
+        logger.warning("could not load user profile: %r", e, extra={"user_id": user_id})
         return _default_user_profile(user_id)
 
 
@@ -228,12 +401,147 @@ FALLBACK_PLAN: Dict[str, Any] = {
 
 
 # -------------------------------------------------------------------
-# /parse: RAG + structured extraction
+# /parse: local fast path, then RAG + structured extraction
 # -------------------------------------------------------------------
 
+# tiered: local rules first, escalate to RAG + Claude when unsure
+# llm:    always RAG + Claude (previous behaviour)
+# local:  never call Claude for /parse
+PARSE_MODE = (os.getenv("PARSE_MODE") or "tiered").lower()
+PARSE_LOCAL_THRESHOLD = float(os.getenv("PARSE_LOCAL_THRESHOLD") or 0.75)
+# values are a nice-to-have; a weak values guess never forces escalation
+PARSE_GATED_FIELDS = ("deadline", "refs_required", "ai_policy")
+PARSE_FIELD_KEYS = ("deadline", "refs_required", "values", "ai_policy")
+
+# Claude's /parse answers are kept in the shared cache (server/cache.py),
+# per user and page, so re-opening the popup on a page any worker has
+# already parsed skips retrieval + Claude. 0 disables.
+PARSE_CACHE_TTL_S = float(os.getenv("PARSE_CACHE_TTL_S") or 900)
+_parse_cache = _cache_namespace("parse", ttl_s=PARSE_CACHE_TTL_S)
+
+_TIER_COUNTS: Counter = Counter()
+_TIER_LATENCIES: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=2000))
+
+
+def _pct(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def parse_tier_stats() -> Dict[str, Any]:
+    """Share of /parse requests served by each tier + latency percentiles."""
+    total = sum(_TIER_COUNTS.values())
+    out: Dict[str, Any] = {"total": total}
+    for tier, count in _TIER_COUNTS.items():
+        lat = list(_TIER_LATENCIES[tier])
+        out[tier] = {
+            "count": count,
+            "fraction": round(count / total, 3) if total else 0.0,
+            "p50_ms": round(_pct(lat, 0.50), 1),
+            "p95_ms": round(_pct(lat, 0.95), 1),
+            "p99_ms": round(_pct(lat, 0.99), 1),
+        }
+    return out
+
+
+def _record_tier(tier: str, started: float) -> None:
+    _TIER_COUNTS[tier] += 1
+    _TIER_LATENCIES[tier].append((time.perf_counter() - started) * 1000)
+
+
+RagContext = Tuple[str, List[Dict[str, Any]]]
+
+
 def extract_fields_rag_or_llm(
     page_text: str,
     user_id: str = "demo-user",
+    rag_context: Optional[Callable[[], RagContext]] = None,
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Extract deadline / refs_required / values / ai_policy for /parse.
+
+    Tier 1 is the deterministic local extractor (server/local_extract.py).
+    If every gated field is at least PARSE_LOCAL_THRESHOLD confident, its
+    answer is returned as-is; otherwise we escalate to RAG + Claude and
+    use the local answer only to fill fields Claude left empty.
+
+    `rag_context` lets a batch share one retrieval pass: a callable
+    returning (context, sources), called only if Claude is needed.
+
+    Identical concurrent calls (same user, same page ignoring whitespace)
+    are coalesced: only the first runs, the rest wait for its answer.
+
+    Returns:
+      fields: dict (+ "tier", "ai_policy_matches", and
+              "field_confidence"/"confidence" when local)
+      sources: list[ { source, snippet } ]
+    """
+    return _parse_flights.do(
+        (user_id, _page_key(page_text)),
+        lambda: _extract_fields(page_text, user_id, rag_context),
+    )
+
+
+_parse_flights = _singleflight.group("parse")
+
+
+def _extract_fields(
+    page_text: str,
+    user_id: str,
+    rag_context: Optional[Callable[[], RagContext]],
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    started = time.perf_counter()
+    local_fields: Optional[Dict[str, Any]] = None
+
+    claude_up = _claude_up()
+    if PARSE_MODE != "llm" or not claude_up:
+        from .local_extract import extract_fields_local
+
+        local_fields, local_conf = extract_fields_local(page_text)
+        gate = min(local_conf[k] for k in PARSE_GATED_FIELDS)
+        if not claude_up or PARSE_MODE == "local" or gate >= PARSE_LOCAL_THRESHOLD:
+            fields = dict(local_fields)
+            fields["tier"] = "local"
+            fields["field_confidence"] = local_conf
+            fields["confidence"] = min(gate, 0.98)
+            _record_tier("local", started)
+            return fields, []
+
+    fields, sources = _extract_fields_llm(page_text, user_id, rag_context)
+    if local_fields:
+        # only fill what Claude left unset: its 0 / [] are answers too
+        for key, val in local_fields.items():
+            if val is not None and fields.get(key) is None:
+                fields[key] = val
+    else:
+        fields["ai_policy_matches"] = _ai_policy.find_matches(page_text)
+    fields.setdefault("values", [])
+    fields.setdefault("refs_required", None)
+    fields["tier"] = "llm"
+    _record_tier("llm", started)
+    return fields, sources
+
+
+def _retrieve_parse_context(page_text: str, user_id: str) -> RagContext:
+    """RAG context + sources for /parse ("" and [] if retrieval fails)."""
+    try:
+        from server.rag.retriever import get_context_for_parse  # type: ignore
+
+        with span("retrieval"):
+            context, sources = get_context_for_parse(page_text=page_text, user_id=user_id)
+        logger.debug("RAG context for /parse", extra={"context_chars": len(context)})
+        return context, sources
+    except Exception as e:
+        logger.warning("RAG retrieval failed, falling back to page-only: %r", e)
+        return "", []
+
+
+def _extract_fields_llm(
+    page_text: str,
+    user_id: str = "demo-user",
+    rag_context: Optional[Callable[[], RagContext]] = None,
 ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
     """
     Use RAG context + Claude to extract:
@@ -246,82 +554,157 @@ def extract_fields_rag_or_llm(
       fields: dict
       sources: list[ { source, snippet } ]
     """
-    if client is None:
-        # Pure heuristic fallback (no API key)
-        fields = {
-            "deadline": None,
-            "refs_required": None,
-            "values": [],
-            "ai_policy": detect_ai_policy(page_text),
-        }
-        return fields, []
+    cache_key = [MODEL, user_id, _page_key(page_text)]
+    if PARSE_CACHE_TTL_S > 0:
+        hit = _parse_cache.get(cache_key)
+        if hit is not None:
+            return hit[0], hit[1]
 
     # 1) Build RAG context from Chroma (sample pages + user memory)
-    context = ""
-    sources: List[Dict[str, Any]] = []
-    try:
-        from server.rag.retriever import get_context_for_parse  # type: ignore
-
-        context, sources = get_context_for_parse(page_text=page_text, user_id=user_id)
-        print("[llm] RAG context length for /parse:", len(context))
-    except Exception as e:
-        print("[llm] RAG retrieval failed, falling back to page-only:", repr(e))
-        context, sources = "", []
-
-    SYSTEM = "You are a precise JSON-only parser for scholarship or job application pages."
-    SCHEMA = (
-        "Return ONLY valid JSON:\n"
-        "{\n"
-        '  "deadline": string|null,           // YYYY-MM-DD if possible; else null\n'
-        '  "refs_required": number|null,      // number of reference letters required (0,1,2...), or null\n'
-        '  "values": string[],                // e.g., ["creativity", "leadership"]\n'
-        '  "ai_policy": "ok"|"coach_only"     // "coach_only" if the page forbids AI-generated content\n'
-        "}\n"
-    )
+    if rag_context is not None:
+        context, sources = rag_context()
+        sources = list(sources)
+    else:
+        context, sources = _retrieve_parse_context(page_text, user_id)
 
-    prompt = (
+    SYSTEM = (
+        "You are a precise parser for scholarship or job application pages.\n\n"
         "You extract structured fields from THIS PAGE.\n\n"
         "Use BOTH:\n"
         "- PAGE TEXT: the raw text from the current page\n"
         "- CONTEXT: snippets from similar scholarship/job pages (may include example deadlines & rules)\n\n"
-        "If you are unsure about any field, use null or an empty list.\n\n"
-        "PAGE TEXT (truncated):\n"
-        f"{page_text[:4000]}\n\n"
+        "If you are unsure about any field, use null or an empty list.\n"
+        "Record the fields with the record_parse_fields tool."
+    )
+
+    # RAG context does not depend on the page, so it goes in its own cached
+    # block ahead of the page text.
+    context_block = (
         "CONTEXT (from related examples, may contain explicit deadlines & requirements):\n"
-        f"{context[:4000]}\n\n"
-        f"{SCHEMA}"
+        f"{fit_to_budget(context, PARSE_CONTEXT_TOKENS)}"
+        if context
+        else None
+    )
+    prompt = (
+        "PAGE TEXT (most relevant sections):\n"
+        f"{fit_to_budget(page_text, PARSE_PAGE_TOKENS)}"
     )
 
     try:
-        print("[llm] Calling Claude extractor for /parse")
-        resp = client.messages.create(
-            model=MODEL,
-            system=SYSTEM,
+        logger.debug("calling Claude extractor for /parse")
+        data = _call_claude_structured(
+            "parse",
+            SYSTEM,
+            prompt,
+            ParseFields,
+            tool_name="record_parse_fields",
+            tool_description="Record the fields extracted from the application page.",
             max_tokens=400,
-            messages=[{"role": "user", "content": prompt}],
+            cached_context=context_block,
+            user_id=user_id,
         )
-        raw = resp.content[0].text if resp.content else "{}"
-        print("[llm] Claude extractor raw JSON (first 200 chars):", raw[:200])
-        data = _coerce_json_from_claude(raw)
+    except Overloaded:
+        raise
     except Exception as e:
-        print("[llm] Claude extractor error (parse):", repr(e))
-        data = {
-            "deadline": None,
-            "refs_required": None,
-            "values": [],
-            "ai_policy": "ok",
-        }
+        logger.warning("Claude extractor error (parse): %r", e)
+        data = None
+
+    # Fields Claude did not give stay missing (or None) so that
+    # _extract_fields can fill them from the local extractor.
+    answered = data is not None
+    if data is None:
+        data = {"ai_policy": detect_ai_policy(page_text, context)}
 
     # Normalize + sanity check
     data["deadline"] = normalize_date_like(data.get("deadline"))
     if data.get("ai_policy") not in ("ok", "coach_only"):
         data["ai_policy"] = detect_ai_policy(page_text, context)
-    data.setdefault("values", [])
-    data.setdefault("refs_required", None)
 
+    # Only Claude's answers are cached: a fallback from a transient outage
+    # must not stick for the whole TTL.
+    if answered and PARSE_CACHE_TTL_S > 0:
+        _parse_cache.set(cache_key, [data, sources])
     return data, sources
 
 
+# -------------------------------------------------------------------
+# /parse/batch: many pages, one round trip
+# -------------------------------------------------------------------
+
+PARSE_BATCH_CONCURRENCY = int(os.getenv("PARSE_BATCH_CONCURRENCY") or 4)
+PARSE_BATCH_MAX_ITEMS = int(os.getenv("PARSE_BATCH_MAX_ITEMS") or 50)
+
+
+def _page_key(page_text: str) -> str:
+    """Whitespace-insensitive fingerprint, so re-captured pages dedupe."""
+    norm = " ".join((page_text or "").split())
+    return hashlib.sha1(norm.encode("utf-8")).hexdigest()
+
+
+def extract_fields_batch(
+    page_texts: List[str],
+    user_id: str = "demo-user",
+    max_concurrency: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Run the /parse pipeline over many pages.
+
+    - identical pages (ignoring whitespace) are parsed once
+    - the RAG context is retrieved at most once for the whole batch (its
+      query does not depend on the page), and only if a page needs Claude
+    - pages that need Claude run with bounded concurrency
+
+    Returns (results, stats). results[i] is, for page_texts[i], either
+      { ok: True, fields, sources, duplicate_of }  or
+      { ok: False, error, duplicate_of }
+    where duplicate_of is the index of the first identical page (or None).
+    """
+    first_index: Dict[str, int] = {}
+    order: List[str] = []
+    for i, text in enumerate(page_texts):
+        key = _page_key(text)
+        if key not in first_index:
+            first_index[key] = i
+            order.append(key)
+
+    rag_lock = threading.Lock()
+    rag_cache: List[RagContext] = []
+
+    def shared_rag() -> RagContext:
+        with rag_lock:
+            if not rag_cache:
+                rag_cache.append(_retrieve_parse_context("", user_id))
+            return rag_cache[0]
+
+    def run(key: str) -> Dict[str, Any]:
+        try:
+            fields, sources = extract_fields_rag_or_llm(
+                page_texts[first_index[key]], user_id, rag_context=shared_rag
+            )
+            return {"ok": True, "fields": fields, "sources": sources}
+        except Exception as e:  # one bad page must not sink the batch
+            logger.warning("/parse/batch item failed: %r", e)
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    workers = max(1, min(max_concurrency or PARSE_BATCH_CONCURRENCY, len(order) or 1))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="parse-batch") as pool:
+        by_key = dict(zip(order, pool.map(run, order)))
+
+    results: List[Dict[str, Any]] = []
+    for i, text in enumerate(page_texts):
+        key = _page_key(text)
+        first = first_index[key]
+        results.append({**by_key[key], "duplicate_of": first if first != i else None})
+
+    stats = {
+        "items": len(page_texts),
+        "unique": len(order),
+        "rag_retrievals": len(rag_cache),
+        "failed": sum(1 for r in by_key.values() if not r["ok"]),
+    }
+    return results, stats
+
+
 # -------------------------------------------------------------------
 # /plan (popup): micro-plan generation
 # -------------------------------------------------------------------
@@ -336,9 +719,10 @@ def make_plan_with_llm(
 
     - Uses parsed fields from extract_fields_rag_or_llm
     - Uses user profile (tone, block length, history) for personalization
-    - Falls back to a static plan on failure
+    - Falls back to a static plan on failure (at once while Claude's
+      circuit breaker is open)
     """
-    if client is None:
+    if not _claude_up():
         return dict(FALLBACK_PLAN)
 
     page_text = text or ""
@@ -350,54 +734,44 @@ def make_plan_with_llm(
     SYSTEM = (
         "You are an ADHD-friendly START-FIRST coach. "
         "You create tiny, low-friction first steps and simple micro-plans "
-        "that help someone get unstuck with scholarship or job applications."
-    )
-
-    schema_block = (
-        "Return ONLY valid JSON matching this schema:\n"
-        "{\n"
-        '  "micro_start": string,\n'
-        '  "step_type": "focus_input"|"click_selector"|"make_outline"|"open_url",\n'
-        '  "selector": string|null,\n'
-        '  "placeholder": string|null,\n'
-        '  "block_minutes": number,\n'
-        '  "check_ins": [string, ...],\n'
-        '  "reentry_script": string,\n'
-        '  "purpose": string,\n'
-        '  "deadline": string|null,\n'
-        '  "ai_policy": "ok"|"coach_only"\n'
-        "}\n"
+        "that help someone get unstuck with scholarship or job applications.\n\n"
+        "Instructions:\n"
+        "- Design a micro-plan that is extremely easy to start.\n"
+        "- Prefer a 15–25 minute time block unless the user profile says otherwise.\n"
+        "- Make the micro_start concrete and action-oriented.\n"
+        "- step_type is one of focus_input, click_selector, make_outline, open_url.\n"
+        '- If ai_policy is "coach_only", assume the user writes content; you only guide.\n\n'
+        "Return the plan with the record_micro_plan tool."
     )
 
     user_msg = (
         "Goal:\n"
         f"{goal}\n\n"
-        "Page text (truncated):\n"
-        f"{page_text[:4000]}\n\n"
+        "Page text (most relevant sections):\n"
+        f"{fit_to_budget(page_text, PLAN_PAGE_TOKENS)}\n\n"
         "Parsed fields from /parse:\n"
-        f"{json.dumps(parsed_fields, ensure_ascii=False)}\n\n"
+        f"{json.dumps({k: parsed_fields.get(k) for k in PARSE_FIELD_KEYS}, ensure_ascii=False)}\n\n"
         "User profile:\n"
-        f"{json.dumps(user_profile, ensure_ascii=False)}\n\n"
-        "Instructions:\n"
-        "- Design a micro-plan that is extremely easy to start.\n"
-        "- Prefer a 15–25 minute time block unless the user profile says otherwise.\n"
-        "- Make the micro_start concrete and action-oriented.\n"
-        '- If ai_policy is "coach_only", assume the user writes content; you only guide.\n\n'
-        f"{schema_block}"
+        f"{json.dumps(user_profile, ensure_ascii=False)}"
     )
 
     try:
-        resp = client.messages.create(
-            model=MODEL,
-            system=SYSTEM,
+        data = _call_claude_structured(
+            "plan",
+            SYSTEM,
+            user_msg,
+            PlanOut,
+            tool_name="record_micro_plan",
+            tool_description="Record the ADHD-friendly micro-plan for this page.",
             max_tokens=600,
-            messages=[{"role": "user", "content": user_msg}],
+            user_id=user_id,
         )
-        raw = resp.content[0].text if resp.content else "{}"
-        print("[llm] Claude plan raw JSON (first 200 chars):", raw[:200])
-        data = _coerce_json_from_claude(raw)
+    except Overloaded:
+        raise
     except Exception as e:
-        print("[llm] Claude plan error:", repr(e))
+        logger.warning("Claude plan error: %r", e)
+        return dict(FALLBACK_PLAN)
+    if data is None:
         return dict(FALLBACK_PLAN)
 
     # Merge with fallback & parsed fields
@@ -428,14 +802,49 @@ def make_plan_with_llm(
 # Overlay "AI Micro Start" workflow (uses Firecrawl)
 # -------------------------------------------------------------------
 
-def _fallback_workflow(goal: str, text: str, url: Optional[str]) -> Dict[str, Any]:
+def _resolve_deadline(
+    claimed: Optional[str],
+    page_text: str,
+    user_id: str,
+) -> Tuple[Optional[str], Optional[int]]:
+    """
+    Pick the workflow deadline and count days_left in the user's timezone.
+
+    Prefers the deadline Claude reported (if any), falling back to the
+    local deadline engine when it is confident. When the page shows a time
+    and zone for that date ("23:59 ET") it is used for the day count.
+    """
+    deadline = normalize_date_like(claimed) if claimed else None
+    cands = _deadlines.find_deadlines(page_text) if page_text else []
+    if deadline is None and cands:
+        best, confidence = _deadlines.best_deadline(page_text)
+        if best is not None and confidence >= 0.75:
+            deadline = best.iso
+    if deadline is None:
+        return None, None
+
+    match = next((c for c in cands if c.iso == deadline), None)
+    profile = _load_user_profile(user_id)
+    return deadline, _deadlines.days_left(
+        deadline,
+        user_tz=_deadlines.user_timezone(profile),
+        at=match.at if match else None,
+        deadline_tz=match.tz if match else None,
+    )
+
+
+def _fallback_workflow(
+    goal: str, text: str, url: Optional[str], user_id: str = "demo-user"
+) -> Dict[str, Any]:
     """Hardcoded fallback if Anthropic / Firecrawl are unavailable."""
+    deadline, days_left = _resolve_deadline(None, text, user_id)
     return {
         "plan_id": "fallback",
         "summary": {
             "title": "Quick Start",
             "one_liner": "API unavailable, using a tiny manual plan.",
-            "deadline": None,
+            "deadline": deadline,
+            "days_left": days_left,
             "tags": [],
         },
         "key_points": [],
@@ -445,7 +854,7 @@ def _fallback_workflow(goal: str, text: str, url: Optional[str]) -> Dict[str, An
         ],
         "block_minutes": 20,
         "check_ins": [5, 12],
-        "deadline": None,
+        "deadline": deadline,
         "sources": [url] if url else [],
         "_scraped_content": text,
     }
@@ -467,19 +876,21 @@ def make_workflow_with_llm(
     combined_text = text or ""
 
     # 1) Try Firecrawl when URL + client are available
-    if page_url and scrape_page_markdown is not None:
+    if page_url and scrape_page_markdown is not None and not BREAKERS["firecrawl"].is_open():
         try:
-            markdown, metadata = scrape_page_markdown(page_url)
+            markdown, metadata = scrape_page_markdown(page_url, user_id=user_id)
             if markdown:
                 combined_text = markdown
+        except Overloaded:
+            raise
         except FirecrawlError as e:
-            print(f"[llm] Firecrawl failed, using raw text instead: {e}")
+            logger.warning("Firecrawl failed, using raw text instead: %s", e)
         except Exception as e:
-            print(f"[llm] Firecrawl unexpected error, using raw text instead: {e}")
+            logger.exception("Firecrawl unexpected error, using raw text instead: %s", e)
 
-    # 2) If no Claude key, return Fallback (heuristic)
-    if client is None:
-        return _fallback_workflow(goal, combined_text, page_url)
+    # 2) If no Claude key (or Claude is failing), return Fallback (heuristic)
+    if not _claude_up():
+        return _fallback_workflow(goal, combined_text, page_url, user_id)
 
     # 3) Real AI Generation
     system_prompt = (
@@ -487,36 +898,37 @@ def make_workflow_with_llm(
         "application page into a 'Micro-Start' workflow. "
         "The user is overwhelmed. Do NOT tell them to 'apply'. Tell them to do ONE tiny "
         "reading task first.\n\n"
-        "Return ONLY a valid JSON object with this structure:\n"
-        "{\n"
-        '  "title": "Short title of the opportunity",\n'
-        '  "one_liner": "A warm, encouraging one-sentence summary of why this fits them.",\n'
-        '  "deadline": "YYYY-MM-DD" or null,\n'
-        '  "key_points": ["3 bullet points highlighting eligibility or values"],\n'
-        '  "micro_tasks": [\n'
-        '    "Step 1: The absolute smallest reading action (e.g. Find the eligibility section)",\n'
-        '    "Step 2: A simple follow up",\n'
-        '    "Step 3: Another simple check"\n'
-        "  ],\n"
-        '  "tags": ["Tag1", "Tag2", "Tag3"]\n'
-        "}\n"
+        "Answer by calling the record_workflow tool."
     )
 
     user_prompt = (
         f"User ID: {user_id}\n"
         f"User Goal: {goal}\n"
         f"Page URL: {page_url}\n\n"
-        "Page Content (truncated to 15k chars):\n"
-        f"{combined_text[:15000]}"
+        "Page Content (most relevant sections):\n"
+        f"{fit_to_budget(combined_text, WORKFLOW_PAGE_TOKENS)}"
     )
 
-    ai_data = _call_claude_json(system_prompt, user_prompt)
+    try:
+        ai_data = _call_claude_structured(
+            "workflow",
+            system_prompt,
+            user_prompt,
+            WorkflowDraft,
+            tool_name="record_workflow",
+            tool_description="Record the Micro-Start workflow for the overlay.",
+            temperature=0.3,
+            user_id=user_id,
+        ) or {}
+    except Overloaded:
+        raise
+    except Exception as e:
+        logger.warning("Claude API error in workflow: %r", e)
+        ai_data = {}
 
     # 4. Normalize deadline and merge into Workflow structure
-    deadline_norm = (
-        normalize_date_like(ai_data.get("deadline"))
-        if ai_data.get("deadline")
-        else None
+    deadline_norm, days_left = _resolve_deadline(
+        ai_data.get("deadline"), combined_text, user_id
     )
 
     return {
@@ -527,6 +939,7 @@ def make_workflow_with_llm(
                 "one_liner", "Let's just take a tiny first step."
             ),
             "deadline": deadline_norm,
+            "days_left": days_left,
             "tags": ai_data.get("tags", []),
         },
         "key_points": ai_data.get("key_points", []),
@@ -541,3 +954,66 @@ def make_workflow_with_llm(
         "_scraped_content": combined_text,
         "metadata": metadata,
     }
+
+
+# -------------------------------------------------------------------
+# /eligibility: optional escalation of ambiguous clauses
+# -------------------------------------------------------------------
+
+# Escalate by default (instead of only when the request asks for it)
+ELIGIBILITY_LLM = (os.getenv("ELIGIBILITY_LLM") or "0") == "1"
+ELIGIBILITY_LLM_MAX_CLAUSES = int(os.getenv("ELIGIBILITY_LLM_MAX_CLAUSES") or 8)
+
+# Fields that matter for eligibility; the rest of the profile (name,
+# address, references) never leaves the server.
+_ELIGIBILITY_PROFILE_KEYS = (
+    "citizen", "pr", "otherStatus", "province", "country", "school",
+    "program", "degreeType", "yearsCompleted", "expectedCompletion", "gpa", "average",
+)
+
+
+def check_eligibility_clauses_with_llm(
+    clauses: List[str], profile: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """
+    Ask Claude about eligibility clauses the local rules could not read.
+    Returns [{ index, status, message }] for the clauses it answered;
+    [] when Claude is unavailable or fails (the local result stands).
+    """
+    clauses = clauses[:ELIGIBILITY_LLM_MAX_CLAUSES]
+    if not _claude_up() or not clauses:
+        return []
+
+    system_prompt = (
+        "You check scholarship eligibility clauses against a student's profile.\n"
+        "For each clause decide:\n"
+        '- "met" if the profile clearly satisfies it\n'
+        '- "unmet" if the profile clearly rules the student out\n'
+        '- "unknown" if the profile does not say, or the clause is not really '
+        "an eligibility condition (say so briefly).\n"
+        "Never guess missing profile facts. Address the student directly."
+    )
+    slim = {k: profile.get(k) for k in _ELIGIBILITY_PROFILE_KEYS if profile.get(k) not in (None, "")}
+    numbered = "\n".join(f"{i}. {c}" for i, c in enumerate(clauses))
+    user_prompt = (
+        f"PROFILE:\n{json.dumps(slim, ensure_ascii=False)}\n\n"
+        f"CLAUSES:\n{numbered}"
+    )
+    try:
+        data = _call_claude_structured(
+            "eligibility",
+            system_prompt,
+            user_prompt,
+            EligibilityVerdicts,
+            tool_name="record_eligibility_verdicts",
+            tool_description="Record one verdict per eligibility clause.",
+            max_tokens=800,
+            temperature=0,
+            user_id=profile.get("user_id"),
+        )
+    except Exception as e:
+        # Overloaded included: the local verdicts are a complete answer
+        logger.warning("Claude API error in eligibility: %r", e)
+        return []
+    verdicts = (data or {}).get("verdicts") or []
+    return [v for v in verdicts if 0 <= v.get("index", -1) < len(clauses)]
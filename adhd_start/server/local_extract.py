@@ -0,0 +1,149 @@
+# server/local_extract.py
+"""
+Deterministic, local extractor for the /parse fields.
+
+Many scholarship pages state their deadline, reference-letter count and
+AI policy in plain, pattern-matchable sentences. This module pulls those
+out with regexes (no RAG, no Claude) and attaches a confidence in [0, 1]
+to every field, so the caller can decide whether the local answer is good
+enough or the request needs to escalate to the LLM tier.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import ai_policy, deadlines
+
+# ---------------------------------------------------------------------------
+# Deadlines
+# ---------------------------------------------------------------------------
+
+def _find_deadline(text: str) -> Tuple[Optional[str], float]:
+    cand, confidence = deadlines.best_deadline(text)
+    return (cand.iso if cand else None), confidence
+
+
+# ---------------------------------------------------------------------------
+# Reference letters
+# ---------------------------------------------------------------------------
+
+_NUM_WORDS = {
+    "no": 0, "zero": 0, "a": 1, "an": 1, "one": 1, "single": 1, "two": 2,
+    "three": 3, "four": 4, "five": 5,
+}
+_NUM = r"(\d|no|zero|an?|one|single|two|three|four|five)"
+_REFS_RES = [
+    # "One confidential reference letter", "two letters of reference"
+    re.compile(
+        rf"\b{_NUM}\s+(?:[a-z-]+\s+){{0,3}}?"
+        r"(?:referee|reference|recommendation)s?(?:\s+letters?)?\b",
+        re.I,
+    ),
+    re.compile(
+        rf"\b{_NUM}\s+(?:[a-z-]+\s+){{0,2}}?letters?\s+of\s+(?:reference|recommendation|support)\b",
+        re.I,
+    ),
+]
+_REF_MENTION = re.compile(r"referee|reference|recommendation letter|letters? of (?:support|recommendation)", re.I)
+
+
+def _find_refs(text: str) -> Tuple[Optional[int], float]:
+    counts = []
+    for rx in _REFS_RES:
+        for m in rx.finditer(text):
+            tok = m.group(1).lower()
+            counts.append(int(tok) if tok.isdigit() else _NUM_WORDS[tok])
+    if counts:
+        distinct = set(counts)
+        if len(distinct) == 1:
+            return counts[0], 0.9
+        return max(distinct), 0.5
+    if _REF_MENTION.search(text):
+        return None, 0.3  # references discussed but count unclear
+    return None, 0.75     # no mention at all
+
+
+# ---------------------------------------------------------------------------
+# Values
+# ---------------------------------------------------------------------------
+
+VALUE_KEYWORDS = {
+    "leadership": r"leader(?:ship)?",
+    "creativity": r"creativ\w*",
+    "originality": r"original(?:ity)?",
+    "community": r"community",
+    "innovation": r"innovat\w*",
+    "resilience": r"resilien\w*",
+    "academic excellence": r"academic (?:excellence|achievement|merit)",
+    "service": r"volunteer\w*|service",
+    "diversity": r"diversity|inclusi\w*|equity",
+    "entrepreneurship": r"entrepreneur\w*",
+    "perseverance": r"persever\w*|overcom\w+ (?:adversity|obstacles|challenges)",
+}
+_VALUE_RES = {name: re.compile(rf"\b(?:{p})", re.I) for name, p in VALUE_KEYWORDS.items()}
+_VALUE_CONTEXT = re.compile(r"demonstrat\w*|criteria|looking for|values?|select\w*|qualit(?:y|ies)", re.I)
+
+
+def _find_values(text: str) -> Tuple[List[str], float]:
+    found: List[str] = []
+    in_context = False
+    for line in text.splitlines():
+        hits = [name for name, rx in _VALUE_RES.items() if rx.search(line)]
+        if not hits:
+            continue
+        if _VALUE_CONTEXT.search(line):
+            in_context = True
+        for h in hits:
+            if h not in found:
+                found.append(h)
+    if not found:
+        return [], 0.5
+    return found[:6], 0.85 if in_context else 0.6
+
+
+# ---------------------------------------------------------------------------
+# AI policy
+# ---------------------------------------------------------------------------
+
+_AI_MENTION = re.compile(r"\b(?:generative\s+ai|ai[-\s]generated|chatgpt|artificial intelligence|ai tools?)\b", re.I)
+
+
+def _find_ai_policy(text: str) -> Tuple[str, float, List[Dict[str, Any]]]:
+    matches = ai_policy.find_matches(text)
+    if matches:
+        return "coach_only", 0.95, matches
+    if _AI_MENTION.search(text):
+        return "ok", 0.4, []  # AI is discussed but not in a way we recognise
+    return "ok", 0.85, []
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def extract_fields_local(page_text: str) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Returns:
+      fields:     {deadline, refs_required, values, ai_policy, ai_policy_matches}
+      confidence: per-field confidence in [0, 1]
+    """
+    text = page_text or ""
+    deadline, c_deadline = _find_deadline(text)
+    refs, c_refs = _find_refs(text)
+    values, c_values = _find_values(text)
+    policy, c_ai, policy_matches = _find_ai_policy(text)
+
+    fields = {
+        "deadline": deadline,
+        "refs_required": refs,
+        "values": values,
+        "ai_policy": policy,
+        "ai_policy_matches": policy_matches,
+    }
+    confidence = {
+        "deadline": c_deadline,
+        "refs_required": c_refs,
+        "values": c_values,
+        "ai_policy": c_ai,
+    }
+    return fields, confidence
@@ -0,0 +1,215 @@
+# server/log.py
+"""
+Structured, non-blocking logging for the server and tools.
+
+    from .log import get_logger
+    logger = get_logger("llm")
+    logger.info("claude call done", extra={"endpoint": "parse", "ms": 812})
+
+- Records are put on a bounded in-memory queue by the calling thread;
+  a background listener thread formats and writes them (stderr). The
+  request thread never blocks on I/O; if the queue is full the record
+  is dropped and counted (`log_stats()`), so logging cost stays flat
+  under load.
+- LOG_FORMAT=json (default): one JSON object per line with ts, level,
+  logger, msg, request_id and any `extra` fields. LOG_FORMAT=text for
+  human-readable local runs.
+- request_id: set per HTTP request by the app's middleware (taken from
+  an incoming X-Request-ID header or generated) and attached to every
+  record logged while serving it, including from worker threads that
+  inherit the context.
+- LOG_LEVEL (default INFO) applies to the whole "adhd" logger tree.
+- Sampling: LOG_DEBUG_SAMPLE (0..1, default 1) keeps that fraction of
+  DEBUG records; a record can carry its own rate via
+  extra={"sample": 0.01}.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+LOG_LEVEL = (os.getenv("LOG_LEVEL") or "INFO").upper()
+LOG_FORMAT = (os.getenv("LOG_FORMAT") or "json").lower()
+LOG_DEBUG_SAMPLE = float(os.getenv("LOG_DEBUG_SAMPLE") or 1.0)
+LOG_QUEUE_MAX = int(os.getenv("LOG_QUEUE_MAX") or 10000)
+
+ROOT = "adhd"
+
+_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else came in via `extra`
+_STD_ATTRS = set(logging.LogRecord("", 0, "", 0, "", None, None).__dict__) | {
+    "message", "asctime", "request_id", "sample", "taskName",
+}
+
+
+# -------------------------------------------------------------------
+# Request correlation
+# -------------------------------------------------------------------
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def bind_request_id(request_id: str) -> contextvars.Token:
+    return _request_id.set(request_id)
+
+
+def unbind_request_id(token: contextvars.Token) -> None:
+    _request_id.reset(token)
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+# -------------------------------------------------------------------
+# Filters / formatters
+# -------------------------------------------------------------------
+
+class _ContextFilter(logging.Filter):
+    """Stamp the request id and apply sampling (runs on the caller's thread)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = getattr(record, "sample", None)
+        if rate is None and record.levelno <= logging.DEBUG:
+            rate = LOG_DEBUG_SAMPLE
+        if rate is not None and rate < 1.0 and random.random() >= rate:
+            return False
+        record.request_id = _request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out: Dict[str, Any] = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+            + f".{int(record.msecs):03d}Z",
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            out["request_id"] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in _STD_ATTRS and not key.startswith("_"):
+                out[key] = value
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        extras = " ".join(
+            f"{k}={v}" for k, v in record.__dict__.items()
+            if k not in _STD_ATTRS and not k.startswith("_")
+        )
+        rid = getattr(record, "request_id", None)
+        line = f"[{record.name.split('.', 1)[-1]}] {record.getMessage()}"
+        if extras:
+            line += f" {extras}"
+        if rid:
+            line += f" rid={rid}"
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Drops (and counts) records instead of blocking when the queue is full."""
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args and render the traceback now (objects may change
+        # before the writer thread gets to them) but keep extras intact.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        _ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _QueueHandler.dropped += 1
+
+
+# -------------------------------------------------------------------
+# Setup
+# -------------------------------------------------------------------
+
+_lock = threading.Lock()
+_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=LOG_QUEUE_MAX)
+_listener: Optional[logging.handlers.QueueListener] = None
+_listener_pid: Optional[int] = None
+_configured = False
+
+
+def _ensure_listener() -> None:
+    """Start the writer thread (again after a fork: threads don't survive it)."""
+    global _listener, _listener_pid
+    if _listener is not None and _listener_pid == os.getpid():
+        return
+    with _lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            return
+        stream = logging.StreamHandler(sys.stderr)
+        stream.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+        _listener = logging.handlers.QueueListener(_queue, stream)
+        _listener_pid = os.getpid()
+        _listener.start()
+
+
+def stop_listener() -> None:
+    """
+    Drain the queue and stop the writer thread. Used at exit and by the
+    prefork launcher before it forks (no thread may be holding a lock at
+    that point); the next record starts the writer again.
+    """
+    global _listener
+    with _lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            _listener.stop()
+        _listener = None
+
+
+def configure() -> None:
+    global _configured
+    if _configured:
+        return
+    with _lock:
+        if _configured:
+            return
+        root = logging.getLogger(ROOT)
+        root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+        root.propagate = False
+        handler = _QueueHandler(_queue)
+        handler.addFilter(_ContextFilter())
+        root.addHandler(handler)
+        atexit.register(stop_listener)
+        _configured = True
+
+
+def get_logger(name: str) -> logging.Logger:
+    configure()
+    return logging.getLogger(f"{ROOT}.{name}")
+
+
+def log_stats() -> Dict[str, Any]:
+    return {"queued": _queue.qsize(), "dropped": _QueueHandler.dropped}
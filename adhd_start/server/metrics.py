@@ -0,0 +1,186 @@
+# server/metrics.py
+"""
+Latency instrumentation: timing spans, histograms, Prometheus text export.
+
+    with span("claude"):
+        resp = client.messages.create(...)
+
+records the duration into the `adhd_stage_seconds{stage="claude"}`
+histogram and, when running inside an HTTP request, into that request's
+span table, which the app's middleware sends back as a Server-Timing
+header (`claude;dur=812.4, retrieval;dur=95.0, total;dur=930.1`).
+
+Stage names used across the server:
+  profile_load, retrieval, chroma_query, embedding, claude, json_coerce,
+  firecrawl, disk_io
+
+Spans nest (retrieval contains chroma_query contains embedding), so the
+stages of one request do not sum to its total.
+
+`render()` produces the /metrics body in the Prometheus text format; no
+client library is needed. Other modules' counters (LLM usage, admission,
+breakers, jobs) are exported through `register_collector`.
+"""
+
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .log import get_logger
+
+logger = get_logger("metrics")
+
+BUCKETS_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+# (name, help, type, {labels: value})
+Family = Tuple[str, str, str, Dict[Labels, float]]
+
+# stage -> [total seconds, count] for the current request (None outside one)
+_request_spans: contextvars.ContextVar[Optional[Dict[str, List[float]]]] = (
+    contextvars.ContextVar("request_spans", default=None)
+)
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = BUCKETS_S):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # labels -> (bucket counts, sum, count)
+        self._series: Dict[Labels, List[Any]] = {}
+
+    def observe(self, seconds: float, **labels: str) -> None:
+        key: Labels = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, upper in enumerate(self.buckets):
+                if seconds <= upper:
+                    counts[i] += 1
+                    break
+            series[1] += seconds
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(k, list(v[0]), v[1], v[2]) for k, v in sorted(self._series.items())]
+        for labels, counts, total, count in snapshot:
+            cumulative = 0
+            for upper, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_fmt(labels + (('le', repr(upper)),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_fmt(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{self.name}_sum{_fmt(labels)} {total:.6f}")
+            lines.append(f"{self.name}_count{_fmt(labels)} {count}")
+        return lines
+
+
+def _fmt(labels: Labels) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels
+    )
+    return "{" + inner + "}"
+
+
+STAGE_SECONDS = Histogram("adhd_stage_seconds", "Time spent per pipeline stage.")
+REQUEST_SECONDS = Histogram("adhd_http_request_seconds", "HTTP request latency by route.")
+
+_collectors: List[Callable[[], List[Family]]] = []
+
+
+# -------------------------------------------------------------------
+# Spans
+# -------------------------------------------------------------------
+
+def observe(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    spans = _request_spans.get()
+    if spans is not None:
+        entry = spans.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - t0)
+
+
+def timed(stage: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator form of `span`."""
+
+    def wrap(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def inner(*args: Any, **kwargs: Any) -> Any:
+            with span(stage):
+                return fn(*args, **kwargs)
+
+        return inner
+
+    return wrap
+
+
+# -------------------------------------------------------------------
+# Per-request tracking (used by the app middleware)
+# -------------------------------------------------------------------
+
+def begin_request() -> Tuple[contextvars.Token, Dict[str, List[float]]]:
+    spans: Dict[str, List[float]] = {}
+    return _request_spans.set(spans), spans
+
+
+def end_request(token: contextvars.Token) -> None:
+    _request_spans.reset(token)
+
+
+def server_timing(spans: Dict[str, List[float]], total_s: float) -> str:
+    parts = []
+    for stage, (seconds, count) in sorted(spans.items(), key=lambda kv: -kv[1][0]):
+        desc = f';desc="x{count}"' if count > 1 else ""
+        parts.append(f"{stage}{desc};dur={seconds * 1000:.1f}")
+    parts.append(f"total;dur={total_s * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    REQUEST_SECONDS.observe(seconds, method=method, route=route, status=str(status))
+
+
+# -------------------------------------------------------------------
+# Export
+# -------------------------------------------------------------------
+
+def register_collector(fn: Callable[[], List[Family]]) -> None:
+    """fn() -> [(name, help, "counter"|"gauge", {labels: value})] at scrape time."""
+    _collectors.append(fn)
+
+
+def render() -> str:
+    lines = STAGE_SECONDS.render() + REQUEST_SECONDS.render()
+    for collect in _collectors:
+        try:
+            families = collect()
+        except Exception as exc:  # a broken collector must not break /metrics
+            logger.warning("collector failed: %r", exc)
+            continue
+        for name, help_text, kind, samples in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(samples.items()):
+                lines.append(f"{name}{_fmt(labels)} {float(value):g}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,257 @@
+# server/prefork.py
+"""
+Production launcher: preload once, fork workers that share the memory.
+
+`uvicorn --workers N` spawns N fresh interpreters, and each one imports
+LangChain, loads the MiniLM weights, parses the catalog and builds the
+ranking features on its own, so RAM grows linearly with N. Here the
+master process does all of that once, then forks the workers; their
+pages stay shared copy-on-write until someone writes to them.
+
+Before forking, `gc.freeze()` moves every preloaded object into the
+permanent generation, so the cyclic GC in the workers never walks (and
+never dirties) those pages. Plain refcount updates on objects a worker
+actually touches still copy their page; large buffers (model weights,
+numpy feature matrices) are not refcounted per element and stay shared.
+
+The master never runs inference (forking after torch has started its
+thread pools can hang the children); weights are only loaded. Threads
+are stopped before the fork; every thread-owning module (logging,
+embedding batcher, job queue, caches) restarts its threads per process.
+
+Background jobs (server/jobs.py) live in server/store/jobs/ and are
+claimed under a file lock, so any worker can run a job and answer polls
+for it.
+
+The master binds the socket, forks --workers children that each serve
+it with uvicorn, restarts a worker that dies, and on SIGTERM/SIGINT
+stops them all (--graceful-timeout seconds, then SIGKILL).
+
+Run from adhd_start/:
+    python -m server.prefork --workers 4 --port 8000
+    python -m server.tools.rss_report --workers 4      # RSS vs uvicorn --workers
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .log import get_logger, stop_listener
+
+logger = get_logger("prefork")
+
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY") or 2)
+# a worker dying faster than this after start counts as a crash loop
+MIN_WORKER_UPTIME_S = 5.0
+
+_preloaded: Optional[Dict[str, Any]] = None
+
+
+# -------------------------------------------------------------------
+# Preload
+# -------------------------------------------------------------------
+
+def preload(rag: bool = True) -> Dict[str, Any]:
+    """
+    Import the app and build its read-only state: catalog, ranking
+    features, AI-policy matcher and (if its dependencies are installed)
+    the embedding model. Idempotent; returns per-step seconds.
+    """
+    global _preloaded
+    if _preloaded is not None:
+        return _preloaded
+
+    steps: Dict[str, Any] = {}
+
+    def step(name: str, fn: Any) -> None:
+        t0 = time.perf_counter()
+        try:
+            fn()
+            steps[name] = round(time.perf_counter() - t0, 3)
+        except Exception as exc:  # optional pieces (RAG) may be missing
+            steps[name] = f"skipped: {exc!r}"[:200]
+            logger.warning("preload step %s skipped: %r", name, exc)
+
+    def load_app() -> None:
+        from . import app  # noqa: F401  (imports llm, schemas, catalog, ai_policy)
+
+    def load_ranking() -> None:
+        from . import ranking
+        from .scholarship_repo import scholarship_repo
+
+        ranking.features_for(scholarship_repo)
+
+    def load_rag() -> None:
+        # Module import builds the shared embedding model (weights only;
+        # its batching threads start on first use, in the worker).
+        from server.rag import retriever  # noqa: F401
+
+    step("app", load_app)
+    step("ranking", load_ranking)
+    if rag:
+        step("rag", load_rag)
+    _preloaded = steps
+    logger.info("preloaded", extra={"steps": steps})
+    return steps
+
+
+# -------------------------------------------------------------------
+# Master / workers
+# -------------------------------------------------------------------
+
+def _bind(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock: socket.socket, index: int, args: argparse.Namespace) -> None:
+    """Child process: serve the inherited socket until told to stop."""
+    import uvicorn
+
+    from .app import app
+
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, signal.SIG_DFL)  # uvicorn installs its own
+    gc.enable()
+    os.environ["PREFORK_WORKER"] = str(index)
+    config = uvicorn.Config(
+        app,
+        log_level=args.log_level,
+        access_log=False,  # the app logs one structured line per request
+        timeout_keep_alive=args.keep_alive,
+        lifespan="on",
+    )
+    code = 0
+    try:
+        uvicorn.Server(config).run(sockets=[sock])
+    except BaseException as exc:
+        logger.exception("worker %d crashed: %r", index, exc)
+        code = 1
+    finally:
+        stop_listener()
+        os._exit(code)
+
+
+class Master:
+    def __init__(self, sock: socket.socket, args: argparse.Namespace):
+        self.sock = sock
+        self.args = args
+        self.workers: Dict[int, Dict[str, Any]] = {}  # pid -> {index, started}
+        self.stopping = False
+
+    def spawn(self, index: int) -> None:
+        # Nothing may hold a lock across fork: stop our own threads first.
+        stop_listener()
+        alive = [t.name for t in threading.enumerate() if t is not threading.main_thread()]
+        if alive:
+            logger.warning("forking with threads alive: %s", alive)
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(self.sock, index, self.args)
+        self.workers[pid] = {"index": index, "started": time.monotonic()}
+        logger.info("worker started", extra={"worker": index, "pid": pid})
+
+    def _on_signal(self, signum: int, frame: Any) -> None:
+        self.stopping = True
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._on_signal)
+        signal.signal(signal.SIGINT, self._on_signal)
+        for i in range(self.args.workers):
+            self.spawn(i)
+        logger.info(
+            "serving",
+            extra={"host": self.args.host, "port": self.sock.getsockname()[1], "workers": self.args.workers},
+        )
+        crashes: List[float] = []
+        while not self.stopping:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                time.sleep(0.5)
+                continue
+            info = self.workers.pop(pid, None)
+            if info is None or self.stopping:
+                continue
+            logger.warning(
+                "worker exited",
+                extra={"worker": info["index"], "pid": pid, "status": os.waitstatus_to_exitcode(status)},
+            )
+            if time.monotonic() - info["started"] < MIN_WORKER_UPTIME_S:
+                crashes = [t for t in crashes if time.monotonic() - t < 60] + [time.monotonic()]
+                if len(crashes) >= 3 * self.args.workers:
+                    logger.error("workers keep crashing on start, giving up")
+                    self.stopping = True
+                    break
+                time.sleep(1.0)
+            self.spawn(info["index"])
+        return self.shutdown()
+
+    def shutdown(self) -> int:
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.workers.pop(pid, None)
+        deadline = time.monotonic() + self.args.graceful_timeout
+        while self.workers and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                self.workers.pop(pid, None)
+            else:
+                time.sleep(0.1)
+        for pid in list(self.workers):
+            logger.warning("killing worker that did not stop", extra={"pid": pid})
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self.sock.close()
+        logger.info("stopped")
+        stop_listener()
+        return 0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--workers", type=int, default=WEB_CONCURRENCY)
+    ap.add_argument("--no-rag", action="store_true", help="do not preload the embedding model")
+    ap.add_argument("--graceful-timeout", type=float, default=30.0)
+    ap.add_argument("--keep-alive", type=int, default=5)
+    ap.add_argument("--log-level", default="warning", help="uvicorn's own log level")
+    args = ap.parse_args()
+
+    if not hasattr(os, "fork"):
+        sys.exit("server.prefork needs os.fork (Linux/macOS); use uvicorn --workers instead")
+
+    # No collections while preloading (objects end up densely packed),
+    # then freeze them so the workers' GC leaves those pages alone.
+    gc.disable()
+    preload(rag=not args.no_rag)
+    gc.collect()
+    gc.freeze()
+
+    sock = _bind(args.host, args.port)
+    sys.exit(Master(sock, args).run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+# adhd_start/server/rag/embedding_service.py
+# ---------------------------------------------------------
+# In-process embedding service shared by the retriever and
+# the ingest scripts.
+#
+# Instead of every caller running the MiniLM model inline with
+# a batch size of one, embed requests are put on a queue, a
+# collector thread coalesces them into micro-batches
+# (EMBED_MAX_BATCH / EMBED_MAX_WAIT_MS) and a small worker pool
+# runs the model on each batch.
+#
+# Env knobs:
+#   EMBED_BATCHING=0          disable batching (plain HuggingFaceEmbeddings)
+#   EMBED_MAX_BATCH=32        max texts per model call
+#   EMBED_MAX_WAIT_MS=5       how long to wait for more requests
+#   EMBED_WORKERS=<cores/2>   threads running the model
+#   EMBED_BACKEND=torch|onnx  onnx = quantized MiniLM on CPU
+#   EMBED_ONNX_FILE=...       ONNX file inside the model repo
+#   EMBED_CACHE_TTL_S=86400   query vectors kept in the shared cache
+#                             (server/cache.py); 0 disables
+#
+# Usage:
+#   from server.rag.embedding_service import get_embeddings
+#   EMB = get_embeddings()
+# ---------------------------------------------------------
+
+import hashlib
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from langchain_core.embeddings import Embeddings
+except ImportError:  # pragma: no cover
+    from langchain.embeddings.base import Embeddings  # type: ignore
+
+from server.cache import namespace
+from server.log import get_logger
+from server.metrics import span
+
+logger = get_logger("embeddings")
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_ONNX_FILE = "onnx/model_qint8_avx512_vnni.onnx"
+
+EMBED_CACHE_TTL_S = float(os.getenv("EMBED_CACHE_TTL_S") or 24 * 3600)
+_query_cache = namespace("embed_query", ttl_s=EMBED_CACHE_TTL_S)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+def _default_workers() -> int:
+    # torch already parallelises inside one encode() call, so running
+    # one worker per core oversubscribes the CPU; half the cores keeps
+    # several batches in flight without thrashing.
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+def load_base_embeddings(backend: Optional[str] = None) -> Embeddings:
+    """
+    Build the underlying (unbatched) embedding model.
+
+    backend="onnx" loads a quantized ONNX export of MiniLM through
+    sentence-transformers' ONNX backend; if that is not available we
+    fall back to the regular torch model.
+    """
+    try:
+        from langchain_huggingface import HuggingFaceEmbeddings
+    except ImportError:  # pragma: no cover
+        from langchain_community.embeddings import HuggingFaceEmbeddings  # type: ignore
+
+    backend = (backend or os.getenv("EMBED_BACKEND") or "torch").lower()
+    if backend == "onnx":
+        onnx_file = os.getenv("EMBED_ONNX_FILE") or DEFAULT_ONNX_FILE
+        try:
+            return HuggingFaceEmbeddings(
+                model_name=MODEL_NAME,
+                model_kwargs={
+                    "backend": "onnx",
+                    "model_kwargs": {"file_name": onnx_file},
+                },
+            )
+        except Exception as e:
+            logger.warning("ONNX backend unavailable, using torch: %r", e)
+
+    return HuggingFaceEmbeddings(model_name=MODEL_NAME)
+
+
+class BatchingEmbeddings(Embeddings):
+    """
+    LangChain-compatible wrapper that coalesces concurrent embed calls.
+
+    Each text becomes one queue item with its own Future. The collector
+    thread waits up to `max_wait_ms` for more items (or until
+    `max_batch_size` is reached), de-duplicates identical texts and hands
+    the batch to the worker pool. Threads are started lazily on first use
+    so the object is safe to create before a fork.
+    """
+
+    def __init__(
+        self,
+        base: Embeddings,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        workers: Optional[int] = None,
+    ):
+        self.base = base
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.workers = workers or _default_workers()
+        # part of the query-cache key (torch and quantized ONNX vectors differ)
+        self.backend_name = (os.getenv("EMBED_BACKEND") or "torch").lower()
+
+        self._queue: "queue.Queue[Tuple[str, str, Future]]" = queue.Queue()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._collector: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+
+        # simple counters for benchmarks / debugging (updated under _lock:
+        # request threads and pool workers both bump them)
+        self._stats: Counter = Counter()
+
+    # ---- LangChain Embeddings interface ----
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with span("embedding"):
+            futures = [self._submit("doc", t) for t in texts]
+            return [f.result() for f in futures]
+
+    def embed_query(self, text: str) -> List[float]:
+        with span("embedding"):
+            if EMBED_CACHE_TTL_S <= 0:
+                return self._submit("query", text).result()
+            # Same text, same model -> same vector, in any worker
+            key = [MODEL_NAME, self.backend_name, hashlib.sha1(text.encode("utf-8")).hexdigest()]
+            vec = _query_cache.get(key)
+            if vec is None:
+                vec = self._submit("query", text).result()
+                _query_cache.set(key, [float(x) for x in vec])
+            return vec
+
+    # ---- internals ----
+
+    def _ensure_started(self) -> None:
+        # Re-create threads after a fork: the child inherits the objects
+        # but not the running threads.
+        if self._collector is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._collector is not None and self._pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="embed-worker"
+            )
+            self._collector = threading.Thread(
+                target=self._collect_loop, name="embed-collector", daemon=True
+            )
+            self._pid = os.getpid()
+            self._collector.start()
+
+    def _submit(self, kind: str, text: str) -> Future:
+        self._ensure_started()
+        fut: Future = Future()
+        with self._lock:
+            self._stats["requests"] += 1
+        self._queue.put((kind, text, fut))
+        return fut
+
+    def _collect_loop(self) -> None:
+        q = self._queue
+        while True:
+            batch = [q.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            assert self._pool is not None
+            self._pool.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch: List[Tuple[str, str, Future]]) -> None:
+        # Group by kind (query vs document) and de-duplicate texts.
+        groups: Dict[str, Dict[str, List[Future]]] = {}
+        for kind, text, fut in batch:
+            groups.setdefault(kind, {}).setdefault(text, []).append(fut)
+
+        for kind, by_text in groups.items():
+            texts = list(by_text.keys())
+            try:
+                if kind == "query" and len(texts) == 1:
+                    vectors: List[Any] = [self.base.embed_query(texts[0])]
+                elif kind == "query":
+                    vectors = self._embed_queries(texts)
+                else:
+                    vectors = self.base.embed_documents(texts)
+            except Exception as e:
+                for futs in by_text.values():
+                    for fut in futs:
+                        fut.set_exception(e)
+                continue
+
+            with self._lock:
+                self._stats["batches"] += 1
+                self._stats["texts_embedded"] += len(texts)
+            for text, vec in zip(texts, vectors):
+                for fut in by_text[text]:
+                    fut.set_result(vec)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {k: self._stats.get(k, 0) for k in ("requests", "batches", "texts_embedded")}
+
+    def _embed_queries(self, texts: List[str]) -> List[Any]:
+        """
+        Batch several queries in one model call when the backend lets us
+        pass query-specific encode kwargs; otherwise embed them as docs
+        (identical for MiniLM, which has no query prompt).
+        """
+        client = getattr(self.base, "_client", None) or getattr(self.base, "client", None)
+        query_kwargs = getattr(self.base, "query_encode_kwargs", None)
+        if client is not None and query_kwargs:
+            return client.encode(texts, **query_kwargs).tolist()
+        return self.base.embed_documents(texts)
+
+
+_EMB: Optional[Embeddings] = None
+_EMB_LOCK = threading.Lock()
+
+
+def get_embeddings() -> Embeddings:
+    """Process-wide shared embedding model (batched unless EMBED_BATCHING=0)."""
+    global _EMB
+    if _EMB is not None:
+        return _EMB
+    with _EMB_LOCK:
+        if _EMB is None:
+            base = load_base_embeddings()
+            if (os.getenv("EMBED_BATCHING") or "1") == "0":
+                _EMB = base
+            else:
+                _EMB = BatchingEmbeddings(
+                    base,
+                    max_batch_size=_env_int("EMBED_MAX_BATCH", 32),
+                    max_wait_ms=float(_env_int("EMBED_MAX_WAIT_MS", 5)),
+                    workers=_env_int("EMBED_WORKERS", _default_workers()),
+                )
+    return _EMB
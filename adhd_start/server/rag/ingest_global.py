@@ -8,19 +8,19 @@ try:
 except ImportError:  # noqa: E722
     from langchain_community.vectorstores import Chroma
 
-try:
-    from langchain_huggingface import HuggingFaceEmbeddings
-except ImportError:  # noqa: E722
-    from langchain_community.embeddings import HuggingFaceEmbeddings
-
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from server.log import get_logger
+from server.rag.embedding_service import get_embeddings
+
+logger = get_logger("ingest_global")
+
 # .../adhd_start
 BASE_DIR = Path(__file__).resolve().parents[2]
 DOC_DIR = BASE_DIR / "server" / "store" / "sample_pages"
 DB_DIR = BASE_DIR / "server" / "store" / "chroma_global"
 
-EMB = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+EMB = get_embeddings()
 
 
 def load_docs():
@@ -48,4 +48,4 @@ if __name__ == "__main__":
         persist_directory=str(DB_DIR),
         metadatas=metas,
     )
-    print(f"✅ Ingested {len(texts)} chunks into {DB_DIR}")
+    logger.info("ingested %d chunks into %s", len(texts), DB_DIR)
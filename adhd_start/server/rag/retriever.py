@@ -2,7 +2,7 @@
 # ---------------------------------------------------------
 # RAG helper: retrieve relevant chunks from:
 #   - global DB: sample_pages → chroma_global
-#   - user DB: per-user notes → chroma_user/<user_id>
+#   - user DB: per-user notes → chroma_users (filtered by user_id)
 #
 # This module DOES NOT call Anthropic. It only:
 #   - returns a text context (for prompts)
@@ -15,6 +15,8 @@
 from pathlib import Path
 from typing import Tuple, List, Dict, Any
 
+from server.log import get_logger
+from server.metrics import span
 from server.user_repo import get_user
 
 # Prefer new langchain packages if available; fall back to community
@@ -23,14 +25,13 @@ try:
 except ImportError:  # pragma: no cover
     from langchain_community.vectorstores import Chroma  # type: ignore
 
-try:
-    from langchain_huggingface import HuggingFaceEmbeddings
-except ImportError:  # pragma: no cover
-    from langchain_community.embeddings import HuggingFaceEmbeddings  # type: ignore
+from server.rag.embedding_service import get_embeddings
+from server.rag.user_store import get_user_retriever
 
+logger = get_logger("retriever")
 
-# Shared embedding model (same one used for ingest)
-EMB = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+# Shared embedding model (same one used for ingest; batched across requests)
+EMB = get_embeddings()
 
 # .../adhd_start
 BASE_DIR = Path(__file__).resolve().parents[2]
@@ -38,9 +39,6 @@ BASE_DIR = Path(__file__).resolve().parents[2]
 # Global DB: sample pages, e.g. sample_national_scholarship.txt
 GLOBAL_DB = BASE_DIR / "server" / "store" / "chroma_global"
 
-# Per-user DB: notes, prior applications, etc.
-USER_DB_BASE = BASE_DIR / "server" / "store" / "chroma_user"
-
 
 def _get_global_retriever(k: int = 5):
     """
@@ -52,12 +50,10 @@ def _get_global_retriever(k: int = 5):
 
 def _get_user_retriever(user_id: str, k: int = 5):
     """
-    Returns a VectorStoreRetriever over the user-specific Chroma DB,
-    e.g. server/store/chroma_user/<user_id>
+    Returns a VectorStoreRetriever over the shared user-notes collection,
+    filtered to this user's chunks (see server/rag/user_store.py).
     """
-    user_dir = USER_DB_BASE / user_id
-    vs = Chroma(persist_directory=str(user_dir), embedding_function=EMB)
-    return vs.as_retriever(search_kwargs={"k": k})
+    return get_user_retriever(user_id, k)
 
 
 def _score_docs(
@@ -110,16 +106,18 @@ def get_context_for_parse(
 
     # 1) Retrieve from global and user stores
     try:
-        global_docs = _get_global_retriever(k_global).invoke(query)
+        with span("chroma_query"):
+            global_docs = _get_global_retriever(k_global).invoke(query)
     except Exception as e:
-        print("[retriever] Global retrieval failed:", repr(e))
+        logger.warning("global retrieval failed: %r", e)
         global_docs = []
 
     try:
-        user_docs = _get_user_retriever(user_id, k_user).invoke(query)
+        with span("chroma_query"):
+            user_docs = _get_user_retriever(user_id, k_user).invoke(query)
     except Exception as e:
         # It's fine if user DB doesn't exist yet (no user notes)
-        print("[retriever] User retrieval failed:", repr(e))
+        logger.info("user retrieval failed: %r", e, extra={"user_id": user_id})
         user_docs = []
 
     docs = global_docs + user_docs
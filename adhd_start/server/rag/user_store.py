@@ -0,0 +1,97 @@
+# adhd_start/server/rag/user_store.py
+# ---------------------------------------------------------
+# Consolidated multi-tenant vector store for per-user notes.
+#
+# Previously every user got their own persistent Chroma directory
+# (store/chroma_user/<user_id>), i.e. one SQLite file + HNSW index
+# per user. Now all users share one persistent directory
+# (store/chroma_users) and chunks carry a `user_id` metadata key
+# that every query filters on.
+#
+# For very large deployments the collection can be split into
+# USER_STORE_SHARDS collections by a stable hash of user_id; a user
+# always lands in the same shard.
+#
+# Migrate the old layout with:
+#   python -m server.tools.migrate_user_chroma
+# ---------------------------------------------------------
+
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Prefer new langchain packages if available; fall back to community
+try:
+    from langchain_chroma import Chroma
+except ImportError:  # pragma: no cover
+    from langchain_community.vectorstores import Chroma  # type: ignore
+
+from server.rag.embedding_service import get_embeddings
+
+# .../adhd_start
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+# Old layout: one directory per user (read only by the migration tool)
+LEGACY_USER_DB_BASE = BASE_DIR / "server" / "store" / "chroma_user"
+
+# New layout: one directory, one (or a few sharded) collections
+USER_STORE_DIR = BASE_DIR / "server" / "store" / "chroma_users"
+COLLECTION_PREFIX = "user_notes"
+USER_STORE_SHARDS = max(1, int(os.getenv("USER_STORE_SHARDS") or 1))
+
+_STORES: Dict[str, Any] = {}
+_LOCK = threading.Lock()
+
+
+def shard_for(user_id: str, shards: int = USER_STORE_SHARDS) -> int:
+    """Stable shard number for a user (crc32, so it survives restarts)."""
+    if shards <= 1:
+        return 0
+    return zlib.crc32(user_id.encode("utf-8")) % shards
+
+
+def collection_name(shard: int, shards: int = USER_STORE_SHARDS) -> str:
+    if shards <= 1:
+        return COLLECTION_PREFIX
+    return f"{COLLECTION_PREFIX}_{shard:03d}"
+
+
+def get_collection_store(name: str, embedding: Optional[Any] = None):
+    """Cached Chroma handle for one collection in the shared directory."""
+    store = _STORES.get(name)
+    if store is not None:
+        return store
+    with _LOCK:
+        store = _STORES.get(name)
+        if store is None:
+            USER_STORE_DIR.mkdir(parents=True, exist_ok=True)
+            store = Chroma(
+                collection_name=name,
+                persist_directory=str(USER_STORE_DIR),
+                embedding_function=embedding or get_embeddings(),
+            )
+            _STORES[name] = store
+    return store
+
+
+def get_user_store(user_id: str):
+    """Chroma handle holding this user's chunks (shared with other users)."""
+    return get_collection_store(collection_name(shard_for(user_id)))
+
+
+def add_user_texts(user_id: str, texts: List[str], metadatas: List[Dict[str, Any]]) -> int:
+    """Add chunks for a user; `user_id` is always forced into the metadata."""
+    if not texts:
+        return 0
+    metas = [{**(m or {}), "user_id": user_id} for m in metadatas]
+    get_user_store(user_id).add_texts(texts, metadatas=metas)
+    return len(texts)
+
+
+def get_user_retriever(user_id: str, k: int = 5):
+    """Retriever that only ever sees this user's chunks."""
+    return get_user_store(user_id).as_retriever(
+        search_kwargs={"k": k, "filter": {"user_id": user_id}}
+    )
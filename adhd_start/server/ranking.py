@@ -0,0 +1,360 @@
+# server/ranking.py
+"""
+"Which scholarships fit me?" – rank the whole catalog for one user.
+
+Per catalog snapshot (ScholarshipRepo.version) every Scholarship is
+turned into a row of NumPy feature arrays once:
+
+  deadline   date ordinal (NaN = unknown); from deadline_date or, if
+             missing, the deadline engine on the description
+  amount     CAD amount (NaN = unknown); from amount or "$5,000" in text
+  level      bitmask of accepted levels (0 = open / not stated)
+  province   bitmask of accepted provinces (0 = no restriction)
+  country    0 any, 1 Canada, 2 United States
+  terms      multi-hot over a small vocabulary (tags + program fields +
+             identity groups), used for interest overlap
+
+A ranking request only builds the user's side (a handful of scalars and
+column indices) and scores every row with vectorised arithmetic, then
+takes the top k with argpartition. On 50k scholarships that is a few
+milliseconds (see server/tools/bench_ranking.py). Building the features
+costs ~0.5 ms per distinct entry, once per snapshot; the app starts that
+build in the background at startup.
+"""
+
+import math
+import re
+import threading
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import deadlines
+from . import eligibility as elig
+from .log import get_logger
+
+logger = get_logger("ranking")
+
+# ---------------------------------------------------------------------------
+# Settings
+# ---------------------------------------------------------------------------
+
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    "deadline": 0.25,
+    "amount": 0.20,
+    "interests": 0.30,
+    "level": 0.15,
+    "location": 0.10,
+}
+# Component value when the scholarship doesn't say (neither good nor bad)
+UNKNOWN_DEADLINE = 0.35
+UNKNOWN_AMOUNT = 0.30
+# Level / location: open to everyone vs. profile field not set
+OPEN_MATCH = 0.75
+UNKNOWN_PROFILE = 0.5
+# A clear level/location mismatch keeps the row but pushes it down hard
+MISMATCH_FACTOR = 0.2
+# Deadline proximity halves every DEADLINE_HALF_LIFE days
+DEADLINE_HALF_LIFE = 30.0
+
+_LEVEL_BITS = {"high_school": 1, "undergrad": 2, "grad": 4}
+_PROVINCE_BITS = {code: 1 << i for i, code in enumerate(sorted(set(elig.PROVINCES.values())))}
+_COUNTRIES = {"Canada": 1, "United States": 2}
+
+_AMOUNT_RE = re.compile(r"\$\s?(\d{1,3}(?:,\d{3})+|\d+)(?:\.\d{2})?(?!\s*(?:million|billion|m\b|b\b))", re.I)
+MAX_REASONABLE_AMOUNT = 250_000.0
+
+
+# ---------------------------------------------------------------------------
+# Catalog features
+# ---------------------------------------------------------------------------
+
+@dataclass
+class CatalogFeatures:
+    version: int
+    items: List[Any]
+    deadline: np.ndarray      # float64 date ordinals, NaN unknown
+    amount: np.ndarray        # float32, NaN unknown
+    amount_norm: np.ndarray   # float32 in [0, 1], UNKNOWN_AMOUNT for NaN
+    level: np.ndarray         # uint8 bitmask
+    province: np.ndarray      # uint32 bitmask
+    country: np.ndarray       # uint8
+    terms: np.ndarray         # uint8 (n, V) multi-hot
+    term_norm: np.ndarray     # float32 sqrt(row term count), >= 1
+    vocab: Dict[str, int]
+    # year-less text deadlines were resolved against this day's year
+    built_on: date
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+def _amount_from_text(text: str) -> Optional[float]:
+    best = None
+    for m in _AMOUNT_RE.finditer(text or ""):
+        val = float(m.group(1).replace(",", ""))
+        if 0 < val <= MAX_REASONABLE_AMOUNT:
+            best = val if best is None else max(best, val)
+    return best
+
+
+# Case-sensitive copies of the eligibility patterns, run on lower-cased
+# text: re.I turns off the regex engine's literal-prefix scan, which made
+# term extraction the slowest part of a feature build.
+_FIELD_RES_LOWER = {name: re.compile(rx.pattern) for name, rx in elig.PROGRAM_FIELD_RES.items()}
+_STEM_RE_LOWER = re.compile(elig.STEM_RE.pattern)
+_IDENTITY_RE_LOWER = re.compile(elig.IDENTITY_RE.pattern)
+
+
+@lru_cache(maxsize=8192)
+def _text_terms(text: str) -> Tuple[str, ...]:
+    low = text.lower()
+    terms = [name for name, rx in _FIELD_RES_LOWER.items() if rx.search(low)]
+    if _STEM_RE_LOWER.search(low):
+        terms.append("stem")
+    terms.extend(m.group(0) for m in _IDENTITY_RE_LOWER.finditer(low))
+    return tuple(terms)
+
+
+def _terms_for(s: Any, text: str) -> List[str]:
+    terms = [t.strip().lower() for t in (getattr(s, "tags", None) or []) if t and t.strip()]
+    terms.extend(_text_terms(text))
+    return list(dict.fromkeys(terms))
+
+
+@lru_cache(maxsize=8192)
+def _text_deadline(text: str, today: date) -> float:
+    # `today` is part of the cache key: year-less dates resolve to its year
+    cand, confidence = deadlines.best_deadline(text, today=today)
+    return float(cand.date.toordinal()) if cand and confidence >= 0.75 else math.nan
+
+
+def _row_features(s: Any, today: date) -> Tuple[float, float, int, int, int, List[str]]:
+    text = "\n".join(p for p in (s.title, elig.scholarship_text(s)) if p)
+
+    if s.deadline_date:
+        deadline = float(s.deadline_date.toordinal())
+    else:
+        deadline = _text_deadline(text, today)
+
+    amount = float(s.amount) if s.amount else (_amount_from_text(text) or math.nan)
+
+    level = province = country = 0
+    reqs, _ambiguous = elig.extract_requirements(elig.scholarship_text(s))
+    for r in reqs:
+        if r.category == "level":
+            for lv in r.param("levels"):
+                level |= _LEVEL_BITS[lv]
+        elif r.category == "province":
+            for code in r.param("provinces"):
+                province |= _PROVINCE_BITS.get(code, 0)
+        elif r.category == "country" and not country:
+            country = _COUNTRIES.get(r.param("country"), 0)
+    return deadline, amount, level, province, country, _terms_for(s, text)
+
+
+def build_features(items: Sequence[Any], version: int = 0, today: Optional[date] = None) -> CatalogFeatures:
+    """Precompute the feature arrays for one catalog snapshot."""
+    today = today or date.today()
+    n = len(items)
+    deadline = np.full(n, np.nan, dtype=np.float64)
+    amount = np.full(n, np.nan, dtype=np.float32)
+    level = np.zeros(n, dtype=np.uint8)
+    province = np.zeros(n, dtype=np.uint32)
+    country = np.zeros(n, dtype=np.uint8)
+    vocab: Dict[str, int] = {}
+    rows: List[List[int]] = []
+
+    for i, s in enumerate(items):
+        d, a, lv, pv, ct, terms = _row_features(s, today)
+        deadline[i], amount[i], level[i], province[i], country[i] = d, a, lv, pv, ct
+        rows.append([vocab.setdefault(t, len(vocab)) for t in terms])
+
+    terms_m = np.zeros((n, max(1, len(vocab))), dtype=np.uint8)
+    for i, cols in enumerate(rows):
+        if cols:
+            terms_m[i, cols] = 1
+    term_norm = np.sqrt(np.maximum(terms_m.sum(axis=1), 1)).astype(np.float32)
+
+    known = ~np.isnan(amount)
+    amount_norm = np.full(n, UNKNOWN_AMOUNT, dtype=np.float32)
+    if known.any():
+        logs = np.log1p(amount[known])
+        amount_norm[known] = logs / max(float(logs.max()), 1e-6)
+
+    return CatalogFeatures(
+        version=version,
+        items=list(items),
+        deadline=deadline,
+        amount=amount,
+        amount_norm=amount_norm,
+        level=level,
+        province=province,
+        country=country,
+        terms=terms_m,
+        term_norm=term_norm,
+        vocab=vocab,
+        built_on=today,
+    )
+
+
+_features: Optional[CatalogFeatures] = None
+_features_lock = threading.Lock()
+
+
+def _current(feats: Optional[CatalogFeatures], version: int, today: date) -> bool:
+    return feats is not None and feats.version == version and feats.built_on == today
+
+
+def features_for(repo: Any) -> CatalogFeatures:
+    """
+    Features for the repo's current snapshot (rebuilt when its version
+    changes, and on a new day: year-less text deadlines move with it).
+    """
+    global _features
+    today = date.today()
+    feats = _features
+    if _current(feats, repo.version, today):
+        return feats
+    with _features_lock:
+        if not _current(_features, repo.version, today):
+            _features = build_features(repo.all(), version=repo.version, today=today)
+            logger.info(
+                "built ranking features",
+                extra={"scholarships": len(_features), "catalog_version": repo.version},
+            )
+        return _features
+
+
+# ---------------------------------------------------------------------------
+# Scoring
+# ---------------------------------------------------------------------------
+
+def _user_terms(profile: Dict[str, Any], vocab: Dict[str, int]) -> List[int]:
+    words: List[str] = []
+    for key in ("interests", "tags"):
+        val = profile.get(key) or []
+        words.extend(val if isinstance(val, list) else [val])
+    words.extend(str(profile.get(k) or "") for k in ("program", "degreeType"))
+    text = " ".join(str(w) for w in words).lower()
+
+    cols = [vocab[w.strip().lower()] for w in words if isinstance(w, str) and w.strip().lower() in vocab]
+    for name, rx in elig.PROGRAM_FIELD_RES.items():
+        if name in vocab and rx.search(text):
+            cols.append(vocab[name])
+    if "stem" in vocab and any(rx.search(text) for n, rx in elig.PROGRAM_FIELD_RES.items() if n in elig.STEM_FIELDS):
+        cols.append(vocab["stem"])
+    return sorted(set(cols))
+
+
+def _match_component(mask: np.ndarray, mine: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(component in [0, 1], mismatch flags) for a bitmask feature."""
+    open_ = mask == 0
+    if not mine:
+        comp = np.where(open_, OPEN_MATCH, UNKNOWN_PROFILE).astype(np.float32)
+        return comp, np.zeros(mask.shape, dtype=bool)
+    hit = (mask & mine) != 0
+    comp = np.where(hit, 1.0, np.where(open_, OPEN_MATCH, 0.0)).astype(np.float32)
+    return comp, ~(hit | open_)
+
+
+def rank(
+    feats: CatalogFeatures,
+    profile: Dict[str, Any],
+    limit: int = 20,
+    offset: int = 0,
+    include_expired: bool = False,
+    weights: Optional[Dict[str, float]] = None,
+    today: Optional[date] = None,
+) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Score every scholarship for `profile`.
+    Returns (number of candidates after filtering, ranked page of
+    {index, deadline_date, amount, score, components, flags}).
+    """
+    n = len(feats)
+    if n == 0:
+        return 0, []
+    w = {**DEFAULT_WEIGHTS, **(weights or {})}
+    today_ord = float((today or date.today()).toordinal())
+
+    # deadline proximity (expired rows are dropped below)
+    days = feats.deadline - today_ord
+    known = ~np.isnan(days)
+    deadline_c = np.full(n, UNKNOWN_DEADLINE, dtype=np.float32)
+    deadline_c[known] = np.where(days[known] >= 0, np.exp2(-days[known] / DEADLINE_HALF_LIFE), 0.0)
+
+    # interest overlap: cosine between binary term vectors
+    cols = _user_terms(profile, feats.vocab)
+    if cols:
+        hits = feats.terms[:, cols].sum(axis=1, dtype=np.float32)
+        interests_c = hits / (feats.term_norm * np.float32(math.sqrt(len(cols))))
+    else:
+        interests_c = np.zeros(n, dtype=np.float32)
+
+    level_c, level_miss = _match_component(feats.level, _LEVEL_BITS.get(elig.profile_level(profile) or "", 0))
+    prov = elig.profile_province(profile)
+    province_c, province_miss = _match_component(feats.province, _PROVINCE_BITS.get(prov or "", 0))
+    country_name = str(profile.get("country") or "").strip().lower()
+    my_country = 1 if country_name in ("canada", "ca", "can") else 2 if country_name in ("united states", "usa", "us") else 0
+    country_c, country_miss = _match_component(feats.country, my_country)
+    # a province restriction is more specific than a country one
+    location_c = np.where(feats.province != 0, province_c, country_c)
+
+    score = (
+        w["deadline"] * deadline_c
+        + w["amount"] * feats.amount_norm
+        + w["interests"] * interests_c
+        + w["level"] * level_c
+        + w["location"] * location_c
+    )
+    mismatch = level_miss | province_miss | country_miss
+    score = np.where(mismatch, score * MISMATCH_FACTOR, score)
+
+    keep = np.ones(n, dtype=bool) if include_expired else ~(known & (days < 0))
+    idx = np.flatnonzero(keep)
+    total = int(idx.size)
+    if total == 0:
+        return 0, []
+
+    # top (offset + limit) without sorting the whole catalog. Everything tied
+    # with the k-th score is kept, so the (score, index) order below and
+    # therefore every page is the same whatever k is.
+    k = min(total, offset + limit)
+    sub = score[idx]
+    if k < total:
+        kth = sub[np.argpartition(-sub, k - 1)[k - 1]]
+        part = np.flatnonzero(sub >= kth)
+    else:
+        part = np.arange(total)
+    top = idx[part[np.lexsort((part, -sub[part]))]][offset:k]
+
+    out: List[Dict[str, Any]] = []
+    for i in top.tolist():
+        flags = []
+        if level_miss[i]:
+            flags.append("level_mismatch")
+        if province_miss[i] or country_miss[i]:
+            flags.append("location_mismatch")
+        if known[i] and days[i] < 0:
+            flags.append("expired")
+        out.append(
+            {
+                "index": i,
+                "deadline_date": date.fromordinal(int(feats.deadline[i])).isoformat() if known[i] else None,
+                "amount": None if math.isnan(feats.amount[i]) else float(feats.amount[i]),
+                "score": round(float(score[i]), 4),
+                "components": {
+                    "deadline": round(float(deadline_c[i]), 3),
+                    "amount": round(float(feats.amount_norm[i]), 3),
+                    "interests": round(float(interests_c[i]), 3),
+                    "level": round(float(level_c[i]), 3),
+                    "location": round(float(location_c[i]), 3),
+                },
+                "flags": flags,
+            }
+        )
+    return total, out
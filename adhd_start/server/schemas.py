@@ -4,11 +4,19 @@ Pydantic schemas for ADHD Copilot backend.
 
 This file defines the structured payloads used by:
 - /parse          (ParseIn, ParseOut)
+- /parse/batch    (ParseBatchIn, ParseBatchOut)
 - /plan           (PlanIn, PlanOut)
 - /workflow       (WorkflowIn, WorkflowOut, WorkflowSummary)
-- /bookmark*      (BookmarkIn, BookmarkStatusIn, BookmarkOut)
-- /eligibility    (EligibilityIn, EligibilityOut)
+- /workflow/jobs  (WorkflowJobOut)
+- /bookmark*      (BookmarkIn, BookmarkStatusIn, BookmarkOut, BookmarkPage)
+- /eligibility    (EligibilityIn, EligibilityOut,
+                   EligibilityCatalogIn, EligibilityCatalogOut)
+- /scholarships/rank (RankIn, RankOut)
+- /upcoming      (UpcomingOut)
 - /feedback       (FeedbackIn)
+
+plus the structured-output models Claude fills in via tool calls
+(ParseFields, PlanOut, WorkflowDraft, EligibilityVerdicts).
 """
 
 from typing import List, Optional, Literal, Dict, Any
@@ -32,6 +40,56 @@ class ParseOut(BaseModel):
     confidence: Optional[float] = None
     # simple { "source": str, "snippet": str } items
     sources: List[Dict[str, Any]] = Field(default_factory=list)
+    # which tier answered: "local" (rules only) or "llm" (RAG + Claude)
+    tier: Optional[str] = None
+    # per-field confidence from the local extractor, when it answered
+    field_confidence: Dict[str, float] = Field(default_factory=dict)
+    # why the page looks "coach_only": { pattern, source, start, end, match, snippet }
+    ai_policy_matches: List[Dict[str, Any]] = Field(default_factory=list)
+
+
+class ParseBatchItem(BaseModel):
+    # caller's own id (e.g. scholarship id), echoed back
+    id: Optional[str] = None
+    text: str
+
+
+class ParseBatchIn(BaseModel):
+    user_id: str = "demo-user"
+    items: List[ParseBatchItem]
+
+
+class ParseBatchResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    ok: bool
+    result: Optional[ParseOut] = None
+    error: Optional[str] = None
+    # index of the identical page this result was copied from
+    duplicate_of: Optional[int] = None
+
+
+class ParseBatchOut(BaseModel):
+    results: List[ParseBatchResult]
+    unique: int
+    failed: int
+    took_ms: float
+
+
+class ParseFields(BaseModel):
+    """Fields Claude extracts for /parse (tool input schema)."""
+    deadline: Optional[str] = Field(
+        default=None, description="Application deadline as YYYY-MM-DD if possible; else null"
+    )
+    refs_required: Optional[int] = Field(
+        default=None, description="Number of reference letters required (0, 1, 2...), or null"
+    )
+    values: List[str] = Field(
+        default_factory=list, description='Values the funder looks for, e.g. ["creativity", "leadership"]'
+    )
+    ai_policy: Literal["ok", "coach_only"] = Field(
+        default="ok", description='"coach_only" if the page forbids AI-generated content'
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -79,6 +137,25 @@ class WorkflowSummary(BaseModel):
     tags: List[str] = []
 
 
+class WorkflowDraft(BaseModel):
+    """What Claude returns for /workflow (tool input schema)."""
+    title: str = Field(description="Short title of the opportunity")
+    one_liner: str = Field(
+        description="A warm, encouraging one-sentence summary of why this fits them"
+    )
+    deadline: Optional[str] = Field(default=None, description="YYYY-MM-DD or null")
+    key_points: List[str] = Field(
+        description="3 bullet points highlighting eligibility or values"
+    )
+    micro_tasks: List[str] = Field(
+        description=(
+            "3 tiny steps; Step 1 is the absolute smallest reading action "
+            "(e.g. find the eligibility section), then simple follow-ups"
+        )
+    )
+    tags: List[str] = Field(default_factory=list, description="Up to 3 short tags")
+
+
 class WorkflowOut(BaseModel):
     plan_id: str
     summary: WorkflowSummary
@@ -91,6 +168,17 @@ class WorkflowOut(BaseModel):
     ai_policy: Optional[str] = None
     sources: List[str] = []
 
+
+class WorkflowJobOut(BaseModel):
+    """Status of a background /workflow job (plan_id is the job id)."""
+    plan_id: str
+    status: Literal["queued", "running", "done", "failed"]
+    result: Optional[WorkflowOut] = None
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
 # ---------------------------------------------------------------------------
 # Bookmarks / saved scholarships
 # ---------------------------------------------------------------------------
@@ -123,6 +211,17 @@ class BookmarkOut(BaseModel):
     updated_at: str
 
 
+class BookmarkPage(BaseModel):
+    """One page of GET /bookmarks."""
+    items: List[BookmarkOut] = Field(default_factory=list)
+    # pass back as ?cursor= for the next page; None on the last page
+    next_cursor: Optional[str] = None
+    # bookmarks matching the filters (all pages)
+    total: int
+    # per status, over all of the user's bookmarks (filters ignored)
+    counts: Dict[str, int] = Field(default_factory=dict)
+
+
 # ---------------------------------------------------------------------------
 # Eligibility check
 # ---------------------------------------------------------------------------
@@ -137,12 +236,121 @@ class EligibilityIn(BaseModel):
     profile: Dict[str, Any]
     # scholarship page text (innerText)
     text: str
+    # escalate clauses the local rules could not read to Claude
+    use_llm: bool = False
 
 
 class EligibilityOut(BaseModel):
     eligible: bool
     reasons: List[str]
     missing_info: List[str] = Field(default_factory=list)
+    # one item per requirement: { category, clause, status, message, source }
+    requirements: List[Dict[str, Any]] = Field(default_factory=list)
+    # condition-like sentences no local rule understood
+    ambiguous: List[str] = Field(default_factory=list)
+    # "local" (rules only) or "llm" (ambiguous clauses checked by Claude)
+    tier: Optional[str] = None
+
+
+class EligibilityVerdict(BaseModel):
+    index: int = Field(description="Index of the clause in the list you were given")
+    status: Literal["met", "unmet", "unknown"] = Field(
+        description='"met"/"unmet" only if the profile clearly answers it, else "unknown"'
+    )
+    message: str = Field(description="One short sentence explaining the verdict to the student")
+
+
+class EligibilityVerdicts(BaseModel):
+    """What Claude returns for ambiguous eligibility clauses (tool input schema)."""
+    verdicts: List[EligibilityVerdict] = Field(default_factory=list)
+
+
+class EligibilityCatalogIn(BaseModel):
+    """Score one user against the whole scholarship catalog."""
+    user_id: str = "demo-user"
+    # profile from the extension; the stored server profile is used if omitted
+    profile: Optional[Dict[str, Any]] = None
+    eligible_only: bool = False
+    limit: int = Field(default=50, ge=1, le=500)
+    offset: int = Field(default=0, ge=0)
+
+
+class EligibilityMatch(BaseModel):
+    scholarship_id: str
+    title: str
+    source_url: str
+    deadline_date: Optional[str] = None
+    eligible: bool
+    # 0 if a requirement is unmet, else share of requirements confirmed
+    score: float
+    reasons: List[str] = Field(default_factory=list)
+    missing_info: List[str] = Field(default_factory=list)
+
+
+class EligibilityCatalogOut(BaseModel):
+    user_id: str
+    total: int
+    items: List[EligibilityMatch] = Field(default_factory=list)
+
+
+# ---------------------------------------------------------------------------
+# /scholarships/rank
+# ---------------------------------------------------------------------------
+
+class RankIn(BaseModel):
+    """Rank the whole scholarship catalog for one user."""
+    user_id: str = "demo-user"
+    # profile from the extension; the stored server profile is used if omitted
+    profile: Optional[Dict[str, Any]] = None
+    limit: int = Field(default=20, ge=1, le=500)
+    offset: int = Field(default=0, ge=0)
+    include_expired: bool = False
+    # override any of: deadline, amount, interests, level, location
+    weights: Optional[Dict[str, float]] = None
+
+
+class RankedScholarship(BaseModel):
+    scholarship_id: str
+    title: str
+    source_url: str
+    deadline_date: Optional[str] = None
+    amount: Optional[float] = None
+    score: float
+    # per-feature scores in [0, 1]: deadline, amount, interests, level, location
+    components: Dict[str, float] = Field(default_factory=dict)
+    # e.g. "level_mismatch", "location_mismatch", "expired"
+    flags: List[str] = Field(default_factory=list)
+
+
+class RankOut(BaseModel):
+    user_id: str
+    total: int
+    catalog_version: int
+    took_ms: float
+    items: List[RankedScholarship] = Field(default_factory=list)
+
+
+# ---------------------------------------------------------------------------
+# /upcoming
+# ---------------------------------------------------------------------------
+
+class UpcomingItem(BaseModel):
+    kind: Literal["bookmark", "scholarship"]
+    # bookmark id or scholarship id
+    id: str
+    title: Optional[str] = None
+    url: str
+    source_site: Optional[str] = None
+    deadline: str  # YYYY-MM-DD
+    days_left: int
+    # bookmarks only
+    status: Optional[str] = None
+
+
+class UpcomingOut(BaseModel):
+    user_id: str
+    today: str
+    items: List[UpcomingItem] = Field(default_factory=list)
 
 
 # ---------------------------------------------------------------------------
@@ -2,42 +2,89 @@
 
 from __future__ import annotations
 
+import os
+import threading
+from datetime import date
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, List, Optional, Sequence, Tuple
 
+from .catalog_snapshot import CatalogSnapshot, SnapshotError, materialize
+from .deadline_index import DeadlineIndex
+from .log import get_logger
 from .scholarship_models import Scholarship
 
+logger = get_logger("scholarship_repo")
+
 _BASE_DIR = Path(__file__).resolve().parent
 _DATA_PATH = _BASE_DIR / "store" / "scholarships.json"
+# Compiled catalog (server/catalog_snapshot.py), written at ingest time
+SNAPSHOT_PATH = _DATA_PATH.with_suffix(".snap")
+# auto: use the snapshot when it matches scholarships.json; off: always parse JSON
+CATALOG_SNAPSHOT = (os.getenv("CATALOG_SNAPSHOT") or "auto").lower()
 
 
 class ScholarshipRepo:
     """
     Simple in-memory repository backed by scholarships.json.
     For hackathon/demo use.
+
+    When an up-to-date snapshot exists the catalog is memory-mapped
+    instead: entries are lazy `ScholarshipRecord`s (same attributes as
+    Scholarship) and only the results returned by `list()` / `get()`
+    are materialized as Pydantic models.
     """
 
-    def __init__(self, data_path: Path = _DATA_PATH):
+    def __init__(self, data_path: Path = _DATA_PATH, snapshot_path: Optional[Path] = None):
         self._data_path = data_path
+        self._snapshot_path = snapshot_path or data_path.with_suffix(".snap")
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._scholarships = self._load()
+        # (entries it was built from, index); rebuilt after a reload
+        self._deadlines: Optional[Tuple[Sequence[Any], DeadlineIndex]] = None
+        self._deadlines_lock = threading.Lock()
+        # bumped on every reload, so derived data (e.g. ranking features)
+        # knows when its snapshot is stale
+        self.version = 1
+
+    def reload(self) -> None:
         self._scholarships = self._load()
+        self.version += 1
 
-    def _load(self) -> List[Scholarship]:
-        import json
+    def _open_snapshot(self) -> Optional[CatalogSnapshot]:
+        if CATALOG_SNAPSHOT == "off" or not self._snapshot_path.exists():
+            return None
+        try:
+            snap = CatalogSnapshot(self._snapshot_path)
+        except SnapshotError as e:
+            logger.warning("ignoring catalog snapshot: %s", e)
+            return None
+        if self._data_path.exists() and not snap.matches(self._data_path):
+            logger.info("catalog snapshot is stale, parsing %s", self._data_path.name)
+            snap.close()
+            return None
+        return snap
+
+    def _load(self) -> Sequence[Any]:
+        from .fastjson import loads
+
+        self._snapshot = self._open_snapshot()
+        if self._snapshot is not None:
+            return self._snapshot.records()
 
         if not self._data_path.exists():
             # No data yet – return empty list
             return []
 
         try:
-            text = self._data_path.read_text(encoding="utf-8").strip()
+            text = self._data_path.read_bytes().strip()
             if not text:
                 # Empty file – treat as no data
                 return []
 
-            raw = json.loads(text)
+            raw = loads(text)
         except Exception as e:
             # For safety in dev/hackathon: log and fall back to empty list
-            print(f"[scholarship_repo] Failed to load JSON from {self._data_path}: {e}")
+            logger.error("failed to load JSON from %s: %s", self._data_path, e)
             return []
 
         return [Scholarship.model_validate(item) for item in raw]
@@ -50,12 +97,21 @@ class ScholarshipRepo:
         level_of_study: Optional[str] = None,
         limit: int = 50,
         offset: int = 0,
+        due_after: Optional[date] = None,
+        due_before: Optional[date] = None,
     ) -> List[Scholarship]:
         """
         Basic in-memory filtering. This is enough for your hackathon demo.
+
+        due_after / due_before (inclusive) narrow the catalog through the
+        deadline index first; results then come soonest-deadline first.
         """
         items = self._scholarships
 
+        if due_after or due_before:
+            entries, index = self.deadline_index()
+            items = [entries[i] for _, i in index.range(due_after, due_before)]
+
         if source_site:
             items = [s for s in items if s.source_site.lower() == source_site.lower()]
 
@@ -76,9 +132,35 @@ class ScholarshipRepo:
                 or q_lower in (s.eligibility_summary or "").lower()
             ]
 
-        return items[offset : offset + limit]
+        return [materialize(s) for s in items[offset : offset + limit]]
+
+    def deadline_index(self) -> Tuple[Sequence[Any], DeadlineIndex]:
+        """(entries, index of their positions by deadline) for the current catalog."""
+        cached = self._deadlines
+        if cached is not None and cached[0] is self._scholarships:
+            return cached
+        with self._deadlines_lock:
+            entries = self._scholarships
+            if self._deadlines is None or self._deadlines[0] is not entries:
+                index = DeadlineIndex((i, s.deadline_date, i) for i, s in enumerate(entries))
+                self._deadlines = (entries, index)
+            return self._deadlines
+
+    def upcoming(
+        self, start: date, limit: int, until: Optional[date] = None
+    ) -> List[Tuple[date, Scholarship]]:
+        """The next `limit` scholarships due on/after `start` (and by `until`)."""
+        entries, index = self.deadline_index()
+        return [(d, materialize(entries[i])) for d, i in index.upcoming(start, limit, until=until)]
+
+    def all(self) -> Sequence[Any]:
+        """Every entry (Scholarship models, or lazy records when mmapped)."""
+        return list(self._scholarships)
 
     def get(self, scholarship_id: str) -> Optional[Scholarship]:
+        if self._snapshot is not None:
+            row = self._snapshot.find(scholarship_id)
+            return self._snapshot.model(row) if row is not None else None
         for s in self._scholarships:
             if s.id == scholarship_id:
                 return s
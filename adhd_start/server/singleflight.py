@@ -0,0 +1,99 @@
+# server/singleflight.py
+"""
+In-flight request coalescing ("single-flight").
+
+A double-clicked Scan, or the popup and overlay firing on the same page,
+send identical /parse or Firecrawl calls at the same moment. A `Group`
+runs only the first call for a given key; callers arriving while it is
+still running wait for it and get the same result (or the same
+exception). Nothing is cached: once the call returns, the next caller
+with that key runs it again.
+
+Routes are plain `def`s served from Starlette's thread pool, so this is
+thread-based. Followers get a deep copy of the result so one request
+mutating its dict cannot leak into another.
+
+Per-group counters are exposed via `singleflight_stats()` (in /health).
+"""
+
+import copy
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class Group:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._stats: Counter = Counter()
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Run fn(), or wait for the identical call already in flight."""
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._stats["executed"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = {k: self._stats.get(k, 0) for k in ("calls", "executed", "coalesced", "errors")}
+            out["in_flight"] = len(self._calls)
+        return out
+
+
+_GROUPS: Dict[str, Group] = {}
+_GROUPS_LOCK = threading.Lock()
+
+
+def group(name: str) -> Group:
+    """The process-wide group called `name` (created on first use)."""
+    with _GROUPS_LOCK:
+        if name not in _GROUPS:
+            _GROUPS[name] = Group(name)
+        return _GROUPS[name]
+
+
+def singleflight_stats() -> Dict[str, Dict[str, Any]]:
+    with _GROUPS_LOCK:
+        groups = list(_GROUPS.values())
+    return {g.name: g.stats() for g in groups}
@@ -0,0 +1,125 @@
+# server/text_budget.py
+"""
+Token-aware truncation for page text sent to Claude.
+
+Instead of chopping pages at a fixed character offset (which keeps the
+nav bar and intro and drops the deadline section at the bottom), pages
+are split into sections, each section is scored by how many
+deadline / eligibility / requirement cues it contains, and the best
+sections are kept in their original order until the token budget is
+spent.
+
+Token counts are estimated locally (~4 characters per token for English
+prose), which is close enough for budgeting and costs nothing.
+"""
+
+import re
+from typing import List, Sequence, Tuple
+
+CHARS_PER_TOKEN = 4
+
+# Words that mark the sections we care about most, with weights.
+DEFAULT_CUES: Sequence[Tuple[str, float]] = (
+    (r"deadline|due\s+(?:date|by|on)|closes?|closing\s+date|submit(?:ted)?\s+by", 3.0),
+    (r"eligib\w*|who\s+can\s+apply|criteria|must\s+be", 2.5),
+    (r"requirement\w*|required|documents?|transcript", 2.0),
+    (r"referen\w*|referee|letters?\s+of\s+(?:support|recommendation)", 2.0),
+    (r"generative\s+ai|\bai\b|chatgpt|plagiari\w*|own\s+work", 2.0),
+    (r"essay|statement|values?|leadership|community", 1.0),
+    (r"amount|\$\s?\d|value\s+of|award(?:ed)?", 1.0),
+    (r"apply|application", 0.5),
+)
+
+_CUE_RES = [(re.compile(p, re.I), w) for p, w in DEFAULT_CUES]
+_SECTION_SPLIT = re.compile(r"\n\s*\n|\n(?=#{1,6}\s)")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+GAP_MARKER = "\n[…]\n"
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text or "") + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _score(section: str) -> float:
+    score = 0.0
+    for rx, weight in _CUE_RES:
+        hits = len(rx.findall(section))
+        if hits:
+            # diminishing returns so one keyword-stuffed block can't win alone
+            score += weight * (1.0 + 0.25 * min(hits - 1, 4))
+    # headings that announce a relevant section get an extra nudge
+    first_line = section.lstrip().split("\n", 1)[0]
+    if first_line.startswith("#") and score:
+        score += 1.0
+    return score
+
+
+def _trim_section(section: str, max_tokens: int) -> str:
+    """Keep whole sentences from the start of a section up to max_tokens."""
+    out: List[str] = []
+    used = 0
+    for sent in _SENTENCE_SPLIT.split(section):
+        cost = estimate_tokens(sent) + 1
+        if used + cost > max_tokens:
+            break
+        out.append(sent)
+        used += cost
+    if not out:
+        return section[: max_tokens * CHARS_PER_TOKEN]
+    return " ".join(out)
+
+
+def fit_to_budget(text: str, max_tokens: int) -> str:
+    """
+    Return `text` unchanged if it fits in `max_tokens`, otherwise the most
+    relevant sections (in original order) that fit, with gaps marked.
+    Sections without any cue still fill whatever budget is left, in page
+    order.
+    """
+    text = text or ""
+    if max_tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    sections = [s.strip() for s in _SECTION_SPLIT.split(text) if s and s.strip()]
+    if not sections:
+        return text[: max_tokens * CHARS_PER_TOKEN]
+
+    # The opening section usually carries the title; keep it cheap but likely.
+    # Equal scores (notably all the zero ones) keep page order.
+    scored = []
+    for i, sec in enumerate(sections):
+        bonus = 0.75 if i == 0 else 0.0
+        scored.append((_score(sec) + bonus, i))
+    scored.sort(key=lambda x: (-x[0], x[1]))
+
+    chosen = {}
+    used = 0
+    for score, i in scored:
+        remaining = max_tokens - used
+        if remaining <= 8:
+            break
+        sec = sections[i]
+        cost = estimate_tokens(sec) + 2
+        if cost > remaining:
+            sec = _trim_section(sec, remaining - 2)
+            cost = estimate_tokens(sec) + 2
+            if not sec or cost > remaining:
+                continue
+        chosen[i] = sec
+        used += cost
+
+    if not chosen:
+        return text[: max_tokens * CHARS_PER_TOKEN]
+
+    parts: List[str] = []
+    prev = -1
+    for i in sorted(chosen):
+        if parts and i != prev + 1:
+            parts.append(GAP_MARKER)
+        elif parts:
+            parts.append("\n\n")
+        parts.append(chosen[i])
+        prev = i
+    return "".join(parts)
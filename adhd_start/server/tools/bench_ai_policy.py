@@ -0,0 +1,99 @@
+# server/tools/bench_ai_policy.py
+"""
+Benchmark the AI-policy detector on large pages.
+
+Compares the previous implementation (lowercase + concatenate page and
+context, then one re.search per pattern), a single combined
+case-insensitive alternation, and the precompiled matcher in
+server/ai_policy.py, on ~1 MB pages where the forbid phrase is absent
+(worst case: every pattern scans everything) and where it sits at the
+very end.
+
+Run from adhd_start/:
+    python -m server.tools.bench_ai_policy
+    python -m server.tools.bench_ai_policy --size-mb 4 --repeat 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from server.ai_policy import DEFAULT_PATTERNS, AIPolicyMatcher
+
+SAMPLE_DIR = Path(__file__).resolve().parents[1] / "store" / "sample_pages"
+
+
+def legacy_detect(text: str, extra_context: str = "") -> str:
+    hay = (text + "\n" + extra_context).lower()
+    return "coach_only" if any(re.search(p, hay) for p in DEFAULT_PATTERNS) else "ok"
+
+
+def _combined(patterns: List[str]) -> "re.Pattern[str]":
+    return re.compile("|".join(f"(?:{p})" for p in patterns), re.I)
+
+
+def _page(size_bytes: int, tail: str = "") -> str:
+    filler = (
+        "Applicants should describe their community involvement and leadership. "
+        "Awards are paid to the institution in two instalments each term.\n"
+    )
+    for path in sorted(SAMPLE_DIR.glob("sample_*job*.txt")):
+        filler += path.read_text(encoding="utf-8") + "\n"
+    reps = size_bytes // len(filler) + 1
+    return (filler * reps)[:size_bytes] + tail
+
+
+def _time(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    runs: List[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    return {
+        "min_ms": round(min(runs) * 1000, 2),
+        "median_ms": round(statistics.median(runs) * 1000, 2),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--size-mb", type=float, default=1.0)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--json", dest="json_out", default=None)
+    args = ap.parse_args()
+
+    size = int(args.size_mb * 1024 * 1024)
+    matcher = AIPolicyMatcher(DEFAULT_PATTERNS)
+    combined = _combined(DEFAULT_PATTERNS)
+    context = _page(4000)
+    cases = {
+        "no_match": _page(size),
+        "match_at_end": _page(size, "\nGenerative AI is not permitted in any part of this application."),
+    }
+
+    results: Dict[str, Any] = {"size_bytes": size, "patterns": len(DEFAULT_PATTERNS)}
+    for name, page in cases.items():
+        assert legacy_detect(page, context) == matcher.detect(page, context)
+        results[name] = {
+            "legacy": _time(lambda: legacy_detect(page, context), args.repeat),
+            "single_alternation": _time(
+                lambda: combined.search(page) or combined.search(context), args.repeat
+            ),
+            "compiled_detect": _time(lambda: matcher.detect(page, context), args.repeat),
+            "compiled_find": _time(lambda: matcher.find(page, context), args.repeat),
+        }
+
+    print(json.dumps(results, indent=2))
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# server/tools/bench_deadlines.py
+"""
+Benchmark the deadline engine (server/deadlines.py) against dateutil.
+
+Corpus: the sample pages in store/sample_pages plus the scraped
+descriptions in store/scholarships.json.
+
+Two measurements:
+  - normalize: every date-like string found in the corpus, plus a few
+    LLM-style answers ("Oct 31, 2025 at 11:59 PM ET"), parsed with
+    dateutil fuzzy parsing vs normalize_date (cold cache and warm cache).
+    Reports how often the two agree.
+  - extract: whole-page deadline extraction. The baseline fuzzy-parses
+    every line that mentions a deadline cue (roughly what the LLM output
+    + dateutil path did per page); the engine runs best_deadline.
+
+Run from adhd_start/:
+    python -m server.tools.bench_deadlines
+    python -m server.tools.bench_deadlines --repeat 20 --json out.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import statistics
+import time
+import warnings
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from dateutil import parser as dateparser
+
+from server import deadlines
+
+STORE = Path(__file__).resolve().parents[1] / "store"
+LLM_STYLE = [
+    "October 31, 2025",
+    "Oct 31, 2025 at 11:59 PM ET",
+    "2025-10-31",
+    "31 October 2025",
+    "10/31/2025",
+    "Friday, October 31st, 2025",
+    "Deadline: Nov. 15, 2025 (23:59 PT)",
+]
+_CUE_LINE = re.compile(r"deadline|due|closes?", re.I)
+
+
+def load_corpus() -> List[str]:
+    pages = [p.read_text(encoding="utf-8") for p in sorted((STORE / "sample_pages").glob("*.txt"))]
+    try:
+        rows = json.loads((STORE / "scholarships.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        rows = []
+    for row in rows:
+        text = "\n".join(
+            str(row.get(k) or "") for k in ("title", "description_short", "eligibility_summary")
+        )
+        if text.strip():
+            pages.append(text)
+    return pages
+
+
+def dateutil_normalize(s: str) -> Optional[str]:
+    try:
+        return dateparser.parse(s, fuzzy=True).strftime("%Y-%m-%d")
+    except Exception:
+        return None
+
+
+def dateutil_extract(text: str) -> Optional[str]:
+    for line in text.splitlines():
+        if _CUE_LINE.search(line) and re.search(r"\d", line):
+            got = dateutil_normalize(line)
+            if got:
+                return got
+    return None
+
+
+def engine_extract(text: str) -> Optional[str]:
+    cand, _confidence = deadlines.best_deadline(text)
+    return cand.iso if cand else None
+
+
+def _time(fn: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> Dict[str, float]:
+    runs: List[float] = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    return {
+        "min_ms": round(min(runs) * 1000, 3),
+        "median_ms": round(statistics.median(runs) * 1000, 3),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--repeat", type=int, default=10)
+    ap.add_argument("--json", dest="json_out", default=None)
+    args = ap.parse_args()
+    # dateutil warns on every "ET"/"PT" it can't resolve
+    warnings.simplefilter("ignore")
+
+    pages = load_corpus()
+    strings = [m.group(0) for text in pages for m in deadlines.DATE_RE.finditer(text)] + LLM_STYLE
+
+    agree = sum(deadlines.normalize_date(s) == dateutil_normalize(s) for s in strings)
+    normalize = {
+        "strings": len(strings),
+        "unique": len(set(strings)),
+        "agreement": round(agree / max(1, len(strings)), 3),
+        "dateutil": _time(lambda: [dateutil_normalize(s) for s in strings], args.repeat),
+        "engine_cold": _time(
+            lambda: [deadlines.normalize_date(s) for s in strings],
+            args.repeat,
+            setup=deadlines._normalize_date.cache_clear,
+        ),
+        "engine_warm": _time(lambda: [deadlines.normalize_date(s) for s in strings], args.repeat),
+    }
+
+    base = [dateutil_extract(t) for t in pages]
+    ours = [engine_extract(t) for t in pages]
+    extract = {
+        "pages": len(pages),
+        "chars": sum(len(t) for t in pages),
+        "found_dateutil": sum(1 for d in base if d),
+        "found_engine": sum(1 for d in ours if d),
+        "agreement_when_both_found": round(
+            sum(1 for a, b in zip(base, ours) if a and b and a == b)
+            / max(1, sum(1 for a, b in zip(base, ours) if a and b)),
+            3,
+        ),
+        "dateutil": _time(lambda: [dateutil_extract(t) for t in pages], args.repeat),
+        "engine": _time(lambda: [engine_extract(t) for t in pages], args.repeat),
+    }
+
+    results = {"normalize": normalize, "extract": extract}
+    print(json.dumps(results, indent=2))
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# server/tools/bench_embeddings.py
+"""
+Throughput benchmark for the embedding service.
+
+Compares the plain (unbatched) model against BatchingEmbeddings at
+several concurrency levels: N threads each embed a stream of query-sized
+texts, and we report embeds/sec and mean latency per call.
+
+Run from adhd_start/:
+    python -m server.tools.bench_embeddings
+    python -m server.tools.bench_embeddings --backend onnx --levels 1,8,32
+    python -m server.tools.bench_embeddings --fake   # no model download
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from typing import Any, Dict, List
+
+from server.rag.embedding_service import BatchingEmbeddings, load_base_embeddings
+
+
+class _FakeEmbeddings:
+    """
+    Model stand-in: fixed cost per call + small cost per text, serialised
+    through a lock like a single saturated CPU/accelerator would be.
+    """
+
+    def __init__(self, call_ms: float = 8.0, per_text_ms: float = 0.5):
+        self.call_s = call_ms / 1000.0
+        self.per_text_s = per_text_ms / 1000.0
+        self._device = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._device:
+            time.sleep(self.call_s + self.per_text_s * len(texts))
+        return [[float(len(t))] * 8 for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def _texts(n: int, thread_no: int) -> List[str]:
+    # Unique per thread so the batcher's de-duplication doesn't flatter it.
+    base = (
+        "Scholarship application deadline is {i} March. Two reference letters "
+        "are required. Applicants must be enrolled full-time (stream {t})."
+    )
+    return [base.format(i=i, t=thread_no) for i in range(n)]
+
+
+def _run_level(emb: Any, concurrency: int, per_thread: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def worker(thread_no: int) -> None:
+        local: List[float] = []
+        for t in _texts(per_thread, thread_no):
+            t0 = time.perf_counter()
+            emb.embed_query(t)
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    t0 = time.perf_counter()
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    wall = time.perf_counter() - t0
+
+    return {
+        "concurrency": concurrency,
+        "embeds": len(latencies),
+        "embeds_per_s": round(len(latencies) / wall, 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--levels", default="1,2,4,8,16,32")
+    ap.add_argument("--per-thread", type=int, default=32)
+    ap.add_argument("--backend", default=None, help="torch | onnx")
+    ap.add_argument("--max-batch", type=int, default=32)
+    ap.add_argument("--max-wait-ms", type=float, default=5.0)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--fake", action="store_true", help="use a sleep-based model stand-in")
+    ap.add_argument("--json", dest="json_out", default=None, help="write results to this file")
+    args = ap.parse_args()
+
+    base = _FakeEmbeddings() if args.fake else load_base_embeddings(args.backend)
+    batched = BatchingEmbeddings(
+        base,
+        max_batch_size=args.max_batch,
+        max_wait_ms=args.max_wait_ms,
+        workers=args.workers,
+    )
+    # Warm up model weights / threads before timing
+    base.embed_query("warmup")
+    batched.embed_query("warmup")
+
+    results: List[Dict[str, Any]] = []
+    levels = [int(x) for x in args.levels.split(",") if x.strip()]
+    print(f"{'mode':<9}{'conc':>6}{'embeds/s':>12}{'mean ms':>10}")
+    for level in levels:
+        for mode, emb in (("direct", base), ("batched", batched)):
+            r = _run_level(emb, level, args.per_thread)
+            r["mode"] = mode
+            results.append(r)
+            print(f"{mode:<9}{level:>6}{r['embeds_per_s']:>12}{r['mean_ms']:>10}")
+
+    print("[bench_embeddings] batching stats:", batched.stats())
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+# server/tools/bench_json.py
+"""
+JSON encode/decode cost on real payloads.
+
+Builds the responses the API actually sends (the scholarship catalog,
+/scholarships/rank, /eligibility/catalog, a /bookmarks page for a user
+with --bookmarks saved items) and a stored user profile, then times each
+encoder and decoder on them and reports the encoded size:
+
+  json indent      stdlib, indent=2 (the old on-disk format)
+  json compact     stdlib, compact separators
+  orjson           if installed
+  msgspec          if installed
+  fastapi          what a route returning a model used to cost:
+                   serialize_response (dump + re-validate against
+                   response_model + jsonable_encoder) + JSONResponse
+  fastapi+fast     the same with FastJSONResponse (the app's default now)
+  typed_response   server.fastjson.typed_response: one pydantic-core
+                   serialization straight to bytes
+
+Decoders: stdlib json.loads, orjson, msgspec, and pydantic
+model_validate_json for the model payloads.
+
+Run from adhd_start/:
+    python -m server.tools.bench_json
+    python -m server.tools.bench_json --bookmarks 500 --json json_bench.json
+"""
+
+from __future__ import annotations
+
+import os
+
+os.environ["ANTHROPIC_API_KEY"] = ""
+os.environ["CACHE_BACKEND"] = "none"
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import serialize_response
+from pydantic import TypeAdapter
+from starlette.responses import JSONResponse
+
+from server import fastjson, user_repo
+
+try:  # optional
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+try:  # optional
+    import msgspec  # type: ignore
+except ImportError:  # pragma: no cover
+    msgspec = None  # type: ignore
+
+
+def _time(fn: Callable[[], Any], rounds: int, min_round_s: float) -> float:
+    """Median microseconds per call."""
+    fn()
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - t0 >= min_round_s or number >= 10**5:
+            break
+        number *= 2 if number < 10 else 5
+    per_call = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        per_call.append((time.perf_counter() - t0) / number * 1e6)
+    return statistics.median(per_call)
+
+
+def _run_serialize(field: Any, content: Any) -> Any:
+    # is_coroutine=True keeps it inline (no threadpool); nothing in it awaits
+    coro = serialize_response(field=field, response_content=content, is_coroutine=True)
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("serialize_response suspended")
+
+
+# -------------------------------------------------------------------
+# Payloads
+# -------------------------------------------------------------------
+
+def _payloads(n_bookmarks: int) -> List[Tuple[str, Any, Any, Any]]:
+    """(name, content, route, what the route returned before typed_response)."""
+    from server import app as api
+    from server.schemas import EligibilityCatalogIn, RankIn
+
+    user_id = "bench-json"
+    for i in range(n_bookmarks):
+        user_repo.upsert_bookmark(
+            user_id=user_id,
+            url=f"https://example.org/scholarships/{i}",
+            title=f"Example Scholarship {i}",
+            source_site="example.org",
+            deadline=f"2027-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            tags=["stem", "bench"],
+        )
+
+    # With revalidation on, the routes hand back their models unserialized
+    fastjson.RESPONSE_REVALIDATE = True
+    try:
+        out: List[Tuple[str, Any, Any]] = [
+            ("catalog", api.scholarships(q=""), "/scholarships"),
+            ("rank", api.scholarships_rank(RankIn(user_id=user_id, limit=50)), "/scholarships/rank"),
+            ("eligibility_catalog",
+             api.eligibility_catalog(EligibilityCatalogIn(user_id=user_id, limit=50)), "/eligibility/catalog"),
+            (f"bookmarks[{min(n_bookmarks, api.BOOKMARKS_PAGE_MAX)}]",
+             api.bookmarks(user_id=user_id, limit=n_bookmarks), "/bookmarks"),
+        ]
+    finally:
+        fastjson.RESPONSE_REVALIDATE = False
+    routes = {getattr(r, "path", None): r for r in api.app.routes}
+    payloads = []
+    for name, content, path in out:
+        # /scholarships used to return plain dicts (response_model List[Dict])
+        legacy = [m.model_dump() for m in content] if path == "/scholarships" else content
+        payloads.append((name, content, routes[path], legacy))
+    payloads.append(("user_profile", user_repo.get_user(user_id), None, None))
+    return payloads
+
+
+# -------------------------------------------------------------------
+# Bench
+# -------------------------------------------------------------------
+
+def bench(n_bookmarks: int, rounds: int, min_round_s: float) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    for name, content, route, legacy in _payloads(n_bookmarks):
+        is_models = route is not None
+        plain = jsonable_encoder(content)
+
+        encoders: Dict[str, Callable[[], bytes]] = {
+            "json indent": lambda: json.dumps(plain, ensure_ascii=False, indent=2).encode("utf-8"),
+            "json compact": lambda: json.dumps(plain, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+        }
+        if orjson is not None:
+            encoders["orjson"] = lambda: orjson.dumps(plain)
+        if msgspec is not None:
+            encoders["msgspec"] = lambda: msgspec.json.encode(plain)
+        if is_models:
+            # the field FastAPI validates a route's return value against
+            field = route.secure_cloned_response_field
+            encoders["fastapi"] = lambda: JSONResponse(_run_serialize(field, legacy)).body
+            encoders["fastapi+fast"] = lambda: fastjson.FastJSONResponse(_run_serialize(field, legacy)).body
+            if isinstance(content, list):
+                encoders["typed_response"] = lambda: fastjson.typed_list_response(content).body
+            else:
+                encoders["typed_response"] = lambda: fastjson.typed_response(content).body
+
+        compact = encoders["json compact"]()
+        decoders: Dict[str, Callable[[], Any]] = {"json.loads": lambda: json.loads(compact)}
+        if orjson is not None:
+            decoders["orjson"] = lambda: orjson.loads(compact)
+        if msgspec is not None:
+            decoders["msgspec"] = lambda: msgspec.json.decode(compact)
+        if is_models:
+            adapter = TypeAdapter(route.response_model)
+            decoders["pydantic"] = lambda: adapter.validate_json(compact)
+
+        for enc_name, enc in encoders.items():
+            body = enc()
+            if json.loads(body) != plain:
+                raise SystemExit(f"{name}/{enc_name}: output differs from jsonable_encoder")
+            rows.append({
+                "payload": name, "op": "encode", "impl": enc_name,
+                "bytes": len(body), "us": round(_time(enc, rounds, min_round_s), 2),
+            })
+        for dec_name, dec in decoders.items():
+            rows.append({
+                "payload": name, "op": "decode", "impl": dec_name,
+                "bytes": len(compact), "us": round(_time(dec, rounds, min_round_s), 2),
+            })
+    return rows
+
+
+def print_report(rows: List[Dict[str, Any]]) -> None:
+    print(f"{'payload':<22}{'op':<8}{'impl':<16}{'bytes':>10}{'us/call':>12}{'vs json':>9}")
+    base: Dict[Tuple[str, str], float] = {}
+    for r in rows:
+        key = (r["payload"], r["op"])
+        if r["impl"] in ("json compact", "json.loads"):
+            base[key] = r["us"]
+    for r in rows:
+        ref: Optional[float] = base.get((r["payload"], r["op"]))
+        ratio = f"{ref / r['us']:.1f}x" if ref and r["us"] else ""
+        print(f"{r['payload']:<22}{r['op']:<8}{r['impl']:<16}{r['bytes']:>10}{r['us']:>12.2f}{ratio:>9}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--bookmarks", type=int, default=200)
+    ap.add_argument("--rounds", type=int, default=5)
+    ap.add_argument("--min-round-s", type=float, default=0.1)
+    ap.add_argument("--json", type=Path, default=None)
+    args = ap.parse_args()
+
+    scratch = tempfile.TemporaryDirectory(prefix="bench-json-")
+    user_repo.USER_DIR = Path(scratch.name)
+    try:
+        rows = bench(args.bookmarks, args.rounds, args.min_round_s)
+    finally:
+        scratch.cleanup()
+
+    print(f"JSON backend: {fastjson.BACKEND}; msgspec: {'yes' if msgspec else 'not installed'}")
+    print_report(rows)
+    if args.json:
+        args.json.write_text(json.dumps({"backend": fastjson.BACKEND, "rows": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# server/tools/bench_ranking.py
+"""
+Benchmark catalog ranking (server/ranking.py) on a large synthetic catalog.
+
+The real catalog is cloned up to N entries with randomised ids, amounts,
+deadlines, levels and tags, features are built once, then rank() is
+timed for a few different profiles. Also times the per-scholarship loop
+the same question would cost without precomputed features (the
+/eligibility/catalog path) on a sample, for comparison.
+
+Run from adhd_start/:
+    python -m server.tools.bench_ranking
+    python -m server.tools.bench_ranking --n 50000 --repeat 50 --json out.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List
+
+from server import eligibility as elig
+from server import ranking
+from server.scholarship_repo import scholarship_repo
+
+LEVELS = [None, "HS", "Undergrad", "Grad"]
+TAGS = ["STEM", "engineering", "women", "indigenous", "business", "arts", "ADHD", "disability", "technology"]
+PROFILES: List[Dict[str, Any]] = [
+    {"degreeType": "BASc", "program": "Industrial Engineering", "interests": ["AI/ML"], "country": "Canada", "province": "ON"},
+    {"degreeType": "High school", "interests": ["arts"], "country": "Canada", "province": "BC"},
+    {"degreeType": "PhD", "program": "Biology", "interests": ["STEM"], "country": "United States"},
+    {},
+]
+
+
+def synth_catalog(n: int, seed: int = 7) -> List[Any]:
+    rng = random.Random(seed)
+    base = scholarship_repo.all()
+    today = date.today()
+    out = []
+    for i in range(n):
+        s = base[i % len(base)]
+        out.append(
+            s.model_copy(
+                update={
+                    "id": f"{s.id}-{i}",
+                    "amount": rng.choice([None, 500.0, 1000.0, 2500.0, 5000.0, 10000.0, 40000.0]),
+                    "deadline_date": rng.choice([None, today + timedelta(days=rng.randint(-60, 300))]),
+                    "level_of_study": rng.choice(LEVELS),
+                    "tags": rng.sample(TAGS, rng.randint(0, 3)),
+                }
+            )
+        )
+    return out
+
+
+def _ms(runs: List[float]) -> Dict[str, float]:
+    runs = sorted(runs)
+    return {
+        "p50_ms": round(statistics.median(runs) * 1000, 3),
+        "p95_ms": round(runs[int(0.95 * (len(runs) - 1))] * 1000, 3),
+        "max_ms": round(runs[-1] * 1000, 3),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--n", type=int, default=50_000)
+    ap.add_argument("--repeat", type=int, default=30)
+    ap.add_argument("--limit", type=int, default=20)
+    ap.add_argument("--loop-sample", type=int, default=2000)
+    ap.add_argument("--json", dest="json_out", default=None)
+    args = ap.parse_args()
+
+    items = synth_catalog(args.n)
+
+    t0 = time.perf_counter()
+    feats = ranking.build_features(items, version=1)
+    build_s = time.perf_counter() - t0
+
+    runs: List[float] = []
+    for _ in range(args.repeat):
+        for profile in PROFILES:
+            t0 = time.perf_counter()
+            ranking.rank(feats, profile, limit=args.limit)
+            runs.append(time.perf_counter() - t0)
+
+    # Per-item loop on a sample, scaled up to N
+    sample = items[: args.loop_sample]
+    elig.score_catalog(sample, PROFILES[0])  # warm the extraction memo
+    t0 = time.perf_counter()
+    elig.score_catalog(sample, PROFILES[0])
+    loop_s = (time.perf_counter() - t0) * (args.n / max(1, len(sample)))
+
+    results = {
+        "n": args.n,
+        "vocab": len(feats.vocab),
+        "feature_bytes": int(
+            feats.deadline.nbytes + feats.amount.nbytes + feats.amount_norm.nbytes
+            + feats.level.nbytes + feats.province.nbytes + feats.country.nbytes
+            + feats.terms.nbytes + feats.term_norm.nbytes
+        ),
+        "build_s": round(build_s, 2),
+        "rank": _ms(runs),
+        "per_item_loop_estimate_ms": round(loop_s * 1000, 1),
+    }
+    print(json.dumps(results, indent=2))
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
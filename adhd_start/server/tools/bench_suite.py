@@ -0,0 +1,495 @@
+# server/tools/bench_suite.py
+"""
+Micro-benchmark suite for the server's hot paths.
+
+Every case is timed timeit-style (auto-ranged loop count, several rounds)
+and reported per call in microseconds. Runs offline: Claude and Firecrawl
+are replaced by in-process stand-ins that answer instantly, so the
+pipeline cases measure our own overhead (prompt building, validation,
+merging), not the network. User data goes to a scratch directory.
+
+Cases whose optional dependencies are missing (langchain splitters,
+chromadb, the embedding model, bs4/firecrawl for the ingest helpers) are
+reported as skipped rather than failing the run.
+
+Results are JSON so runs can be compared across commits:
+
+    python -m server.tools.bench_suite --json base.json
+    ... change code ...
+    python -m server.tools.bench_suite --json new.json --compare base.json
+
+--compare prints old/new medians and exits 1 if any case got slower than
+--threshold (default 25%).
+
+Run from adhd_start/:
+    python -m server.tools.bench_suite
+    python -m server.tools.bench_suite --filter deadlines --rounds 10
+    python -m server.tools.bench_suite --fake-embeddings
+"""
+
+from __future__ import annotations
+
+import os
+
+# Offline: no real API keys, and admission limits out of the way of a
+# tight loop (set before the server modules read them).
+os.environ["ANTHROPIC_API_KEY"] = ""
+os.environ["FIRECRAWL_API_KEY"] = ""
+for _knob in ("ANTHROPIC_RPM", "ANTHROPIC_USER_RPM", "FIRECRAWL_RPM", "FIRECRAWL_USER_RPM"):
+    os.environ[_knob] = "1e9"
+# Repeated calls must do the work every time, not hit the response cache
+os.environ["CACHE_BACKEND"] = "none"
+# The offline fallbacks log a warning per call; keep the report readable
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+import argparse
+import itertools
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from server import deadlines, eligibility, llm, user_repo
+from server.local_extract import extract_fields_local
+from server.scholarship_repo import scholarship_repo
+from server.text_budget import fit_to_budget
+
+STORE = Path(__file__).resolve().parents[1] / "store"
+
+# name -> (group, setup); setup() returns the callable to time, or raises
+# Skip when the case cannot run here.
+CASES: Dict[str, Tuple[str, Callable[[Any], Callable[[], Any]]]] = {}
+
+
+class Skip(Exception):
+    pass
+
+
+def case(name: str, group: str):
+    def register(setup: Callable[[Any], Callable[[], Any]]):
+        CASES[name] = (group, setup)
+        return setup
+
+    return register
+
+
+def _pages() -> List[str]:
+    return [p.read_text(encoding="utf-8") for p in sorted((STORE / "sample_pages").glob("*.txt"))]
+
+
+# -------------------------------------------------------------------
+# Offline stand-ins
+# -------------------------------------------------------------------
+
+_CANNED = {
+    "record_parse_fields": {
+        "deadline": "2025-10-31", "refs_required": 2, "values": ["leadership"], "ai_policy": "ok",
+    },
+    "record_micro_plan": {
+        "micro_start": "Open the eligibility section.", "step_type": "open_url",
+        "block_minutes": 20, "check_ins": ["T+5", "T+12"],
+        "reentry_script": "Pick up at the eligibility list.", "purpose": "Get started",
+        "deadline": None, "ai_policy": "ok",
+    },
+    "record_workflow": {
+        "title": "National Scholarship", "one_liner": "Read the eligibility list.",
+        "deadline": "October 31, 2025", "tags": ["scholarship"],
+        "key_points": ["Two references"], "micro_tasks": ["Read the first paragraph."],
+    },
+}
+
+
+class _StubMessages:
+    """Answers messages.create with a canned forced-tool call."""
+
+    def create(self, **kwargs: Any) -> Any:
+        from anthropic.types import ToolUseBlock
+
+        name = kwargs["tool_choice"]["name"]
+        block = ToolUseBlock(id="toolu_bench", name=name, input=_CANNED.get(name, {}), type="tool_use")
+        return SimpleNamespace(content=[block], usage=None)
+
+
+def _stub_scrape(url: str, **_kwargs: Any) -> Tuple[str, Dict[str, Any]]:
+    return _pages()[-1], {"sourceURL": url}
+
+
+def _with_stubs(fn: Callable[[], Any]) -> Callable[[], Any]:
+    """Run fn with the stand-in Claude client and Firecrawl scraper."""
+
+    def run() -> Any:
+        saved = (llm.client, llm.scrape_page_markdown)
+        llm.client = SimpleNamespace(messages=_StubMessages())
+        llm.scrape_page_markdown = _stub_scrape
+        try:
+            return fn()
+        finally:
+            llm.client, llm.scrape_page_markdown = saved
+
+    return run
+
+
+# -------------------------------------------------------------------
+# Cases
+# -------------------------------------------------------------------
+
+@case("scholarship_repo.list", "catalog")
+def _repo_list(args: Any) -> Callable[[], Any]:
+    return lambda: scholarship_repo.list(limit=50)
+
+
+@case("scholarship_repo.list_query", "catalog")
+def _repo_list_query(args: Any) -> Callable[[], Any]:
+    return lambda: scholarship_repo.list(q="engineering", level_of_study="Undergrad", limit=50)
+
+
+@case("scholarship_repo.load_json", "catalog")
+def _repo_load_json(args: Any) -> Callable[[], Any]:
+    from server import scholarship_repo as repo_mod
+
+    def run() -> Any:
+        saved, repo_mod.CATALOG_SNAPSHOT = repo_mod.CATALOG_SNAPSHOT, "off"
+        try:
+            return repo_mod.ScholarshipRepo()
+        finally:
+            repo_mod.CATALOG_SNAPSHOT = saved
+
+    return run
+
+
+@case("scholarship_repo.load_snapshot", "catalog")
+def _repo_load_snapshot(args: Any) -> Callable[[], Any]:
+    from server.catalog_snapshot import write_snapshot
+    from server.scholarship_repo import ScholarshipRepo, _DATA_PATH
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench-snap-"))
+    snap = tmp / "scholarships.snap"
+    write_snapshot(scholarship_repo.all(), snap, source=_DATA_PATH)
+    return lambda: ScholarshipRepo(_DATA_PATH, snapshot_path=snap)
+
+
+@case("eligibility.score_catalog", "catalog")
+def _score_catalog(args: Any) -> Callable[[], Any]:
+    items = scholarship_repo.all()
+    profile = {"degreeType": "BASc", "program": "Industrial Engineering", "country": "Canada", "province": "ON"}
+    return lambda: eligibility.score_catalog(items, profile)
+
+
+@case("ranking.rank", "catalog")
+def _rank(args: Any) -> Callable[[], Any]:
+    try:
+        from server import ranking
+    except ImportError as exc:
+        raise Skip(f"numpy missing: {exc}")
+    feats = ranking.build_features(scholarship_repo.all(), version=0)
+    profile = {"degreeType": "BASc", "program": "Industrial Engineering", "country": "Canada", "province": "ON"}
+    return lambda: ranking.rank(feats, profile, limit=20)
+
+
+@case("user_repo.get_user", "user_repo")
+def _get_user(args: Any) -> Callable[[], Any]:
+    user_repo.get_user("bench-user")
+    return lambda: user_repo.get_user("bench-user")
+
+
+@case("user_repo.upsert_bookmark", "user_repo")
+def _upsert_bookmark(args: Any) -> Callable[[], Any]:
+    counter = itertools.count()
+    # Bounded list: cycle over 50 URLs so the file stops growing
+    return lambda: user_repo.upsert_bookmark(
+        "bench-bookmarks", f"https://example.org/s/{next(counter) % 50}", title="Award", tags=["stem"]
+    )
+
+
+@case("user_repo.list_bookmarks", "user_repo")
+def _list_bookmarks(args: Any) -> Callable[[], Any]:
+    for i in range(50):
+        user_repo.upsert_bookmark("bench-list", f"https://example.org/s/{i}", title=f"Award {i}")
+    return lambda: user_repo.list_bookmarks("bench-list")
+
+
+@case("user_repo.set_bookmark_status", "user_repo")
+def _set_status(args: Any) -> Callable[[], Any]:
+    bm = user_repo.upsert_bookmark("bench-status", "https://example.org/s/status", title="Award")
+    statuses = itertools.cycle(["saved", "in_progress", "submitted"])
+    return lambda: user_repo.set_bookmark_status("bench-status", bm["id"], next(statuses))
+
+
+@case("llm.detect_ai_policy", "text")
+def _ai_policy(args: Any) -> Callable[[], Any]:
+    pages = _pages()
+    return lambda: [llm.detect_ai_policy(p) for p in pages]
+
+
+@case("llm.normalize_date_like.cold", "text")
+def _normalize_cold(args: Any) -> Callable[[], Any]:
+    strings = [m.group(0) for p in _pages() for m in deadlines.DATE_RE.finditer(p)]
+    strings += ["Oct 31, 2025 at 11:59 PM ET", "2025-10-31", "31 October 2025", "10/31/2025"]
+
+    def run() -> None:
+        deadlines._normalize_date.cache_clear()
+        for s in strings:
+            llm.normalize_date_like(s)
+
+    return run
+
+
+@case("llm.normalize_date_like.warm", "text")
+def _normalize_warm(args: Any) -> Callable[[], Any]:
+    strings = ["Oct 31, 2025 at 11:59 PM ET", "2025-10-31", "31 October 2025", "10/31/2025"]
+    return lambda: [llm.normalize_date_like(s) for s in strings]
+
+
+@case("llm._coerce_json_from_claude", "text")
+def _coerce(args: Any) -> Callable[[], Any]:
+    payload = json.dumps(_CANNED["record_workflow"])
+    samples = [
+        payload,
+        f"```json\n{payload}\n```",
+        f"Sure! Here is the workflow:\n{payload}\nLet me know if you need more.",
+    ]
+    return lambda: [llm._coerce_json_from_claude(s) for s in samples]
+
+
+@case("firecrawl_ingest.clean_markdown_snippet", "text")
+def _clean_markdown(args: Any) -> Callable[[], Any]:
+    try:
+        from server.tools.firecrawl_ingest import clean_markdown_snippet
+    except ImportError as exc:
+        raise Skip(f"ingest deps missing: {exc}")
+    pages = _pages()
+    return lambda: [clean_markdown_snippet(p) for p in pages]
+
+
+@case("text_budget.fit_to_budget", "text")
+def _fit_to_budget(args: Any) -> Callable[[], Any]:
+    pages = _pages()
+    return lambda: [fit_to_budget(p, llm.PARSE_PAGE_TOKENS) for p in pages]
+
+
+@case("splitter.recursive_character", "text")
+def _splitter(args: Any) -> Callable[[], Any]:
+    try:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+    except ImportError as exc:
+        raise Skip(f"langchain_text_splitters missing: {exc}")
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=180)
+    pages = _pages()
+    return lambda: [splitter.split_text(p) for p in pages]
+
+
+@case("deadlines.best_deadline", "extract")
+def _best_deadline(args: Any) -> Callable[[], Any]:
+    pages = _pages()
+    return lambda: [deadlines.best_deadline(p) for p in pages]
+
+
+@case("local_extract.extract_fields_local", "extract")
+def _local_extract(args: Any) -> Callable[[], Any]:
+    pages = _pages()
+    return lambda: [extract_fields_local(p) for p in pages]
+
+
+@case("eligibility.check_eligibility", "extract")
+def _check_eligibility(args: Any) -> Callable[[], Any]:
+    pages = _pages()
+    profile = {"degreeType": "BASc", "citizen": True, "country": "Canada", "province": "ON", "gpa": 3.6}
+
+    def run() -> None:
+        eligibility.extract_requirements.cache_clear()
+        for p in pages:
+            eligibility.check_eligibility(p, profile)
+
+    return run
+
+
+@case("pipeline.parse_llm_stub", "pipeline")
+def _parse_pipeline(args: Any) -> Callable[[], Any]:
+    pages = _pages()
+    counter = itertools.count()
+
+    def run() -> None:
+        saved = llm.PARSE_MODE
+        llm.PARSE_MODE = "llm"
+        try:
+            # unique text per call: defeat single-flight and the local memo
+            llm.extract_fields_rag_or_llm(f"{pages[0]}\n#{next(counter)}", "bench-user")
+        finally:
+            llm.PARSE_MODE = saved
+
+    return _with_stubs(run)
+
+
+@case("pipeline.plan_stub", "pipeline")
+def _plan_pipeline(args: Any) -> Callable[[], Any]:
+    page = _pages()[1]
+    return _with_stubs(lambda: llm.make_plan_with_llm("Apply to this scholarship", page, "bench-user"))
+
+
+@case("pipeline.workflow_stub", "pipeline")
+def _workflow_pipeline(args: Any) -> Callable[[], Any]:
+    return _with_stubs(
+        lambda: llm.make_workflow_with_llm("Apply", "", "bench-user", page_url="https://example.org/award")
+    )
+
+
+def _embeddings(args: Any) -> Any:
+    if args.fake_embeddings:
+        try:
+            from server.tools.bench_embeddings import _FakeEmbeddings
+        except ImportError as exc:
+            raise Skip(f"embedding service deps missing: {exc}")
+        return _FakeEmbeddings(call_ms=1.0, per_text_ms=0.1)
+    try:
+        from server.rag.embedding_service import load_base_embeddings
+
+        return load_base_embeddings()
+    except Exception as exc:
+        raise Skip(f"embedding model unavailable (try --fake-embeddings): {exc}")
+
+
+@case("embedding.embed_query", "rag")
+def _embed_query(args: Any) -> Callable[[], Any]:
+    emb = _embeddings(args)
+    text = "deadline reference referee values policy apply requirements scholarship job"
+    return lambda: emb.embed_query(text)
+
+
+@case("chroma.query", "rag")
+def _chroma_query(args: Any) -> Callable[[], Any]:
+    try:
+        import chromadb
+    except ImportError as exc:
+        raise Skip(f"chromadb missing: {exc}")
+    rng = random.Random(7)
+    dim = 384
+    col = chromadb.EphemeralClient().get_or_create_collection("bench")
+    n = 2000
+    col.add(
+        ids=[f"c{i}" for i in range(n)],
+        embeddings=[[rng.uniform(-1, 1) for _ in range(dim)] for _ in range(n)],
+        metadatas=[{"user_id": f"u{i % 50}"} for i in range(n)],
+        documents=[f"chunk {i}" for i in range(n)],
+    )
+    query = [rng.uniform(-1, 1) for _ in range(dim)]
+    return lambda: col.query(query_embeddings=[query], n_results=4, where={"user_id": "u7"})
+
+
+# -------------------------------------------------------------------
+# Runner
+# -------------------------------------------------------------------
+
+def _time_case(fn: Callable[[], Any], rounds: int, min_round_s: float) -> Dict[str, Any]:
+    fn()  # warm-up (imports, caches that a live server would have)
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - t0 >= min_round_s or number >= 10**6:
+            break
+        number *= 2 if number < 10 else 5
+    per_call: List[float] = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        per_call.append((time.perf_counter() - t0) / number * 1e6)
+    return {
+        "unit": "us",
+        "number": number,
+        "rounds": rounds,
+        "min": round(min(per_call), 3),
+        "median": round(statistics.median(per_call), 3),
+        "mean": round(statistics.fmean(per_call), 3),
+        "stdev": round(statistics.stdev(per_call), 3) if len(per_call) > 1 else 0.0,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        )
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any], threshold: float) -> List[str]:
+    """Print old vs new medians; return the names that regressed."""
+    regressed = []
+    print(f"\n{'case':45} {'old us':>12} {'new us':>12} {'ratio':>7}")
+    for name, res in new["results"].items():
+        base = old.get("results", {}).get(name)
+        if not base or "median" not in base or "median" not in res:
+            continue
+        ratio = res["median"] / base["median"] if base["median"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  <-- slower"
+            regressed.append(name)
+        elif ratio < 1 - threshold:
+            flag = "  faster"
+        print(f"{name:45} {base['median']:12.1f} {res['median']:12.1f} {ratio:7.2f}{flag}")
+    return regressed
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--filter", default=None, help="only cases whose name contains this")
+    ap.add_argument("--rounds", type=int, default=7)
+    ap.add_argument("--min-round-ms", type=float, default=50.0)
+    ap.add_argument("--fake-embeddings", action="store_true")
+    ap.add_argument("--json", dest="json_out", default=None)
+    ap.add_argument("--compare", default=None, help="baseline JSON from an earlier run")
+    ap.add_argument("--threshold", type=float, default=0.25)
+    args = ap.parse_args()
+
+    scratch = tempfile.TemporaryDirectory(prefix="bench-users-")
+    user_repo.USER_DIR = Path(scratch.name)
+
+    results: Dict[str, Any] = {}
+    for name, (group, setup) in CASES.items():
+        if args.filter and args.filter not in name:
+            continue
+        try:
+            fn = setup(args)
+            res = {"group": group, **_time_case(fn, args.rounds, args.min_round_ms / 1000)}
+            print(f"{name:45} {res['median']:12.1f} us  (±{res['stdev']:.1f}, n={res['number']})")
+        except Skip as exc:
+            res = {"group": group, "skipped": str(exc)}
+            print(f"{name:45} {'skipped':>12}     {exc}")
+        results[name] = res
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    scratch.cleanup()
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressed = compare(json.load(f), report, args.threshold)
+        if regressed:
+            print(f"\n{len(regressed)} case(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
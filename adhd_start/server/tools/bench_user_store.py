@@ -0,0 +1,169 @@
+# server/tools/bench_user_store.py
+"""
+Compare the old per-user Chroma layout with the consolidated store.
+
+Builds N synthetic users (random 384-d vectors, the MiniLM size) in both
+layouts under a scratch directory, then measures:
+  - disk usage of each layout
+  - cold query latency (open the DB + filtered query) for sampled users
+  - warm query latency (handle already open)
+
+Run from adhd_start/:
+    python -m server.tools.bench_user_store --users 10000
+    python -m server.tools.bench_user_store --users 500 --keep
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import chromadb
+
+DIM = 384
+
+
+def _vec(rng: random.Random) -> List[float]:
+    return [rng.uniform(-1.0, 1.0) for _ in range(DIM)]
+
+
+def _du(path: Path) -> int:
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for f in files:
+            try:
+                total += os.path.getsize(os.path.join(root, f))
+            except OSError:
+                pass
+    return total
+
+
+def _pct(xs: List[float], p: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p * len(xs)))]
+
+
+def _summary(lat: List[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": round(_pct(lat, 0.50) * 1000, 2),
+        "p95_ms": round(_pct(lat, 0.95) * 1000, 2),
+        "mean_ms": round(statistics.mean(lat) * 1000, 2),
+    }
+
+
+def build_per_user(root: Path, users: List[str], notes: int, rng: random.Random) -> None:
+    for uid in users:
+        client = chromadb.PersistentClient(path=str(root / uid))
+        col = client.get_or_create_collection("langchain")
+        col.add(
+            ids=[f"{uid}-{i}" for i in range(notes)],
+            embeddings=[_vec(rng) for _ in range(notes)],
+            documents=[f"note {i} for {uid}" for i in range(notes)],
+            metadatas=[{"user_id": uid, "tag": "note"} for _ in range(notes)],
+        )
+
+
+def build_consolidated(root: Path, users: List[str], notes: int, rng: random.Random) -> None:
+    client = chromadb.PersistentClient(path=str(root))
+    col = client.get_or_create_collection("user_notes")
+    ids: List[str] = []
+    embs: List[List[float]] = []
+    docs: List[str] = []
+    metas: List[Dict[str, Any]] = []
+    for uid in users:
+        for i in range(notes):
+            ids.append(f"{uid}:{uid}-{i}")
+            embs.append(_vec(rng))
+            docs.append(f"note {i} for {uid}")
+            metas.append({"user_id": uid, "tag": "note"})
+        if len(ids) >= 2000:
+            col.add(ids=ids, embeddings=embs, documents=docs, metadatas=metas)
+            ids, embs, docs, metas = [], [], [], []
+    if ids:
+        col.add(ids=ids, embeddings=embs, documents=docs, metadatas=metas)
+
+
+def query_per_user(root: Path, sample: List[str], rng: random.Random, cold: bool) -> List[float]:
+    lat: List[float] = []
+    handles: Dict[str, Any] = {}
+    for uid in sample:
+        q = _vec(rng)
+        t0 = time.perf_counter()
+        if cold or uid not in handles:
+            handles[uid] = chromadb.PersistentClient(path=str(root / uid)).get_collection("langchain")
+        handles[uid].query(query_embeddings=[q], n_results=4)
+        lat.append(time.perf_counter() - t0)
+        if cold:
+            handles.pop(uid, None)
+    return lat
+
+
+def query_consolidated(root: Path, sample: List[str], rng: random.Random, cold: bool) -> List[float]:
+    lat: List[float] = []
+    col = None
+    for uid in sample:
+        q = _vec(rng)
+        t0 = time.perf_counter()
+        if cold or col is None:
+            col = chromadb.PersistentClient(path=str(root)).get_collection("user_notes")
+        col.query(query_embeddings=[q], n_results=4, where={"user_id": uid})
+        lat.append(time.perf_counter() - t0)
+    return lat
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--users", type=int, default=10000)
+    ap.add_argument("--notes", type=int, default=5, help="chunks per user")
+    ap.add_argument("--sample", type=int, default=200, help="users queried per run")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--workdir", type=Path, default=None)
+    ap.add_argument("--keep", action="store_true", help="keep the scratch directory")
+    ap.add_argument("--json", dest="json_out", default=None)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    work = args.workdir or Path(tempfile.mkdtemp(prefix="bench_user_store_"))
+    per_user_root = work / "chroma_user"
+    consolidated_root = work / "chroma_users"
+    users = [f"user-{i:05d}" for i in range(args.users)]
+    sample = rng.sample(users, min(args.sample, len(users)))
+
+    results: Dict[str, Any] = {"users": args.users, "notes_per_user": args.notes}
+    try:
+        t0 = time.perf_counter()
+        build_per_user(per_user_root, users, args.notes, rng)
+        results["per_user_build_s"] = round(time.perf_counter() - t0, 1)
+        t0 = time.perf_counter()
+        build_consolidated(consolidated_root, users, args.notes, rng)
+        results["consolidated_build_s"] = round(time.perf_counter() - t0, 1)
+
+        results["per_user_disk_mb"] = round(_du(per_user_root) / 1e6, 1)
+        results["consolidated_disk_mb"] = round(_du(consolidated_root) / 1e6, 1)
+
+        for cold in (True, False):
+            label = "cold" if cold else "warm"
+            results[f"per_user_{label}"] = _summary(query_per_user(per_user_root, sample, rng, cold))
+            results[f"consolidated_{label}"] = _summary(
+                query_consolidated(consolidated_root, sample, rng, cold)
+            )
+    finally:
+        if not args.keep and args.workdir is None:
+            shutil.rmtree(work, ignore_errors=True)
+
+    print(json.dumps(results, indent=2))
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# server/tools/check_cassette.py
+"""
+Check that cassette replay stays deterministic when some calls miss.
+
+Records --recorded /parse extractions against an in-process Claude
+stand-in, then replays in a fresh cassette state: first --misses pages
+that were never recorded (each raises CassetteMiss -> heuristic
+fallback), then the recorded pages. Every recorded page must still be
+answered from the cassette, and the Anthropic breaker must stay closed:
+misses are not upstream failures.
+
+Run from adhd_start/:
+    python -m server.tools.check_cassette
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+
+os.environ["ANTHROPIC_API_KEY"] = ""
+os.environ["CACHE_BACKEND"] = "none"
+os.environ["PARSE_CACHE_TTL_S"] = "0"
+os.environ["CASSETTE_MODE"] = "replay"
+os.environ["CASSETTE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="cassette-check-"), "check.jsonl")
+for _knob in ("ANTHROPIC_RPM", "ANTHROPIC_USER_RPM"):
+    os.environ[_knob] = "1e9"
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+import argparse
+from types import SimpleNamespace
+from typing import Any
+
+from server import llm
+from server.breaker import BREAKERS, BREAKER_FAILURES
+from server.cassette import cassette
+
+RECORDED_DEADLINE = "2031-03-01"
+
+
+class _StandInMessages:
+    def create(self, **kwargs: Any) -> Any:
+        from anthropic.types import Message
+
+        name = kwargs["tool_choice"]["name"]
+        return Message.model_validate({
+            "id": "msg_check",
+            "type": "message",
+            "role": "assistant",
+            "model": kwargs["model"],
+            "content": [{"type": "tool_use", "id": "toolu_check", "name": name,
+                         "input": {"deadline": RECORDED_DEADLINE}}],
+            "stop_reason": "tool_use",
+            "usage": {"input_tokens": 1, "output_tokens": 1},
+        })
+
+
+def _page(kind: str, i: int) -> str:
+    return f"{kind} scholarship page {i}. Applicants must be enrolled full-time."
+
+
+def _deadline(page: str) -> Any:
+    fields, _sources = llm._extract_fields_llm(page, rag_context=lambda: ("", []))
+    return fields.get("deadline")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--recorded", type=int, default=5)
+    ap.add_argument("--misses", type=int, default=2 * BREAKER_FAILURES)
+    args = ap.parse_args()
+
+    messages = llm.client.messages
+
+    # 1) record against the stand-in
+    cassette.mode = "record"
+    messages._inner = _StandInMessages()
+    for i in range(args.recorded):
+        _deadline(_page("recorded", i))
+
+    # 2) replay from the file alone
+    cassette.mode = "replay"
+    cassette._tracks = None
+    messages._inner = None
+    for i in range(args.misses):
+        if _deadline(_page("unrecorded", i)) == RECORDED_DEADLINE:
+            raise SystemExit(f"unrecorded page {i} was answered from the cassette")
+    served = sum(_deadline(_page("recorded", i)) == RECORDED_DEADLINE for i in range(args.recorded))
+
+    stats = cassette.stats()
+    breaker = BREAKERS["anthropic"].stats()
+    print(f"cassette: {stats}")
+    print(f"anthropic breaker: {breaker['state']} (failures: {breaker['failures']})")
+    if served != args.recorded or breaker["state"] != "closed":
+        raise SystemExit(f"replay served {served}/{args.recorded} recorded calls after {args.misses} misses")
+    print(f"ok: {served}/{args.recorded} recorded calls served after {args.misses} misses")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,11 +12,15 @@ from typing import List
 from dotenv import load_dotenv
 from firecrawl import Firecrawl
 
+from server.catalog_snapshot import write_snapshot
+from server.log import get_logger
 from server.scholarship_models import Scholarship
-from server.scholarship_repo import _DATA_PATH as SCHOLARSHIPS_JSON_PATH
+from server.scholarship_repo import _DATA_PATH as SCHOLARSHIPS_JSON_PATH, SNAPSHOT_PATH
 
 load_dotenv()  # load FIRECRAWL_API_KEY from .env if present
 
+logger = get_logger("firecrawl_ingest")
+
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 URLS_FILE = BASE_DIR / "store" / "public_scholarship_urls.txt"
@@ -114,16 +118,19 @@ def save_scholarships(scholarships: List[Scholarship]) -> None:
         json.dumps(data, indent=2, ensure_ascii=False),
         encoding="utf-8",
     )
-    print(f"[firecrawl_ingest] Saved {len(scholarships)} scholarships to {SCHOLARSHIPS_JSON_PATH}")
+    logger.info("saved %d scholarships to %s", len(scholarships), SCHOLARSHIPS_JSON_PATH)
+    # Compiled snapshot the server memory-maps (server/catalog_snapshot.py)
+    write_snapshot(scholarships, SNAPSHOT_PATH, source=SCHOLARSHIPS_JSON_PATH)
+    logger.info("compiled catalog snapshot %s", SNAPSHOT_PATH)
 
 
 def read_urls() -> List[str]:
     if not URLS_FILE.exists():
-        print(f"[firecrawl_ingest] No URL file found at {URLS_FILE}")
+        logger.warning("no URL file found at %s", URLS_FILE)
         return []
     lines = [ln.strip() for ln in URLS_FILE.read_text(encoding="utf-8").splitlines()]
     urls = [ln for ln in lines if ln and not ln.startswith("#")]
-    print(f"[firecrawl_ingest] Loaded {len(urls)} URLs from {URLS_FILE}")
+    logger.info("loaded %d URLs from %s", len(urls), URLS_FILE)
     return urls
 
 
@@ -209,7 +216,7 @@ def extract_scholarships_from_page(
             scholarships.append(sch)
 
         if scholarships:
-            print(f"[firecrawl_ingest] Extracted {len(scholarships)} individual scholarships from list page.")
+            logger.info("extracted %d individual scholarships from list page", len(scholarships), extra={"url": page_url})
             return scholarships
 
     # Default behavior: treat whole page as single entry,
@@ -251,7 +258,7 @@ def main() -> None:
 
     urls = read_urls()
     if not urls:
-        print("[firecrawl_ingest] No URLs to process.")
+        logger.info("no URLs to process")
         return
 
     existing = load_existing_scholarships()
@@ -260,11 +267,11 @@ def main() -> None:
     new_or_updated: dict[str, Scholarship] = {}
 
     for url in urls:
-        print(f"[firecrawl_ingest] Scraping {url} ...")
+        logger.info("scraping", extra={"url": url})
         try:
             doc = firecrawl.scrape(url, formats=["markdown", "html"])
         except Exception as e:
-            print(f"[firecrawl_ingest] Error scraping {url}: {e}")
+            logger.error("error scraping: %s", e, extra={"url": url})
             continue
 
         doc_dict = doc.model_dump() if hasattr(doc, "model_dump") else doc
@@ -276,7 +283,7 @@ def main() -> None:
         extracted = extract_scholarships_from_page(url, html, markdown)
 
         for sch in extracted:
-            print(f"[firecrawl_ingest] Parsed scholarship: {sch.title} (id={sch.id})")
+            logger.info("parsed scholarship: %s", sch.title, extra={"scholarship_id": sch.id})
             new_or_updated[sch.id] = sch
 
     # Merge results
@@ -284,7 +291,7 @@ def main() -> None:
     merged.update(new_or_updated)
 
     save_scholarships(list(merged.values()))
-    print(f"[firecrawl_ingest] Done. {len(new_or_updated)} scholarships added/updated.")
+    logger.info("done, %d scholarships added/updated", len(new_or_updated))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,474 @@
+# server/tools/load_harness.py
+"""
+Load-test /parse, /plan and /workflow without touching paid APIs.
+
+1. Starts local stand-ins for the two upstreams on one port:
+     POST /v1/messages   Anthropic Messages API (answers the forced tool
+                         call with schema-valid input)
+     POST /v2/scrape     Firecrawl scrape (returns a sample page)
+   Each has a log-normal latency (median + sigma) and an error rate
+   (Anthropic: 529 overloaded / 500; Firecrawl: 502).
+2. Starts the API under uvicorn with ANTHROPIC_BASE_URL and
+   FIRECRAWL_API_BASE pointed at the stand-ins (or use --target to hit a
+   server you started yourself with those variables set).
+3. Replays a request mix at each concurrency level for --duration
+   seconds. Users come from store/feedback.jsonl (weighted by how often
+   they appear), page texts from store/sample_pages and the catalog
+   descriptions, URLs from store/public_scholarship_urls.txt. The
+   default mix follows the extension: every popup scan is /parse + /plan,
+   feedback rows with a plan_id came from the overlay (/workflow).
+4. Reports per endpoint and level: requests, throughput, p50/p95/p99
+   latency, error rate (5xx / transport) and 429 rate, plus the
+   server's /health admission + breaker snapshot.
+
+Admission limits are raised for the spawned server unless --keep-limits
+(you usually want to measure the server, not the rate limiter).
+
+Run from adhd_start/ (needs uvicorn):
+    python -m server.tools.load_harness
+    python -m server.tools.load_harness --levels 1,8,32 --duration 20 --json load.json
+    python -m server.tools.load_harness --llm-latency-ms 3000 --llm-error-rate 0.1
+    python -m server.tools.load_harness --stubs-only --stub-port 8787
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+STORE = Path(__file__).resolve().parents[1] / "store"
+APP_DIR = Path(__file__).resolve().parents[2]
+SERVER_LOG = Path(tempfile.gettempdir()) / "adhd_load_server.log"
+
+
+# -------------------------------------------------------------------
+# Upstream stand-ins
+# -------------------------------------------------------------------
+
+class UpstreamProfile:
+    """Latency distribution + error rate for one stand-in."""
+
+    def __init__(self, median_ms: float, sigma: float, error_rate: float, seed: int):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats: Counter = Counter()
+
+    def draw(self) -> Tuple[float, bool]:
+        with self._lock:
+            delay = self.median_ms * math.exp(self._rng.gauss(0.0, self.sigma)) / 1000.0
+            failed = self._rng.random() < self.error_rate
+            self.stats["errors" if failed else "ok"] += 1
+        return delay, failed
+
+
+def _fake_value(name: str, schema: Dict[str, Any], defs: Dict[str, Any]) -> Any:
+    """A plausible value for a JSON-schema property (tool input)."""
+    if "$ref" in schema:
+        return _fake_value(name, defs[schema["$ref"].split("/")[-1]], defs)
+    if "anyOf" in schema:
+        options = [s for s in schema["anyOf"] if s.get("type") != "null"]
+        return _fake_value(name, options[0], defs) if options else None
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "const" in schema:
+        return schema["const"]
+    kind = schema.get("type")
+    if kind == "object":
+        props = schema.get("properties", {})
+        return {k: _fake_value(k, v, defs) for k, v in props.items()}
+    if kind == "array":
+        item = schema.get("items", {"type": "string"})
+        return [_fake_value(name, item, defs) for _ in range(3)]
+    if kind == "integer":
+        return 2
+    if kind == "number":
+        return 0.5
+    if kind == "boolean":
+        return False
+    if "deadline" in name:
+        return (date.today() + timedelta(days=45)).isoformat()
+    if name.startswith("check_in"):
+        return "T+5"
+    return f"Stub {name.replace('_', ' ')}"
+
+
+def _pages() -> List[str]:
+    pages = [p.read_text(encoding="utf-8") for p in sorted((STORE / "sample_pages").glob("*.txt"))]
+    try:
+        rows = json.loads((STORE / "scholarships.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        rows = []
+    for row in rows:
+        text = "\n".join(
+            str(row.get(k) or "") for k in ("title", "description_short", "eligibility_summary")
+        )
+        if len(text) > 80:
+            pages.append(text)
+    return pages
+
+
+def make_stub_handler(anthropic: UpstreamProfile, firecrawl: UpstreamProfile, pages: List[str]):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt: str, *args: Any) -> None:  # quiet
+            pass
+
+        def _send(self, status: int, body: Dict[str, Any]) -> None:
+            raw = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                req = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                req = {}
+            if self.path.startswith("/v1/messages"):
+                self._messages(req)
+            elif self.path.startswith("/v2/scrape"):
+                self._scrape(req)
+            else:
+                self._send(404, {"error": "not_found"})
+
+        def _messages(self, req: Dict[str, Any]) -> None:
+            delay, failed = anthropic.draw()
+            time.sleep(delay)
+            if failed:
+                overloaded = random.random() < 0.5
+                self._send(
+                    529 if overloaded else 500,
+                    {
+                        "type": "error",
+                        "error": {
+                            "type": "overloaded_error" if overloaded else "api_error",
+                            "message": "stub upstream failure",
+                        },
+                    },
+                )
+                return
+            tools = {t["name"]: t for t in req.get("tools") or []}
+            choice = (req.get("tool_choice") or {}).get("name")
+            tool = tools.get(choice) or next(iter(tools.values()), None)
+            if tool is None:
+                content = [{"type": "text", "text": "{}"}]
+            else:
+                schema = tool["input_schema"]
+                content = [{
+                    "type": "tool_use",
+                    "id": f"toolu_stub_{random.getrandbits(32):08x}",
+                    "name": tool["name"],
+                    "input": _fake_value("", schema, schema.get("$defs", {})),
+                }]
+            prompt_chars = len(json.dumps(req.get("messages") or []))
+            self._send(200, {
+                "id": f"msg_stub_{random.getrandbits(32):08x}",
+                "type": "message",
+                "role": "assistant",
+                "model": req.get("model", "stub"),
+                "content": content,
+                "stop_reason": "tool_use" if tool else "end_turn",
+                "stop_sequence": None,
+                "usage": {
+                    "input_tokens": prompt_chars // 4,
+                    "output_tokens": 120,
+                    "cache_creation_input_tokens": 0,
+                    "cache_read_input_tokens": 0,
+                },
+            })
+
+        def _scrape(self, req: Dict[str, Any]) -> None:
+            delay, failed = firecrawl.draw()
+            time.sleep(delay)
+            if failed:
+                self._send(502, {"success": False, "error": "stub upstream failure"})
+                return
+            url = req.get("url") or ""
+            page = pages[zlib.crc32(url.encode('utf-8')) % len(pages)]
+            self._send(200, {
+                "success": True,
+                "data": {"markdown": page, "summary": page[:200], "metadata": {"sourceURL": url}},
+            })
+
+    return StubHandler
+
+
+def start_stubs(port: int, anthropic: UpstreamProfile, firecrawl: UpstreamProfile) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_stub_handler(anthropic, firecrawl, _pages()))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="load-stubs", daemon=True).start()
+    return server
+
+
+# -------------------------------------------------------------------
+# Request mix
+# -------------------------------------------------------------------
+
+def load_seed() -> Tuple[List[str], Dict[str, float]]:
+    """Users (repeated by frequency) and the default endpoint mix, from feedback."""
+    users: List[str] = []
+    overlay = popup = 0
+    try:
+        with (STORE / "feedback.jsonl").open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                users.append(row.get("user_id") or "demo-user")
+                if row.get("plan_id"):
+                    overlay += 1
+                else:
+                    popup += 1
+    except OSError:
+        pass
+    if not overlay and not popup:
+        popup = 1
+    # a popup scan is /parse then /plan
+    mix = {"parse": float(popup), "plan": float(popup), "workflow": float(overlay or 0.1 * popup)}
+    return users or ["demo-user"], mix
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        out[name.strip()] = float(weight or 1)
+    return out
+
+
+class RequestMaker:
+    def __init__(self, mix: Dict[str, float], users: List[str], seed: int):
+        self.endpoints = [e for e in mix if mix[e] > 0]
+        self.weights = [mix[e] for e in self.endpoints]
+        self.users = users
+        self.pages = _pages()
+        try:
+            self.urls = [
+                u.strip() for u in (STORE / "public_scholarship_urls.txt").read_text().splitlines()
+                if u.strip() and not u.startswith("#")
+            ]
+        except OSError:
+            self.urls = []
+        self.urls = self.urls or ["https://example.org/scholarship"]
+        self.seed = seed
+
+    def stream(self, worker: int):
+        rng = random.Random(self.seed * 1000 + worker)
+        while True:
+            endpoint = rng.choices(self.endpoints, self.weights)[0]
+            user = rng.choice(self.users)
+            page = rng.choice(self.pages)
+            if endpoint == "parse":
+                yield endpoint, "/parse", {"user_id": user, "text": page}
+            elif endpoint == "plan":
+                yield endpoint, "/plan", {"user_id": user, "goal": "Apply to this scholarship", "text": page}
+            else:
+                yield endpoint, "/workflow", {
+                    "user_id": user,
+                    "goal": "Apply to this scholarship",
+                    "page_url": rng.choice(self.urls),
+                    "raw_text": page,
+                }
+
+
+# -------------------------------------------------------------------
+# Load loop
+# -------------------------------------------------------------------
+
+def _pct(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run_level(target: str, maker: RequestMaker, concurrency: int, duration_s: float) -> Dict[str, Any]:
+    samples: Dict[str, List[Tuple[float, int]]] = defaultdict(list)
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration_s
+
+    def worker(n: int) -> None:
+        local: List[Tuple[str, float, int]] = []
+        with httpx.Client(base_url=target, timeout=120.0) as client:
+            for endpoint, path, body in maker.stream(n):
+                if time.monotonic() >= stop_at:
+                    break
+                t0 = time.perf_counter()
+                try:
+                    status = client.post(path, json=body).status_code
+                except httpx.HTTPError:
+                    status = 0
+                local.append((endpoint, time.perf_counter() - t0, status))
+        with lock:
+            for endpoint, elapsed, status in local:
+                samples[endpoint].append((elapsed, status))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    t0 = time.perf_counter()
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    wall = time.perf_counter() - t0
+
+    out: Dict[str, Any] = {"concurrency": concurrency, "wall_s": round(wall, 2), "endpoints": {}}
+    for endpoint, rows in sorted(samples.items()):
+        lat = [e * 1000 for e, _s in rows]
+        n = len(rows)
+        errors = sum(1 for _e, s in rows if s == 0 or s >= 500)
+        rejected = sum(1 for _e, s in rows if s == 429)
+        out["endpoints"][endpoint] = {
+            "requests": n,
+            "rps": round(n / wall, 2),
+            "p50_ms": round(_pct(lat, 0.50), 1),
+            "p95_ms": round(_pct(lat, 0.95), 1),
+            "p99_ms": round(_pct(lat, 0.99), 1),
+            "error_rate": round(errors / n, 4) if n else 0.0,
+            "rate_429": round(rejected / n, 4) if n else 0.0,
+        }
+    total = sum(len(r) for r in samples.values())
+    out["total_rps"] = round(total / wall, 2)
+    return out
+
+
+def start_server(port: int, stub_base: str, keep_limits: bool) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update(
+        ANTHROPIC_API_KEY="stub-key",
+        ANTHROPIC_BASE_URL=stub_base,
+        FIRECRAWL_API_KEY="stub-key",
+        FIRECRAWL_API_BASE=f"{stub_base}/v2/scrape",
+        PYTHONUNBUFFERED="1",
+    )
+    if not keep_limits:
+        for knob in ("ANTHROPIC_RPM", "ANTHROPIC_USER_RPM", "FIRECRAWL_RPM", "FIRECRAWL_USER_RPM"):
+            env[knob] = "1e9"
+        env.setdefault("ANTHROPIC_CONCURRENCY", "64")
+        env.setdefault("FIRECRAWL_CONCURRENCY", "64")
+    log = open(SERVER_LOG, "w", encoding="utf-8")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server.app:app", "--port", str(port), "--log-level", "warning"],
+        cwd=APP_DIR,
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+
+
+def wait_ready(target: str, timeout_s: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{target}/health", timeout=2.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f"server at {target} did not become ready (see {SERVER_LOG})")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--levels", default="1,4,16")
+    ap.add_argument("--duration", type=float, default=15.0, help="seconds per level")
+    ap.add_argument("--mix", default=None, help='e.g. "parse=5,plan=3,workflow=1" (default: from feedback)')
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--target", default=None, help="existing server URL (skip spawning uvicorn)")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--stub-port", type=int, default=8766)
+    ap.add_argument("--stubs-only", action="store_true", help="just run the stand-ins")
+    ap.add_argument("--keep-limits", action="store_true")
+    ap.add_argument("--llm-latency-ms", type=float, default=1200.0)
+    ap.add_argument("--llm-sigma", type=float, default=0.5)
+    ap.add_argument("--llm-error-rate", type=float, default=0.02)
+    ap.add_argument("--scrape-latency-ms", type=float, default=800.0)
+    ap.add_argument("--scrape-sigma", type=float, default=0.6)
+    ap.add_argument("--scrape-error-rate", type=float, default=0.02)
+    ap.add_argument("--json", dest="json_out", default=None)
+    args = ap.parse_args()
+
+    anthropic = UpstreamProfile(args.llm_latency_ms, args.llm_sigma, args.llm_error_rate, args.seed)
+    firecrawl = UpstreamProfile(args.scrape_latency_ms, args.scrape_sigma, args.scrape_error_rate, args.seed + 1)
+    stubs = start_stubs(args.stub_port, anthropic, firecrawl)
+    stub_base = f"http://127.0.0.1:{args.stub_port}"
+    print(f"[load] stand-ins on {stub_base} (/v1/messages, /v2/scrape)")
+    if args.stubs_only:
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            return
+
+    proc: Optional[subprocess.Popen] = None
+    target = args.target
+    if target is None:
+        proc = start_server(args.port, stub_base, args.keep_limits)
+        target = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_ready(target)
+        users, mix = load_seed()
+        if args.mix:
+            mix = parse_mix(args.mix)
+        maker = RequestMaker(mix, users, args.seed)
+        print(f"[load] target {target}; mix {mix}; {len(set(users))} users; {len(maker.pages)} pages")
+
+        levels = []
+        for level in [int(x) for x in args.levels.split(",") if x.strip()]:
+            res = run_level(target, maker, level, args.duration)
+            levels.append(res)
+            for endpoint, s in res["endpoints"].items():
+                print(
+                    f"c={level:<4} {endpoint:9} n={s['requests']:<6} {s['rps']:8.2f} rps  "
+                    f"p50={s['p50_ms']:8.1f}  p95={s['p95_ms']:8.1f}  p99={s['p99_ms']:8.1f} ms  "
+                    f"err={s['error_rate']:.2%}  429={s['rate_429']:.2%}"
+                )
+        try:
+            health = httpx.get(f"{target}/health", timeout=5.0).json()
+        except (httpx.HTTPError, ValueError):
+            health = {}
+        report = {
+            "config": {k: v for k, v in vars(args).items() if k != "json_out"},
+            "mix": mix,
+            "levels": levels,
+            "upstream_calls": {"anthropic": dict(anthropic.stats), "firecrawl": dict(firecrawl.stats)},
+            "server": {k: health.get(k) for k in ("admission", "breakers", "jobs")},
+        }
+        if args.json_out:
+            with open(args.json_out, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        stubs.shutdown()
+
+
+if __name__ == "__main__":
+    main()
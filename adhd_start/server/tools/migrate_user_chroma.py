@@ -0,0 +1,133 @@
+# server/tools/migrate_user_chroma.py
+"""
+Migrate per-user Chroma directories into the consolidated user store.
+
+Old layout:  store/chroma_user/<user_id>/   (one DB per user)
+New layout:  store/chroma_users/            (collection "user_notes",
+                                             or user_notes_NNN when sharded)
+
+Stored embeddings are copied as-is, so the model is never re-run.
+Chunk ids are prefixed with the user id and written with upsert, so the
+tool is safe to re-run.
+
+Run from adhd_start/:
+    python -m server.tools.migrate_user_chroma --dry-run
+    python -m server.tools.migrate_user_chroma
+    python -m server.tools.migrate_user_chroma --delete-legacy
+"""
+
+from __future__ import annotations
+
+import argparse
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List
+
+import chromadb
+
+from server.log import get_logger
+from server.rag.user_store import (
+    LEGACY_USER_DB_BASE,
+    USER_STORE_DIR,
+    USER_STORE_SHARDS,
+    collection_name,
+    shard_for,
+)
+
+logger = get_logger("migrate_user_chroma")
+
+# langchain's Chroma wrapper uses this collection name by default
+LEGACY_COLLECTION = "langchain"
+BATCH = 500
+
+
+def _legacy_user_dirs(base: Path) -> List[Path]:
+    if not base.exists():
+        return []
+    return sorted(p for p in base.iterdir() if p.is_dir())
+
+
+def _read_legacy(user_dir: Path) -> Dict[str, Any]:
+    client = chromadb.PersistentClient(path=str(user_dir))
+    try:
+        col = client.get_collection(LEGACY_COLLECTION)
+    except Exception:
+        return {"ids": [], "documents": [], "metadatas": [], "embeddings": []}
+    return col.get(include=["documents", "metadatas", "embeddings"])
+
+
+def migrate(
+    legacy_base: Path = LEGACY_USER_DB_BASE,
+    target_dir: Path = USER_STORE_DIR,
+    shards: int = USER_STORE_SHARDS,
+    dry_run: bool = False,
+    delete_legacy: bool = False,
+) -> Dict[str, int]:
+    target = None if dry_run else chromadb.PersistentClient(path=str(target_dir))
+    collections: Dict[str, Any] = {}
+    totals = {"users": 0, "chunks": 0, "deleted_dirs": 0}
+
+    for user_dir in _legacy_user_dirs(legacy_base):
+        user_id = user_dir.name
+        got = _read_legacy(user_dir)
+        ids = list(got.get("ids") or [])
+        n = len(ids)
+        name = collection_name(shard_for(user_id, shards), shards)
+        logger.info("%s: %d chunks -> %s", user_id, n, name)
+        totals["users"] += 1
+        totals["chunks"] += n
+        if dry_run or n == 0:
+            continue
+
+        if name not in collections:
+            collections[name] = target.get_or_create_collection(name)  # type: ignore[union-attr]
+        col = collections[name]
+
+        docs = list(got.get("documents") or [])
+        metas = [{**(m or {}), "user_id": user_id} for m in (got.get("metadatas") or [{}] * n)]
+        embs = got.get("embeddings")
+        embs = list(embs) if embs is not None else []
+        for i in range(0, n, BATCH):
+            col.upsert(
+                ids=[f"{user_id}:{x}" for x in ids[i : i + BATCH]],
+                documents=docs[i : i + BATCH],
+                metadatas=metas[i : i + BATCH],
+                embeddings=embs[i : i + BATCH],
+            )
+
+        if delete_legacy:
+            migrated = col.get(where={"user_id": user_id}, include=[])
+            if len(migrated.get("ids") or []) >= n:
+                shutil.rmtree(user_dir)
+                totals["deleted_dirs"] += 1
+            else:
+                logger.warning("%s: count mismatch, keeping %s", user_id, user_dir)
+
+    return totals
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--legacy-dir", type=Path, default=LEGACY_USER_DB_BASE)
+    ap.add_argument("--target-dir", type=Path, default=USER_STORE_DIR)
+    ap.add_argument("--shards", type=int, default=USER_STORE_SHARDS)
+    ap.add_argument("--dry-run", action="store_true")
+    ap.add_argument(
+        "--delete-legacy",
+        action="store_true",
+        help="remove each per-user directory after its chunks are verified",
+    )
+    args = ap.parse_args()
+
+    totals = migrate(
+        legacy_base=args.legacy_dir,
+        target_dir=args.target_dir,
+        shards=args.shards,
+        dry_run=args.dry_run,
+        delete_legacy=args.delete_legacy,
+    )
+    logger.info("done", extra=totals)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+# server/tools/resp_standin.py
+"""
+Local Redis-protocol stand-in and cache backend check.
+
+Serves the subset of Redis that server/cache.py uses (PING, AUTH,
+SELECT, GET, SET with EX/PX/NX/XX, DEL, EXISTS, PTTL, SCAN, DBSIZE,
+FLUSHDB) from an in-memory dict, so the redis cache tier can be run and
+tested without a Redis install:
+
+    python -m server.tools.resp_standin --port 6390
+    CACHE_BACKEND=redis CACHE_URL=redis://127.0.0.1:6390/0 uvicorn server.app:app --workers 4
+
+--check runs the same get/set/TTL/serialization checks against every
+backend (memory, sqlite in a temp dir, redis via an in-process stand-in
+or --url for a real server) and exits 1 on any failure:
+
+    python -m server.tools.resp_standin --check
+    python -m server.tools.resp_standin --check --url redis://127.0.0.1:6379/15
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from server import cache
+
+# -----------------------------------------------------------
+# Stand-in server
+# -----------------------------------------------------------
+
+
+class _Store:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.dbs: Dict[int, Dict[bytes, Tuple[bytes, Optional[float]]]] = {}
+
+    def db(self, n: int) -> Dict[bytes, Tuple[bytes, Optional[float]]]:
+        return self.dbs.setdefault(n, {})
+
+
+def _alive(entry: Optional[Tuple[bytes, Optional[float]]], now: float) -> bool:
+    return entry is not None and (entry[1] is None or entry[1] > now)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    store: _Store
+    password: Optional[str] = None
+
+    def handle(self) -> None:
+        self.dbn = 0
+        self.authed = self.password is None
+        while True:
+            try:
+                args = self._read_command()
+            except (ConnectionError, ValueError):
+                return
+            if args is None:
+                return
+            self.wfile.write(self._dispatch(args))
+            if args and args[0].upper() == b"QUIT":
+                return
+
+    def _read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.strip().split()  # inline command (redis-cli / telnet)
+        args = []
+        for _ in range(int(line[1:-2])):
+            header = self.rfile.readline()
+            n = int(header[1:-2])
+            args.append(self.rfile.read(n + 2)[:-2])
+        return args
+
+    def _dispatch(self, args: List[bytes]) -> bytes:
+        if not args:
+            return _err("empty command")
+        cmd = args[0].upper().decode()
+        if cmd == "AUTH":
+            if self.password is None or args[-1].decode() == self.password:
+                self.authed = True
+                return _ok()
+            return _err("invalid password", code="WRONGPASS")
+        if not self.authed:
+            return _err("Authentication required.", code="NOAUTH")
+        handler = getattr(self, f"cmd_{cmd.lower()}", None)
+        if handler is None:
+            return _err(f"unknown command '{cmd}'")
+        with self.store.lock:
+            return handler(args[1:], self.store.db(self.dbn), time.time())
+
+    # ---- commands (store lock held) ----
+
+    def cmd_ping(self, args: List[bytes], db: Dict, now: float) -> bytes:
+        return _bulk(args[0]) if args else b"+PONG\r\n"
+
+    def cmd_quit(self, args: List[bytes], db: Dict, now: float) -> bytes:
+        return _ok()
+
+    def cmd_select(self, args: List[bytes], db: Dict, now: float) -> bytes:
+        self.dbn = int(args[0])
+        return _ok()
+
+    def cmd_get(self, args: List[bytes], db: Dict, now: float) -> bytes:
+        entry = db.get(args[0])
+        return _bulk(entry[0]) if _alive(entry, now) else b"$-1\r\n"
+
+    def cmd_set(self, args: List[bytes], db: Dict, now: float) -> bytes:
+        key, value, opts = args[0], args[1], [a.upper() for a in args[2:]]
+        expires_at = None
+        exists = _alive(db.get(key), now)
+        i = 0
+        while i < len(opts):
+            if opts[i] in (b"EX", b"PX"):
+                amount = int(args[2 + i + 1])
+                if amount <= 0:
+                    return _err("invalid expire time in 'set' command")
+                expires_at = now + (amount if opts[i] == b"EX" else amount / 1000.0)
+                i += 2
+                continue
+            if opts[i] == b"NX" and exists:
+                return b"$-1\r\n"
+            if opts[i] == b"XX" and not exists:
+                return b"$-1\r\n"
+            i += 1
+        db[key] = (value, expires_at)
+        return _ok()
+
+    def cmd_del(self, args: List[bytes], db: Dict, now: float) -> bytes:
+        n = 0
+        for key in args:
+            if _alive(db.pop(key, None), now):
+                n += 1
+        return b":%d\r\n" % n
+
+    def cmd_exists(self, args: List[bytes], db: Dict, now: float) -> bytes:
+        return b":%d\r\n" % sum(1 for k in args if _alive(db.get(k), now))
+
+    def cmd_pttl(self, args: List[bytes], db: Dict, now: float) -> bytes:
+        entry = db.get(args[0])
+        if not _alive(entry, now):
+            return b":-2\r\n"
+        if entry[1] is None:
+            return b":-1\r\n"
+        return b":%d\r\n" % int((entry[1] - now) * 1000)
+
+    def cmd_dbsize(self, args: List[bytes], db: Dict, now: float) -> bytes:
+        return b":%d\r\n" % sum(1 for e in db.values() if _alive(e, now))
+
+    def cmd_flushdb(self, args: List[bytes], db: Dict, now: float) -> bytes:
+        db.clear()
+        return _ok()
+
+    def cmd_scan(self, args: List[bytes], db: Dict, now: float) -> bytes:
+        # One pass over everything; cursor is always 0 afterwards.
+        pattern = b"*"
+        for i in range(1, len(args) - 1):
+            if args[i].upper() == b"MATCH":
+                pattern = args[i + 1]
+        keys = [
+            k for k, e in db.items()
+            if _alive(e, now) and fnmatch.fnmatchcase(k.decode("utf-8", "replace"), pattern.decode())
+        ]
+        return b"*2\r\n" + _bulk(b"0") + b"*%d\r\n" % len(keys) + b"".join(_bulk(k) for k in keys)
+
+
+def _ok() -> bytes:
+    return b"+OK\r\n"
+
+
+def _err(msg: str, code: str = "ERR") -> bytes:
+    return f"-{code} {msg}\r\n".encode()
+
+
+def _bulk(data: bytes) -> bytes:
+    return b"$%d\r\n%s\r\n" % (len(data), data)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def serve(host: str = "127.0.0.1", port: int = 6390, password: Optional[str] = None) -> _Server:
+    """Start the stand-in on a background thread and return the server."""
+    handler = type("Handler", (_Handler,), {"store": _Store(), "password": password})
+    server = _Server((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="resp-standin", daemon=True).start()
+    return server
+
+
+# -----------------------------------------------------------
+# Backend check
+# -----------------------------------------------------------
+
+def _check_backend(backend: cache.Backend) -> List[str]:
+    """Same expectations for every backend; returns failure messages."""
+    failures: List[str] = []
+
+    def expect(label: str, got: Any, want: Any) -> None:
+        if got != want:
+            failures.append(f"{label}: got {got!r}, want {want!r}")
+
+    cache.set_backend(backend)
+    ns = cache.Namespace(f"check{int(time.time() * 1000)}")
+    backend.clear()
+
+    value = {"title": "Bourse d'études ✓", "amount": 2500, "ok": True, "tags": ["a", "b"], "none": None}
+    ns.set("k1", value)
+    expect("roundtrip", ns.get("k1"), value)
+    ns.set("tuple", ("markdown", {"url": "x"}))
+    expect("tuples become lists", ns.get("tuple"), ["markdown", {"url": "x"}])
+    expect("miss", ns.get("absent"), None)
+
+    ns.set(["composite", 1], 1.5)
+    expect("composite key", ns.get(["composite", 1]), 1.5)
+    long_key = "u" * 1000
+    ns.set(long_key, "long")
+    expect("long key", ns.get(long_key), "long")
+
+    ns.set("short", "gone soon", ttl_s=0.3)
+    expect("before ttl", ns.get("short"), "gone soon")
+    ns.set("forever", "stays", ttl_s=None)
+    time.sleep(0.45)
+    # Tiered backends may serve the L1 copy; its TTL is capped by the entry's.
+    expect("after ttl", ns.get("short"), None)
+    expect("no ttl", ns.get("forever"), "stays")
+
+    ns.set("k1", "overwritten")
+    expect("overwrite", ns.get("k1"), "overwritten")
+    ns.delete("k1")
+    expect("delete", ns.get("k1"), None)
+
+    try:
+        ns.set("bad", {1, 2})
+        failures.append("non-JSON value was accepted")
+    except TypeError:
+        pass
+
+    backend.clear()
+    expect("clear", ns.get("forever"), None)
+    return failures
+
+
+def run_check(url: Optional[str]) -> int:
+    tmp = tempfile.TemporaryDirectory(prefix="cache-check-")
+    standin = None
+    if url is None:
+        standin = serve(port=0, password="secret")
+        url = f"redis://:secret@127.0.0.1:{standin.server_address[1]}/3"
+
+    cases: List[Tuple[str, Callable[[], cache.Backend]]] = [
+        ("memory", lambda: cache.LRUBackend(64)),
+        ("sqlite", lambda: cache.SQLiteBackend(Path(tmp.name) / "cache.sqlite3")),
+        ("sqlite+l1", lambda: cache.TieredBackend(
+            cache.SQLiteBackend(Path(tmp.name) / "tiered.sqlite3"), cache.LRUBackend(16))),
+        ("redis", lambda: cache.RedisBackend(url, timeout_s=2.0)),
+        ("redis+l1", lambda: cache.TieredBackend(
+            cache.RedisBackend(url, timeout_s=2.0), cache.LRUBackend(16))),
+    ]
+    failed = 0
+    for name, make in cases:
+        try:
+            failures = _check_backend(make())
+        except Exception as exc:
+            failures = [f"raised {exc!r}"]
+        status = "ok" if not failures else "FAIL"
+        print(f"{name:<10} {status}")
+        for msg in failures:
+            print(f"    {msg}")
+        failed += bool(failures)
+
+    # A dead shared tier must degrade to misses, not errors.
+    cache.set_backend(cache.RedisBackend("redis://127.0.0.1:1/0", timeout_s=0.2))
+    ns = cache.Namespace("down")
+    ns.set("k", 1)
+    down_ok = ns.get("k") is None and ns.stats()["errors"] == 2
+    print(f"{'down':<10} {'ok' if down_ok else 'FAIL'}")
+    failed += not down_ok
+
+    if standin is not None:
+        standin.shutdown()
+    tmp.cleanup()
+    return 1 if failed else 0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=6390)
+    ap.add_argument("--password", default=None)
+    ap.add_argument("--check", action="store_true", help="run the backend checks and exit")
+    ap.add_argument("--url", default=None, help="with --check: test this Redis instead of a stand-in")
+    args = ap.parse_args()
+
+    if args.check:
+        sys.exit(run_check(args.url))
+
+    server = serve(args.host, args.port, args.password)
+    print(f"RESP stand-in listening on {args.host}:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# server/tools/rss_report.py
+"""
+Per-worker memory: `uvicorn --workers N` vs the prefork launcher.
+
+Starts the API twice with the same worker count, waits until every
+worker is up and has loaded the same state (APP_PRELOAD=1 for the
+uvicorn layout, so both hold the catalog, ranking features and, when
+installed, the embedding model), sends a few requests to each, then
+reads /proc/<pid>/smaps_rollup for the master and every worker:
+
+  RSS   resident pages, shared ones counted in full in every process
+        (what `ps`/`top` show; summing it overstates usage)
+  PSS   shared pages divided among the processes sharing them (sums
+        to the real total)
+  USS   private pages only (what killing that process would free)
+
+Linux only (needs /proc). Run from adhd_start/ (needs uvicorn):
+    python -m server.tools.rss_report --workers 4
+    python -m server.tools.rss_report --workers 4 --no-rag --json rss.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ADHD_START = Path(__file__).resolve().parents[2]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _children(pid: int) -> List[int]:
+    out = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # ppid is the 2nd field after the ")" that closes the command name
+        fields = stat[stat.rfind(b")") + 2:].split()
+        if int(fields[1]) == pid:
+            out.append(int(entry))
+    return sorted(out)
+
+
+def _cmdline(pid: int) -> str:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return f.read().replace(b"\0", b" ").decode(errors="replace").strip()
+    except OSError:
+        return ""
+
+
+def _memory(pid: int) -> Dict[str, int]:
+    """kB figures from smaps_rollup."""
+    mem: Dict[str, int] = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[2] == "kB":
+                mem[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss_kb": mem.get("Rss", 0),
+        "pss_kb": mem.get("Pss", 0),
+        "uss_kb": mem.get("Private_Clean", 0) + mem.get("Private_Dirty", 0),
+        "shared_kb": mem.get("Shared_Clean", 0) + mem.get("Shared_Dirty", 0),
+    }
+
+
+def _workers(master: int, expected: int) -> List[int]:
+    # uvicorn --workers also has a multiprocessing resource tracker child
+    return [p for p in _children(master) if "resource_tracker" not in _cmdline(p)][:expected]
+
+
+def _get(url: str, timeout: float = 5.0) -> Optional[int]:
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as resp:
+            resp.read()
+            return resp.status
+    except Exception:
+        return None
+
+
+def measure(layout: str, cmd: List[str], workers: int, env: Dict[str, str], port: int,
+            warmup: int, timeout_s: float, log_path: Path) -> Dict[str, Any]:
+    with open(log_path, "ab") as log:
+        proc = subprocess.Popen(cmd, cwd=ADHD_START, env=env, stdout=log, stderr=log)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + timeout_s
+        while time.monotonic() < deadline:
+            if proc.poll() is not None:
+                raise RuntimeError(f"{layout} exited with {proc.returncode} (log: {log_path})")
+            if len(_workers(proc.pid, workers)) == workers and _get(base + "/health") == 200:
+                break
+            time.sleep(0.5)
+        else:
+            raise RuntimeError(f"{layout} did not come up within {timeout_s:.0f}s (log: {log_path})")
+
+        # Each worker preloads in its startup hook; hitting the server a
+        # few times spreads requests across workers and lets them settle.
+        for _ in range(warmup):
+            _get(base + "/health")
+            _get(base + "/scholarships?limit=5")
+        time.sleep(2.0)
+
+        pids = _workers(proc.pid, workers)
+        master = _memory(proc.pid)
+        per_worker = [{"pid": p, **_memory(p)} for p in pids]
+        total = {
+            k: master[k] + sum(w[k] for w in per_worker) for k in ("rss_kb", "pss_kb", "uss_kb")
+        }
+        return {"layout": layout, "master": {"pid": proc.pid, **master}, "workers": per_worker, "total": total}
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+def _mb(kb: float) -> str:
+    return f"{kb / 1024:8.1f}"
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    print(f"{'layout':<16}{'process':<10}{'RSS MB':>9}{'PSS MB':>9}{'USS MB':>9}{'shared MB':>11}")
+    for res in results:
+        rows = [("master", res["master"])] + [(f"worker{i}", w) for i, w in enumerate(res["workers"])]
+        for name, m in rows:
+            print(f"{res['layout']:<16}{name:<10}{_mb(m['rss_kb'])} {_mb(m['pss_kb'])} {_mb(m['uss_kb'])} {_mb(m['shared_kb'])}  ")
+        t = res["total"]
+        print(f"{res['layout']:<16}{'TOTAL':<10}{_mb(t['rss_kb'])} {_mb(t['pss_kb'])} {_mb(t['uss_kb'])}")
+        print()
+    if len(results) == 2:
+        a, b = results[0]["total"]["pss_kb"], results[1]["total"]["pss_kb"]
+        if a:
+            print(f"PSS total: {results[1]['layout']} uses {b / a:.0%} of {results[0]['layout']} "
+                  f"({(a - b) / 1024:+.1f} MB saved)")
+        wa = [w["uss_kb"] for w in results[0]["workers"]]
+        wb = [w["uss_kb"] for w in results[1]["workers"]]
+        if wa and wb:
+            print(f"private memory per worker: {sum(wa) / len(wa) / 1024:.1f} MB -> {sum(wb) / len(wb) / 1024:.1f} MB")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--no-rag", action="store_true", help="skip the embedding model in both layouts")
+    ap.add_argument("--warmup", type=int, default=20, help="requests sent before measuring")
+    ap.add_argument("--timeout", type=float, default=240.0, help="seconds to wait for startup")
+    ap.add_argument("--json", type=Path, default=None)
+    args = ap.parse_args()
+
+    if not Path("/proc/self/smaps_rollup").exists():
+        sys.exit("rss_report needs Linux /proc/<pid>/smaps_rollup")
+
+    tmp = Path(tempfile.mkdtemp(prefix="rss-report-"))
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(ADHD_START),
+        "LOG_LEVEL": "WARNING",
+        "JOB_WORKERS": "1",
+    }
+    results = []
+
+    port = _free_port()
+    uvicorn_env = {**env, "APP_PRELOAD": "1"}
+    if args.no_rag:
+        # preload() without RAG: keep the uvicorn layout comparable
+        uvicorn_env["APP_PRELOAD"] = "0"
+    cmd = [sys.executable, "-m", "uvicorn", "server.app:app", "--port", str(port),
+           "--workers", str(args.workers), "--log-level", "warning"]
+    print(f"measuring uvicorn --workers {args.workers} ...", file=sys.stderr)
+    results.append(measure("uvicorn", cmd, args.workers, uvicorn_env, port,
+                           args.warmup, args.timeout, tmp / "uvicorn.log"))
+
+    port = _free_port()
+    cmd = [sys.executable, "-m", "server.prefork", "--port", str(port), "--workers", str(args.workers)]
+    if args.no_rag:
+        cmd.append("--no-rag")
+    print(f"measuring server.prefork --workers {args.workers} ...", file=sys.stderr)
+    results.append(measure("prefork", cmd, args.workers, env, port,
+                           args.warmup, args.timeout, tmp / "prefork.log"))
+
+    print_report(results)
+    print(f"(server logs in {tmp})")
+    if args.json:
+        args.json.write_text(json.dumps({"workers": args.workers, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,16 @@
-import json
 from pathlib import Path
 import hashlib
-from datetime import datetime, timezone
+import os
+import threading
+import base64
+import json
+from collections import Counter, OrderedDict
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from .deadline_index import DeadlineIndex, parse_deadline
+from .fastjson import read_file, write_file
+from .metrics import timed
 
 # Base directory: .../adhd_start/server
 BASE_DIR = Path(__file__).resolve().parent
@@ -11,6 +20,13 @@ STORE_DIR = BASE_DIR / "store"
 USER_DIR = STORE_DIR / "user_data"
 USER_DIR.mkdir(parents=True, exist_ok=True)
 
+# Per-user bookmark caches kept in memory (least recently used dropped)
+BOOKMARK_INDEX_USERS = int(os.getenv("BOOKMARK_INDEX_USERS") or 1024)
+BOOKMARK_STATUSES = ("saved", "in_progress", "submitted", "won", "dropped")
+# What /upcoming counts as still to do
+OPEN_STATUSES = ("saved", "in_progress")
+BOOKMARK_SORTS = ("updated_at", "deadline")
+
 
 def user_path(user_id: str) -> Path:
     """Return the JSON path for this user."""
@@ -33,22 +49,22 @@ DEFAULT_USER = {
 }
 
 
+@timed("profile_load")
 def get_user(user_id: str):
     """Load user profile from disk, creating a default one if missing."""
     path = user_path(user_id)
     if not path.exists():
         save_user({**DEFAULT_USER, "user_id": user_id})
 
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return read_file(path)
 
 
+@timed("disk_io")
 def save_user(data: dict):
-    """Persist the user profile to disk."""
+    """Persist the user profile to disk (compact JSON)."""
     path = user_path(data["user_id"])
     path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    write_file(path, data)
 
 
 def update_preferences(user_id: str, **kwargs):
@@ -95,6 +111,7 @@ def upsert_bookmark(
     deadline: str | None = None,
     tags: list[str] | None = None,
 ):
+    before = _file_stamp(user_id)
     u = get_user(user_id)
     apps = u.setdefault("history", {}).setdefault("apps", [])
     tags = tags or []
@@ -108,6 +125,7 @@ def upsert_bookmark(
             b["tags"] = sorted(set((b.get("tags") or []) + tags))
             b["updated_at"] = _now_iso()
             save_user(u)
+            _reindex(user_id, before, b)
             return b
 
     # create new
@@ -126,9 +144,11 @@ def upsert_bookmark(
     }
     apps.append(new_bm)
     save_user(u)
+    _reindex(user_id, before, new_bm)
     return new_bm
 
 def set_bookmark_status(user_id: str, bookmark_id: str, status: str):
+    before = _file_stamp(user_id)
     u = get_user(user_id)
     apps = u.setdefault("history", {}).setdefault("apps", [])
     for b in apps:
@@ -136,5 +156,198 @@ def set_bookmark_status(user_id: str, bookmark_id: str, status: str):
             b["status"] = status
             b["updated_at"] = _now_iso()
             save_user(u)
+            _reindex(user_id, before, b)
             return b
     raise ValueError("bookmark_not_found")
+
+
+# bookmark cache: by id, per-status counts, deadline index
+#
+# Built from the profile file on first use, then patched by our own
+# writes above, so /bookmarks and /upcoming are answered without
+# re-reading and re-counting the file. Each cache remembers the file's
+# (mtime, size) as of the last write it accounted for; any other change
+# to the file (another worker, update_preferences, ...) makes the next
+# lookup rebuild it.
+
+def _status(bm: dict) -> str:
+    return bm.get("status") or "saved"
+
+
+class _BookmarkCache:
+    __slots__ = ("stamp", "built_on", "by_id", "counts", "deadlines")
+
+    def __init__(self, stamp: Optional[Tuple[int, int]], apps: List[dict]):
+        self.stamp = stamp
+        # free-form deadlines without a year resolve to the current year, so
+        # the index is only good for the day it was built
+        self.built_on = date.today()
+        self.by_id: Dict[str, dict] = {b["id"]: dict(b) for b in apps if b.get("id")}
+        self.counts = Counter(_status(b) for b in self.by_id.values())
+        # server/deadline_index.py, value = the bookmark dict
+        self.deadlines = DeadlineIndex((k, b.get("deadline"), b) for k, b in self.by_id.items())
+
+    def apply(self, bm: dict) -> None:
+        old = self.by_id.get(bm["id"])
+        if old is not None:
+            self.counts[_status(old)] -= 1
+        new = dict(bm)
+        self.by_id[bm["id"]] = new
+        self.counts[_status(new)] += 1
+        self.deadlines.upsert(bm["id"], new.get("deadline"), new)
+
+
+_bm_caches: "OrderedDict[str, _BookmarkCache]" = OrderedDict()
+_bm_caches_lock = threading.Lock()
+
+
+def _file_stamp(user_id: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = user_path(user_id).stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _reindex(user_id: str, before: Optional[Tuple[int, int]], bm: dict) -> None:
+    """After our own write: patch the cache if it matched the file we read, else drop it."""
+    with _bm_caches_lock:
+        cache = _bm_caches.get(user_id)
+        if cache is None:
+            return
+        if before is None or cache.stamp != before or cache.built_on != date.today():
+            del _bm_caches[user_id]
+            return
+        cache.apply(bm)
+        cache.stamp = _file_stamp(user_id)
+
+
+def _bookmark_cache(user_id: str) -> _BookmarkCache:
+    if not user_path(user_id).exists():
+        get_user(user_id)  # creates the default profile
+    stamp = _file_stamp(user_id)  # before reading: a later change forces a rebuild
+    with _bm_caches_lock:
+        cache = _bm_caches.get(user_id)
+        if cache is not None and cache.stamp == stamp and cache.built_on == date.today():
+            _bm_caches.move_to_end(user_id)
+            return cache
+    cache = _BookmarkCache(stamp, list_bookmarks(user_id))
+    with _bm_caches_lock:
+        _bm_caches[user_id] = cache
+        _bm_caches.move_to_end(user_id)
+        while len(_bm_caches) > BOOKMARK_INDEX_USERS:
+            _bm_caches.popitem(last=False)
+    return cache
+
+
+def bookmark_index(user_id: str) -> DeadlineIndex:
+    """The user's bookmarks ordered by deadline (value = bookmark dict)."""
+    return _bookmark_cache(user_id).deadlines
+
+
+def bookmark_counts(user_id: str) -> Dict[str, int]:
+    """Bookmarks per status (every status present, zeros included)."""
+    cache = _bookmark_cache(user_id)
+    with _bm_caches_lock:
+        return {st: cache.counts.get(st, 0) for st in BOOKMARK_STATUSES}
+
+
+def upcoming_bookmarks(
+    user_id: str,
+    start: date,
+    limit: int,
+    until: Optional[date] = None,
+    statuses: Optional[Tuple[str, ...]] = OPEN_STATUSES,
+) -> List[Tuple[date, dict]]:
+    """The next `limit` bookmark deadlines from `start` (open ones only by default)."""
+    where = None if statuses is None else (lambda bm: _status(bm) in statuses)
+    return bookmark_index(user_id).upcoming(start, limit, until=until, where=where)
+
+
+# paginated listing (/bookmarks)
+
+def _sort_key(sort: str, bm: dict) -> Tuple[Any, ...]:
+    if sort == "deadline":
+        # soonest first, bookmarks without a deadline last
+        d = parse_deadline(bm.get("deadline"))
+        return (0, d.toordinal(), bm["id"]) if d else (1, 0, bm["id"])
+    # most recently updated first
+    return (bm.get("updated_at") or bm.get("created_at") or "", bm["id"])
+
+
+def _encode_cursor(sort: str, key: Tuple[Any, ...]) -> str:
+    raw = json.dumps([sort, list(key)], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(sort: str, cursor: str) -> Tuple[Any, ...]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cur_sort, key = json.loads(raw)
+    except Exception:
+        raise ValueError("invalid_cursor")
+    shape = (int, int, str) if sort == "deadline" else (str, str)
+    if (
+        cur_sort != sort
+        or not isinstance(key, list)
+        or len(key) != len(shape)
+        or not all(type(k) is t for k, t in zip(key, shape))
+    ):
+        raise ValueError("invalid_cursor")
+    return tuple(key)
+
+
+def query_bookmarks(
+    user_id: str,
+    statuses: Optional[Tuple[str, ...]] = None,
+    tag: Optional[str] = None,
+    source_site: Optional[str] = None,
+    due_after: Optional[date] = None,
+    due_before: Optional[date] = None,
+    sort: str = "updated_at",
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    One page of bookmarks matching the filters.
+
+    Keyset pagination: `next_cursor` encodes the sort key of the last
+    item, so pages stay consistent while bookmarks are added or updated.
+    Returns {items, next_cursor, total (matching the filters), counts
+    (per status, over all of the user's bookmarks)}. Raises ValueError
+    for an unknown sort or a cursor from another query.
+    """
+    if sort not in BOOKMARK_SORTS:
+        raise ValueError("invalid_sort")
+    after = _decode_cursor(sort, cursor) if cursor else None
+
+    cache = _bookmark_cache(user_id)
+    if due_after or due_before:
+        candidates = [bm for _, bm in cache.deadlines.range(due_after, due_before)]
+    else:
+        with _bm_caches_lock:
+            candidates = list(cache.by_id.values())
+    with _bm_caches_lock:
+        counts = {st: cache.counts.get(st, 0) for st in BOOKMARK_STATUSES}
+
+    site = (source_site or "").lower()
+    matched = [
+        bm
+        for bm in candidates
+        if (statuses is None or _status(bm) in statuses)
+        and (not tag or tag in (bm.get("tags") or []))
+        and (not site or (bm.get("source_site") or "").lower() == site)
+    ]
+    descending = sort == "updated_at"
+    keyed = sorted(((_sort_key(sort, bm), bm) for bm in matched), key=lambda kb: kb[0], reverse=descending)
+    if after is not None:
+        keyed = [kb for kb in keyed if (kb[0] < after if descending else kb[0] > after)]
+
+    page = keyed[:limit]
+    next_cursor = _encode_cursor(sort, page[-1][0]) if len(keyed) > limit else None
+    return {
+        "items": [bm for _, bm in page],
+        "next_cursor": next_cursor,
+        "total": len(matched),
+        "counts": counts,
+    }